@@ -0,0 +1,280 @@
+"""
+Offline benchmarks of the enhancer pipeline stages on synthetic data
+
+Every stage is timed over several repeats and run once more under
+tracemalloc for its peak memory. Results are written as JSON together with
+the commit and library versions, so runs of different commits can be
+compared to catch regressions.
+
+Usage:
+    python benchmarks/run_benchmarks.py --rows 1000 100000 1000000 --output results.json
+    python benchmarks/run_benchmarks.py --rows 100000 --output new.json --baseline old.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+import contextlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from genomics_benchmark.data import EnhancerProcessor, gene_annotation
+from genomics_benchmark.data.reference_genome import _decompress_gz
+from genomics_benchmark.utils.synthetic import (
+    synthetic_genes, write_synthetic_enhancer_table, write_synthetic_gtf, write_synthetic_fasta
+)
+
+# Bump when stages or their inputs change so results are not compared across versions
+BENCHMARK_VERSION = 1
+
+def measure(func: Callable, setup: Callable[[], tuple], repeat: int = 3) -> Dict[str, Any]:
+    """
+    Time a function and measure its peak traced memory
+    
+    Args:
+        func: Function to benchmark
+        setup: Function returning the arguments of func, run untimed before every call
+        repeat: Number of timed calls
+        
+    Returns:
+        Dictionary with the best and median wall time, the best CPU time and
+        the peak tracemalloc memory of one extra call
+    """
+    wall, cpu = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            args = setup()
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+            func(*args)
+            wall.append(time.perf_counter() - start_wall)
+            cpu.append(time.process_time() - start_cpu)
+        
+        # Tracing slows allocations down, so memory is measured in a separate call
+        args = setup()
+        tracemalloc.start()
+        try:
+            func(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {
+        'wall_seconds': min(wall),
+        'wall_seconds_median': float(np.median(wall)),
+        'cpu_seconds': min(cpu),
+        'peak_memory_bytes': int(peak),
+    }
+
+def _remove(*paths: Path) -> tuple:
+    for path in paths:
+        if path.exists():
+            path.unlink()
+    return ()
+
+def _clear_gene_tables(gtf_path: Path) -> None:
+    gene_annotation._loaded_tables.clear()
+    for path in gtf_path.parent.glob('*.genes.*'):
+        path.unlink()
+
+def benchmark_scale(
+    n_rows: int,
+    workdir: Path,
+    repeat: int = 3,
+    n_genes: Optional[int] = None,
+    genome_bp: int = 10000000,
+    distance_threshold: int = 1000000,
+    seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Benchmark all pipeline stages on one synthetic dataset
+    
+    Args:
+        n_rows: Number of enhancer-gene pairs
+        workdir: Directory for the synthetic inputs
+        repeat: Number of timed calls per stage
+        n_genes: Number of genes in the GTF, defaults to n_rows / 50 clipped to [100, 60000]
+        genome_bp: Total size of the compressed FASTA decompressed by _decompress_gz
+        distance_threshold: Threshold passed to _filter_data
+        seed: Random seed of the synthetic data
+        
+    Returns:
+        List of result dictionaries, one per stage
+    """
+    workdir = Path(workdir) / f"rows-{n_rows}"
+    if n_genes is None:
+        n_genes = int(np.clip(n_rows // 50, 100, 60000))
+    genes = synthetic_genes(n_genes, seed=seed)
+    table_path = write_synthetic_enhancer_table(workdir / "Merged.tsv", n_rows, genes, seed=seed)
+    gtf_path = write_synthetic_gtf(workdir / "annotation" / "synthetic.gtf.gz", genes)
+    chrom_sizes = {'chr1': genome_bp // 2, 'chr2': genome_bp - genome_bp // 2}
+    fasta_gz_path = write_synthetic_fasta(workdir / "genome" / "synthetic.fa.gz", chrom_sizes, seed=seed)
+    fasta_path = fasta_gz_path.with_suffix('')
+    
+    processor = EnhancerProcessor('Merged', cache_root=workdir / "cache")
+    with contextlib.redirect_stdout(io.StringIO()):
+        raw = processor._load_file(table_path)
+        standardized = processor._standardize_columns(raw)
+        processed = processor._process_data(standardized.copy())
+        filtered = processor._filter_data(processed, distance_threshold)
+        processor._add_strand_info(filtered, gtf_path)
+    
+    stages = [
+        ('_load_file', processor._load_file, lambda: (table_path,), table_path.stat().st_size),
+        ('_standardize_columns', processor._standardize_columns, lambda: (raw,), None),
+        ('_process_data', processor._process_data, lambda: (standardized.copy(),), None),
+        ('_filter_data', processor._filter_data, lambda: (processed, distance_threshold), None),
+        ('_add_strand_info', processor._add_strand_info, lambda: (filtered, gtf_path), None),
+        (
+            '_add_strand_info[cold]', processor._add_strand_info,
+            lambda: (_clear_gene_tables(gtf_path) or filtered, gtf_path), gtf_path.stat().st_size
+        ),
+        ('calculate_metrics', processor.calculate_metrics, lambda: (filtered,), None),
+        (
+            '_decompress_gz', _decompress_gz,
+            lambda: _remove(fasta_path) + (fasta_gz_path, fasta_path), fasta_gz_path.stat().st_size
+        ),
+    ]
+    
+    results = []
+    for name, func, setup, input_bytes in stages:
+        print(f"Benchmarking {name} on {n_rows} rows...")
+        result = {'stage': name, 'rows': n_rows, 'input_bytes': input_bytes, 'repeat': repeat}
+        result.update(measure(func, setup, repeat))
+        result['rows_per_second'] = n_rows / result['wall_seconds'] if result['wall_seconds'] > 0 else None
+        print(f"  {result['wall_seconds']:.4f} s, peak {result['peak_memory_bytes'] / 2**20:.1f} MiB")
+        results.append(result)
+    return results
+
+def environment_info() -> Dict[str, Any]:
+    """Commit, platform and library versions of the benchmark run"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=Path(__file__).parent,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    versions = {'numpy': np.__version__, 'pandas': pd.__version__}
+    try:
+        import pyarrow
+        versions['pyarrow'] = pyarrow.__version__
+    except ImportError:
+        versions['pyarrow'] = None
+    return {
+        'benchmark_version': BENCHMARK_VERSION,
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'versions': versions,
+    }
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.25,
+    min_seconds: float = 0.01
+) -> List[Dict[str, Any]]:
+    """
+    Find stages that got slower or use more memory than in a baseline run
+    
+    Args:
+        current: Results of this run
+        baseline: Results of a previous run
+        tolerance: Allowed relative increase
+        min_seconds: Stages faster than this in both runs are ignored as noise
+        
+    Returns:
+        List of regressions with stage, rows, metric, baseline, current and ratio
+    """
+    previous = {(r['stage'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get((result['stage'], result['rows']))
+        if old is None:
+            continue
+        for metric in ('wall_seconds', 'peak_memory_bytes'):
+            if metric == 'wall_seconds' and max(old[metric], result[metric]) < min_seconds:
+                continue
+            if old[metric] > 0 and result[metric] > old[metric] * (1 + tolerance):
+                regressions.append({
+                    'stage': result['stage'],
+                    'rows': result['rows'],
+                    'metric': metric,
+                    'baseline': old[metric],
+                    'current': result[metric],
+                    'ratio': result[metric] / old[metric],
+                })
+    return regressions
+
+def run_benchmarks(
+    rows: Sequence[int],
+    workdir: Optional[Path] = None,
+    repeat: int = 3,
+    genome_bp: int = 10000000,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Benchmark all stages at every scale
+    
+    Args:
+        rows: Numbers of enhancer-gene pairs to benchmark
+        workdir: Directory for the synthetic inputs, a temporary directory if None
+        repeat: Number of timed calls per stage
+        genome_bp: Size of the synthetic genome for _decompress_gz
+        seed: Random seed of the synthetic data
+        
+    Returns:
+        Dictionary with the environment info and the results of all stages
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        workdir = Path(workdir) if workdir is not None else Path(tmp_dir)
+        results = []
+        for n_rows in rows:
+            results.extend(benchmark_scale(n_rows, workdir, repeat=repeat, genome_bp=genome_bp, seed=seed))
+    return {'environment': environment_info(), 'results': results}
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the enhancer pipeline on synthetic data")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000],
+                        help="Numbers of enhancer-gene pairs, e.g. 1000 to 100000000")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed calls per stage")
+    parser.add_argument("--genome-bp", type=int, default=10000000, help="Size of the synthetic genome")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data")
+    parser.add_argument("--workdir", default=None, help="Directory for the synthetic inputs")
+    parser.add_argument("--output", default="benchmark_results.json", help="Output JSON file")
+    parser.add_argument("--baseline", default=None, help="Results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+    
+    results = run_benchmarks(args.rows, args.workdir, args.repeat, args.genome_bp, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to: {args.output}")
+    
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['environment'].get('benchmark_version') != BENCHMARK_VERSION:
+        print("Warning: baseline was produced by a different benchmark version")
+    regressions = compare_results(results, baseline, args.tolerance)
+    for r in regressions:
+        print(f"Regression: {r['stage']} ({r['rows']} rows) {r['metric']} "
+              f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['ratio']:.2f}x)")
+    if not regressions:
+        print("No regressions found")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,46 @@
 """
 Data processing module for genomics benchmark
+
+Public names are imported from their submodules on first access, so importing
+the package, e.g. for get_dataset_config, does not load pandas, numpy,
+scikit-learn or requests.
 """
+import importlib
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    'EnhancerProcessor': 'enhancer_processor',
+    'EqtlProcessor': 'eqtl_processor',
+    'iter_tissue_batches': 'eqtl_processor',
+    'BaseDataset': 'base_dataset',
+    'DataDownloader': 'download',
+    'CacheStore': 'cache_store',
+    'prefetch_datasets': 'prefetch',
+    'load_gene_table': 'gene_annotation',
+    'build_gene_table': 'gene_annotation',
+    'TSSIndex': 'tss_index',
+    'iter_candidate_pairs': 'candidate_pairs',
+    'write_candidate_pairs': 'candidate_pairs',
+    'extract_sequence_tensors': 'sequence',
+    'MinibatchLoader': 'batching',
+    'one_hot_encode': 'sequence',
+    'parse_variant_ids': 'variants',
+    'extract_variant_windows': 'variants',
+    'ReferenceGenome': 'reference_genome',
+    'TwoBitGenome': 'twobit',
+    'download_reference_genome': 'reference_genome',
+    'get_dataset_config': 'dataset_config',
+}
+
+__all__ = list(_EXPORTS)
 
-from .enhancer_processor import EnhancerProcessor
-from .base_dataset import BaseDataset
-from .download import DataDownloader
-from .reference_genome import download_reference_genome, get_dataset_config
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
 
-__all__ = [
-    'EnhancerProcessor',
-    'BaseDataset',
-    'DataDownloader',
-    'download_reference_genome',
-    'get_dataset_config'
-]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -3,9 +3,14 @@ Base dataset class that integrates data download and preprocessing functionality
 """
 import os
 from pathlib import Path
-from typing import Optional, Union, Dict, Any
+from typing import Optional, Union, Dict, Any, List, Iterable, TYPE_CHECKING
 from .download import DataDownloader
-from .reference_genome import get_dataset_config
+from .cache_store import CacheStore
+from .dataset_config import get_dataset_config
+from ..utils.locking import atomic_output
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 class BaseDataset:
     """Base dataset class"""
@@ -14,7 +19,8 @@ class BaseDataset:
         self,
         task_name: str,
         dataset_name: str,
-        cache_root: Optional[Union[str, Path]] = None
+        cache_root: Optional[Union[str, Path]] = None,
+        max_cache_bytes: Optional[int] = None
     ):
         """
         Initialize dataset
@@ -23,6 +29,8 @@ class BaseDataset:
             task_name: Name of the task
             dataset_name: Name of the dataset
             cache_root: Cache root directory, defaults to .cache/genomics_benchmark in user's home directory
+            max_cache_bytes: Byte quota of the shared download store under cache_root,
+                least recently used files are evicted when exceeded. No limit if None
         """
         self.task_name = task_name
         self.dataset_name = dataset_name
@@ -39,8 +47,11 @@ class BaseDataset:
         # Get configuration
         self.config = get_dataset_config(task_name, dataset_name)
         
+        # Initialize content-addressed store shared by all datasets
+        self.store = CacheStore(self.cache_root / "store", max_bytes=max_cache_bytes)
+        
         # Initialize downloader and preprocessor
-        self.downloader = DataDownloader(self.cache_dir)
+        self.downloader = DataDownloader(self.cache_dir, store=self.store)
         
         # Data file paths
         self.data_path = None
@@ -80,6 +91,7 @@ class BaseDataset:
                         path.rmdir()
         else:
             # Clear only current dataset cache
+            self.store.remove(self.config["data_url"])
             if self.cache_dir.exists():
                 for file in self.cache_dir.glob("*"):
                     file.unlink()
@@ -91,4 +103,94 @@ class BaseDataset:
     @property
     def cache_path(self) -> Path:
         """Get cache directory for current dataset"""
-        return self.cache_dir 
\ No newline at end of file
+        return self.cache_dir 
+    
+    @staticmethod
+    def memory_footprint(df: 'pd.DataFrame') -> Dict[str, int]:
+        """
+        Get the memory footprint of a DataFrame
+        
+        Args:
+            df: DataFrame
+            
+        Returns:
+            Bytes used by every column (including string contents) and in 'total'
+        """
+        usage = df.memory_usage(deep=True, index=True)
+        footprint = {str(column): int(size) for column, size in usage.items()}
+        footprint['total'] = int(usage.sum())
+        return footprint
+    
+    def analyze_label_distribution(self, df: 'pd.DataFrame') -> Dict[str, Any]:
+        """
+        Analyze label distribution
+        
+        Args:
+            df: DataFrame
+            
+        Returns:
+            Dictionary containing label distribution information
+        """
+        if 'labels' not in df.columns:
+            raise ValueError("Labels column not found in data")
+        
+        # Calculate label distribution
+        label_counts = df['labels'].value_counts()
+        label_percentages = df['labels'].value_counts(normalize=True) * 100
+        
+        # Calculate total samples and positive-negative ratio
+        total_samples = len(df)
+        pos_neg_ratio = label_counts[1] / label_counts[0] if 0 in label_counts and 1 in label_counts else 0
+        
+        return {
+            'total_samples': total_samples,
+            'label_counts': label_counts.to_dict(),
+            'label_percentages': label_percentages.to_dict(),
+            'positive_negative_ratio': pos_neg_ratio
+        }
+    
+    def write_chunks(
+        self,
+        chunks: Iterable['pd.DataFrame'],
+        output_path: Optional[Union[str, Path]] = None,
+        keep_columns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Write processed chunks to a TSV file as they are generated
+        
+        The file is written under a temporary name and published once all
+        chunks are written.
+        
+        Args:
+            chunks: Processed DataFrames, e.g. from load(chunksize=...)
+            output_path: Path to save the processed data, chunks are only consumed if None
+            keep_columns: Columns of every chunk to collect in memory, e.g. for statistics
+            
+        Returns:
+            Dictionary with num_rows, columns, max_chunk_bytes and kept (DataFrame of the kept columns)
+        """
+        import pandas as pd
+        
+        keep_columns = keep_columns or []
+        summary = {'num_rows': 0, 'columns': [], 'max_chunk_bytes': 0}
+        kept = []
+        
+        def consume(f=None):
+            for chunk in chunks:
+                if f is not None:
+                    chunk.to_csv(f, sep='\t', index=False, header=not summary['columns'])
+                if not summary['columns']:
+                    summary['columns'] = chunk.columns.tolist()
+                summary['num_rows'] += len(chunk)
+                summary['max_chunk_bytes'] = max(summary['max_chunk_bytes'], self.memory_footprint(chunk)['total'])
+                kept.append(chunk[[col for col in keep_columns if col in chunk.columns]])
+        
+        if output_path is None:
+            consume()
+        else:
+            with atomic_output(output_path) as tmp_path:
+                with open(tmp_path, 'w') as f:
+                    consume(f)
+        
+        summary['kept'] = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame(columns=keep_columns)
+        return summary
@@ -0,0 +1,235 @@
+"""
+Framework-agnostic minibatch iteration over processed datasets
+"""
+import queue
+import threading
+import collections
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence, Iterator
+from .sequence import extract_windows, _window_coordinates
+
+# Feature columns of the processed enhancer tables used if none are given
+DEFAULT_FEATURE_COLUMNS = ('hic_contact', 'activity_enh', 'distance')
+
+_worker_arrays = None
+
+def _init_worker(arrays: Dict[str, np.ndarray], genome, sequence_width: Optional[int], one_hot: bool) -> None:
+    global _worker_arrays
+    _worker_arrays = (arrays, genome, sequence_width, one_hot)
+
+def _worker_batch(indices: np.ndarray) -> Dict[str, np.ndarray]:
+    return _make_batch(*_worker_arrays, indices)
+
+def _make_batch(
+    arrays: Dict[str, np.ndarray],
+    genome,
+    sequence_width: Optional[int],
+    one_hot: bool,
+    indices: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Gather the rows of one minibatch and extract their sequence windows"""
+    batch = {
+        'features': arrays['features'][indices],
+        'labels': arrays['labels'][indices],
+        'index': indices,
+    }
+    if genome is not None:
+        batch['sequences'] = extract_windows(
+            genome, arrays['chroms'][indices], arrays['centers'][indices], sequence_width, one_hot=one_hot
+        )
+    return batch
+
+class MinibatchLoader:
+    """Iterates over NumPy minibatches of features, labels and optional sequence windows"""
+    
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        feature_columns: Optional[Sequence[str]] = None,
+        label_column: str = 'labels',
+        batch_size: int = 256,
+        shuffle: bool = False,
+        seed: Optional[int] = None,
+        drop_last: bool = False,
+        genome=None,
+        sequence_width: Optional[int] = None,
+        center_column: str = 'enhancer_center',
+        chrom_column: str = 'chr',
+        one_hot: bool = True,
+        prefetch: int = 2,
+        num_workers: int = 0,
+        mp_context: Optional[str] = None
+    ):
+        """
+        Initialize minibatch loader
+        
+        Feature and label columns are copied into contiguous arrays once, so
+        building a batch is a single fancy-indexing gather per array.
+        
+        Args:
+            df: Processed data, e.g. the output of EnhancerProcessor.load
+            feature_columns: Feature columns stacked as float32, defaults to
+                'hic_contact', 'activity_enh' and 'distance'
+            label_column: Label column
+            batch_size: Number of rows per batch
+            shuffle: Whether to shuffle the rows every epoch
+            seed: Seed of the shuffling. Every epoch draws its order from its own
+                child of SeedSequence(seed), so orders only depend on seed and epoch
+            drop_last: Whether to drop the last incomplete batch
+            genome: Optional opened genome, e.g. ReferenceGenome, to add windows
+                around center_column to every batch
+            sequence_width: Width of the sequence windows, required with genome
+            center_column: Column with 0-based window centers, e.g. 'enhancer_center' or 'gene_tss'
+            chrom_column: Column with chromosome names
+            one_hot: Whether to one-hot encode the sequence windows
+            prefetch: Number of batches prepared ahead in a background thread, 0 to
+                build batches on demand
+            num_workers: Number of worker processes building batches, 0 to build
+                them in this process. Useful when sequence extraction dominates.
+                The genome is pickled to the workers; ReferenceGenome and
+                TwoBitGenome reopen their file by path there, so any start method works
+            mp_context: Start method of the worker processes, e.g. 'spawn', defaults
+                to the platform default
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        if genome is not None and not sequence_width:
+            raise ValueError("sequence_width is required to extract sequence windows")
+        feature_columns = list(feature_columns if feature_columns is not None else DEFAULT_FEATURE_COLUMNS)
+        missing_columns = [col for col in feature_columns + [label_column] if col not in df.columns]
+        if missing_columns:
+            raise ValueError(f"Columns not found in data: {missing_columns}")
+        
+        self.feature_columns = feature_columns
+        self.arrays = {
+            'features': np.ascontiguousarray(df[feature_columns].to_numpy(dtype=np.float32)),
+            'labels': df[label_column].to_numpy(),
+        }
+        if genome is not None:
+            self.arrays['chroms'], self.arrays['centers'] = _window_coordinates(df, center_column, chrom_column)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        # Fresh entropy is drawn once, so epochs stay reproducible within this loader
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.drop_last = drop_last
+        self.genome = genome
+        self.sequence_width = sequence_width
+        self.one_hot = one_hot
+        self.prefetch = prefetch
+        self.num_workers = num_workers
+        self.mp_context = mp_context
+        self.epoch = 0
+    
+    @property
+    def num_rows(self) -> int:
+        return len(self.arrays['labels'])
+    
+    def __len__(self) -> int:
+        if self.drop_last:
+            return self.num_rows // self.batch_size
+        return -(-self.num_rows // self.batch_size)
+    
+    def set_epoch(self, epoch: int) -> None:
+        """Set the epoch whose row order the next iteration uses"""
+        self.epoch = epoch
+    
+    def batch_indices(self, epoch: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        Generate the row indices of every batch of an epoch
+        
+        Args:
+            epoch: Epoch, defaults to the epoch set with set_epoch
+            
+        Yields:
+            int64 arrays of row positions
+        """
+        epoch = self.epoch if epoch is None else epoch
+        if self.shuffle:
+            seed = np.random.SeedSequence(self.seed_sequence.entropy, spawn_key=(epoch,))
+            order = np.random.default_rng(seed).permutation(self.num_rows)
+        else:
+            order = np.arange(self.num_rows)
+        for start in range(0, len(self) * self.batch_size, self.batch_size):
+            yield order[start:start + self.batch_size]
+    
+    def _build(self, indices: np.ndarray) -> Dict[str, np.ndarray]:
+        return _make_batch(self.arrays, self.genome, self.sequence_width, self.one_hot, indices)
+    
+    def __iter__(self) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Iterate over the batches of the current epoch
+        
+        Yields:
+            Dictionaries with 'features' (batch_size, n_features) float32,
+            'labels', 'index' (row positions in df) and, with a genome,
+            'sequences' (batch_size, sequence_width, 4) uint8 if one_hot
+        """
+        indices = self.batch_indices()
+        if self.num_workers > 0:
+            return self._iter_workers(indices)
+        if self.prefetch > 0:
+            return self._iter_prefetch(indices)
+        return (self._build(batch) for batch in indices)
+    
+    def _iter_prefetch(self, indices: Iterator[np.ndarray]) -> Iterator[Dict[str, np.ndarray]]:
+        """Build batches in a background thread, at most prefetch ahead of the consumer"""
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+        
+        def produce():
+            try:
+                for batch in indices:
+                    item = self._build(batch)
+                    while not stop.is_set():
+                        try:
+                            batches.put(item, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+                item = done
+            except BaseException as e:
+                item = e
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Also stops the thread when the consumer breaks out early
+            stop.set()
+            thread.join()
+    
+    def _iter_workers(self, indices: Iterator[np.ndarray]) -> Iterator[Dict[str, np.ndarray]]:
+        """Build batches in worker processes, yielded in order"""
+        max_pending = self.num_workers + max(self.prefetch, 1)
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context(self.mp_context),
+            initializer=_init_worker,
+            initargs=(self.arrays, self.genome, self.sequence_width, self.one_hot)
+        ) as executor:
+            pending = collections.deque()
+            for batch in indices:
+                pending.append(executor.submit(_worker_batch, batch))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
@@ -0,0 +1,423 @@
+"""
+Streaming gzip decompression and block-gzip (BGZF) compression with random access
+"""
+import os
+import zlib
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Union, Iterator, List, Tuple, BinaryIO
+
+# Largest uncompressed payload per block, as used by htslib so that compressed blocks fit in 64 KiB
+BGZF_BLOCK_SIZE = 0xff00
+BGZF_HEADER = struct.Struct('<4BI2BH2BHH')
+BGZF_EOF = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000000000')
+READ_SIZE = 1 << 20
+
+def _default_threads(threads: Optional[int]) -> int:
+    return max(1, threads if threads else (os.cpu_count() or 1))
+
+def compress_block(data: bytes, level: int = 6) -> bytes:
+    """
+    Compress data into a single BGZF block
+    
+    Args:
+        data: Uncompressed payload, at most BGZF_BLOCK_SIZE bytes
+        level: zlib compression level
+        
+    Returns:
+        BGZF block
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    payload = compressor.compress(data) + compressor.flush()
+    header = BGZF_HEADER.pack(
+        0x1f, 0x8b, 8, 4, 0, 0, 0xff, 6, 66, 67, 2, len(payload) + 25
+    )
+    trailer = struct.pack('<II', zlib.crc32(data) & 0xffffffff, len(data))
+    return header + payload + trailer
+
+def _bgzf_block_size(header: bytes) -> Optional[int]:
+    """
+    Get the total size of a BGZF block from its header
+    
+    Args:
+        header: First 18 bytes of a gzip member
+        
+    Returns:
+        Size of the block in bytes, or None if the member is not a BGZF block
+    """
+    if len(header) < BGZF_HEADER.size:
+        return None
+    fields = BGZF_HEADER.unpack(header[:BGZF_HEADER.size])
+    if fields[:4] != (0x1f, 0x8b, 8, 4) or fields[8:10] != (66, 67):
+        return None
+    return fields[11] + 1
+
+def is_bgzf(path: Union[str, Path]) -> bool:
+    """
+    Check whether a file is block-gzip compressed
+    
+    Args:
+        path: Path to the file
+        
+    Returns:
+        Whether the first member of the file is a BGZF block
+    """
+    with open(path, 'rb') as f:
+        return _bgzf_block_size(f.read(BGZF_HEADER.size)) is not None
+
+def iter_bgzf_blocks(f: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    """
+    Iterate over the raw blocks of a BGZF stream
+    
+    Args:
+        f: Binary file positioned at a block boundary
+        
+    Yields:
+        Tuples of (compressed offset, raw block)
+    """
+    offset = f.tell()
+    while True:
+        header = f.read(BGZF_HEADER.size)
+        if not header:
+            return
+        block_size = _bgzf_block_size(header)
+        if block_size is None:
+            raise ValueError(f"Invalid BGZF block at offset {offset}")
+        block = header + f.read(block_size - len(header))
+        yield offset, block
+        offset += block_size
+
+def decompress_block(block: bytes) -> bytes:
+    """
+    Decompress a single BGZF block and check its CRC
+    
+    Args:
+        block: Raw BGZF block
+        
+    Returns:
+        Uncompressed payload
+    """
+    data = zlib.decompress(block[BGZF_HEADER.size:-8], -15)
+    crc, size = struct.unpack('<II', block[-8:])
+    if size != len(data) or crc != (zlib.crc32(data) & 0xffffffff):
+        raise ValueError("BGZF block failed its integrity check")
+    return data
+
+def iter_gzip_chunks(path: Union[str, Path], threads: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Stream the decompressed content of a gzip file in bounded memory
+    
+    BGZF files are split on block boundaries and inflated in parallel on a
+    thread pool, as zlib releases the GIL while decompressing. A plain gzip
+    stream can only be inflated on one core. It is piped through pigz if it is
+    installed, which reads, checks and writes on its own threads outside this
+    process. Otherwise a background thread reads the file while the calling
+    thread inflates it. Keep files that are read repeatedly as BGZF, e.g. with
+    download_reference_genome(fasta_format='bgzf'), to inflate them on all cores.
+    
+    Args:
+        path: Path to the .gz file
+        threads: Number of decompression threads, defaults to the CPU count.
+            pigz is not used with a single thread
+        
+    Yields:
+        Chunks of decompressed data
+    """
+    threads = _default_threads(threads)
+    if is_bgzf(path):
+        with open(path, 'rb') as f, ThreadPoolExecutor(max_workers=threads) as executor:
+            pending = deque()
+            for _, block in iter_bgzf_blocks(f):
+                pending.append(executor.submit(decompress_block, block))
+                if len(pending) >= threads * 4:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        return
+    
+    pigz = shutil.which('pigz') if threads > 1 else None
+    if pigz is not None:
+        yield from _iter_pigz_chunks(path, pigz)
+    else:
+        yield from _iter_zlib_chunks(path)
+
+def _iter_pigz_chunks(path: Union[str, Path], pigz: str) -> Iterator[bytes]:
+    """Stream the output of pigz decompressing a gzip file"""
+    process = subprocess.Popen([pigz, '-d', '-c', str(path)], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        for chunk in iter(lambda: process.stdout.read(READ_SIZE), b''):
+            yield chunk
+        if process.wait():
+            # Inflate in this process to raise the same error as without pigz
+            for _ in _iter_zlib_chunks(path):
+                pass
+            raise ValueError(f"pigz failed to decompress: {path}")
+    finally:
+        # Also stops pigz when the consumer breaks out early
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+
+def _iter_zlib_chunks(path: Union[str, Path]) -> Iterator[bytes]:
+    """Inflate a plain, possibly multi-member gzip file while a background thread reads it"""
+    chunks = queue.Queue(maxsize=8)
+    stop = threading.Event()
+    
+    def read_file():
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(READ_SIZE), b''):
+                    while not stop.is_set():
+                        try:
+                            chunks.put(chunk, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+        finally:
+            while not stop.is_set():
+                try:
+                    chunks.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+    
+    reader = threading.Thread(target=read_file, daemon=True)
+    reader.start()
+    try:
+        decompressor = zlib.decompressobj(31)
+        in_member = False
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            while chunk:
+                in_member = True
+                data = decompressor.decompress(chunk, READ_SIZE)
+                if data:
+                    yield data
+                chunk = decompressor.unconsumed_tail
+                if decompressor.eof:
+                    # Start the next gzip member
+                    chunk = decompressor.unused_data + chunk
+                    decompressor = zlib.decompressobj(31)
+                    in_member = False
+        if in_member:
+            raise EOFError(f"Compressed file ended before the end-of-stream marker: {path}")
+    finally:
+        stop.set()
+        reader.join()
+
+class BgzfWriter:
+    """Writer that compresses a stream into BGZF blocks on a thread pool"""
+    
+    def __init__(
+        self,
+        path: Union[str, Path],
+        index_path: Optional[Union[str, Path]] = None,
+        threads: Optional[int] = None,
+        level: int = 6
+    ):
+        """
+        Initialize BGZF writer
+        
+        Args:
+            path: Path of the BGZF file to write
+            index_path: Path of the samtools-compatible .gzi index to write, no index if None
+            threads: Number of compression threads, defaults to the CPU count
+            level: zlib compression level
+        """
+        self.path = Path(path)
+        self.index_path = Path(index_path) if index_path is not None else None
+        self.level = level
+        self.threads = _default_threads(threads)
+        self._file = open(self.path, 'wb')
+        self._executor = ThreadPoolExecutor(max_workers=self.threads)
+        self._pending = deque()
+        self._buffer = bytearray()
+        self._index = []
+        self._compressed_offset = 0
+        self._uncompressed_offset = 0
+    
+    def write(self, data: bytes) -> int:
+        """
+        Write uncompressed data
+        
+        Args:
+            data: Data to compress
+            
+        Returns:
+            Number of bytes written
+        """
+        self._buffer += data
+        if len(self._buffer) >= BGZF_BLOCK_SIZE:
+            full = len(self._buffer) - len(self._buffer) % BGZF_BLOCK_SIZE
+            for start in range(0, full, BGZF_BLOCK_SIZE):
+                self._submit(bytes(self._buffer[start:start + BGZF_BLOCK_SIZE]))
+            del self._buffer[:full]
+        return len(data)
+    
+    def _submit(self, data: bytes) -> None:
+        self._pending.append((len(data), self._executor.submit(compress_block, data, self.level)))
+        # Bound the number of blocks held in memory
+        while len(self._pending) > self.threads * 4:
+            self._write_next()
+    
+    def _write_next(self) -> None:
+        size, future = self._pending.popleft()
+        block = future.result()
+        if self._compressed_offset > 0:
+            self._index.append((self._compressed_offset, self._uncompressed_offset))
+        self._file.write(block)
+        self._compressed_offset += len(block)
+        self._uncompressed_offset += size
+    
+    def close(self) -> None:
+        """Flush remaining data, write the EOF marker and the .gzi index"""
+        if self._file.closed:
+            return
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._write_next()
+            self._file.write(BGZF_EOF)
+        finally:
+            self._executor.shutdown()
+            self._file.close()
+        
+        if self.index_path is not None:
+            write_gzi(self.index_path, self._index)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown()
+            self._file.close()
+
+def write_gzi(path: Union[str, Path], index: List[Tuple[int, int]]) -> None:
+    """
+    Write a samtools-compatible .gzi index
+    
+    Args:
+        path: Path of the index file
+        index: (compressed offset, uncompressed offset) of every block but the first
+    """
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<Q', len(index)))
+        for compressed_offset, uncompressed_offset in index:
+            f.write(struct.pack('<QQ', compressed_offset, uncompressed_offset))
+
+def read_gzi(path: Union[str, Path]) -> List[Tuple[int, int]]:
+    """
+    Read a samtools-compatible .gzi index
+    
+    Args:
+        path: Path of the index file
+        
+    Returns:
+        (compressed offset, uncompressed offset) of every block, including the first
+    """
+    with open(path, 'rb') as f:
+        count, = struct.unpack('<Q', f.read(8))
+        entries = struct.unpack(f'<{2 * count}Q', f.read(16 * count))
+    return [(0, 0)] + list(zip(entries[::2], entries[1::2]))
+
+class BgzfReader:
+    """Random-access reader for BGZF files by uncompressed offset"""
+    
+    def __init__(self, path: Union[str, Path], index_path: Optional[Union[str, Path]] = None, cache_blocks: int = 64):
+        """
+        Initialize BGZF reader
+        
+        Args:
+            path: Path of the BGZF file
+            index_path: Path of the .gzi index, defaults to path + '.gzi'. Built by
+                scanning the block headers if the file does not exist
+            cache_blocks: Number of decompressed blocks kept in memory
+        """
+        self.path = Path(path)
+        index_path = Path(index_path) if index_path is not None else self.path.with_name(self.path.name + '.gzi')
+        if index_path.exists():
+            index = read_gzi(index_path)
+        else:
+            index = self._scan_index()
+        self._compressed_offsets = [entry[0] for entry in index]
+        self._uncompressed_offsets = [entry[1] for entry in index]
+        self._file = open(self.path, 'rb')
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_blocks = cache_blocks
+    
+    def _scan_index(self) -> List[Tuple[int, int]]:
+        index = []
+        uncompressed_offset = 0
+        with open(self.path, 'rb') as f:
+            for offset, block in iter_bgzf_blocks(f):
+                size, = struct.unpack('<I', block[-4:])
+                if size:
+                    index.append((offset, uncompressed_offset))
+                uncompressed_offset += size
+        return index or [(0, 0)]
+    
+    def _block(self, block_index: int) -> bytes:
+        with self._lock:
+            data = self._cache.get(block_index)
+            if data is not None:
+                self._cache.move_to_end(block_index)
+                return data
+            self._file.seek(self._compressed_offsets[block_index])
+            header = self._file.read(BGZF_HEADER.size)
+            block = header + self._file.read(_bgzf_block_size(header) - len(header))
+            data = decompress_block(block)
+            self._cache[block_index] = data
+            if len(self._cache) > self._cache_blocks:
+                self._cache.popitem(last=False)
+            return data
+    
+    def read(self, offset: int, size: int) -> bytes:
+        """
+        Read uncompressed bytes
+        
+        Args:
+            offset: Offset in the uncompressed stream
+            size: Number of bytes to read
+            
+        Returns:
+            Uncompressed bytes, shorter than size at the end of the stream
+        """
+        block_index = bisect_right(self._uncompressed_offsets, offset) - 1
+        result = bytearray()
+        while size > 0 and block_index < len(self._compressed_offsets):
+            data = self._block(block_index)
+            start = offset - self._uncompressed_offsets[block_index]
+            piece = data[start:start + size]
+            result += piece
+            offset += len(piece)
+            size -= len(piece)
+            block_index += 1
+        return bytes(result)
+    
+    def close(self) -> None:
+        """Close the underlying file"""
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
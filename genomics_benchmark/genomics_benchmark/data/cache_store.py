@@ -0,0 +1,316 @@
+"""
+Content-addressed cache store with integrity checks and size-bounded LRU eviction
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Optional, Union, Dict, Any, Iterable, List
+from ..utils.locking import FileLock
+
+class CacheStore:
+    """Content-addressed object store shared by all datasets under a cache root"""
+    
+    def __init__(
+        self,
+        root: Union[str, Path],
+        max_bytes: Optional[int] = None,
+        verify: bool = True
+    ):
+        """
+        Initialize cache store
+        
+        Objects are stored as objects/<sha256[:2]>/<sha256>/<filename>, so files
+        from different URLs never overwrite each other while the original
+        filename (and its suffix) is preserved. A manifest.json file records the
+        URL, size, sha256, last access time and the size and modification time
+        at the last verification of every object.
+        
+        Args:
+            root: Store root directory
+            max_bytes: Byte quota for stored objects, least recently used objects
+                are evicted when it is exceeded. No limit if None
+            verify: Whether to re-hash objects on lookup to detect corruption, done
+                only when an object's size or modification time changed since
+                its last verification
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.manifest_path = self.root / "manifest.json"
+        self.max_bytes = max_bytes
+        self.verify = verify
+        # Serializes manifest updates across threads and processes
+        self._lock = FileLock(self.root / "manifest.lock")
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+    
+    def lock_for(self, url: str) -> FileLock:
+        """
+        Get the lock that serializes fetching the object for a URL
+        
+        Args:
+            url: URL of the object
+            
+        Returns:
+            File lock shared by all processes using this store
+        """
+        return FileLock(self.root / "locks" / f"{hashlib.sha256(url.encode()).hexdigest()}.lock")
+    
+    @staticmethod
+    def hash_file(path: Union[str, Path], block_size: int = 1 << 20) -> str:
+        """
+        Compute the sha256 of a file
+        
+        Args:
+            path: Path to the file
+            block_size: Size of the blocks read from the file
+            
+        Returns:
+            Hex digest of the file content
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Read the manifest, returning an empty one if missing or unreadable"""
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        manifest.setdefault("objects", {})
+        manifest.setdefault("urls", {})
+        return manifest
+    
+    def _save_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Atomically write the manifest"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_name(f"{self.manifest_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _object_path(self, entry: Dict[str, Any]) -> Path:
+        return self.root / entry["path"]
+    
+    @staticmethod
+    def _stamp(path: Path) -> List[int]:
+        """Size and modification time of a file, recorded when its checksum is verified"""
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+    
+    def _check(self, entry: Dict[str, Any]) -> Optional[List[int]]:
+        """
+        Check that an object exists and matches its recorded size and checksum
+        
+        The checksum is only recomputed if the size or modification time of
+        the object changed since it was last verified.
+        
+        Args:
+            entry: Manifest entry of the object
+            
+        Returns:
+            Stamp of the intact object from _stamp, or None if it is missing or corrupt
+        """
+        path = self._object_path(entry)
+        if not path.is_file():
+            return None
+        stamp = self._stamp(path)
+        if stamp[0] != entry["size"]:
+            return None
+        if self.verify and entry.get("verified") != stamp and self.hash_file(path) != entry["sha256"]:
+            return None
+        return stamp
+    
+    def _drop_object(self, manifest: Dict[str, Any], sha256: str) -> None:
+        """Remove an object from disk and from the manifest"""
+        entry = manifest["objects"].pop(sha256, None)
+        if entry is None:
+            return
+        for url in entry["urls"]:
+            if manifest["urls"].get(url) == sha256:
+                del manifest["urls"][url]
+        shutil.rmtree(self._object_path(entry).parent, ignore_errors=True)
+    
+    def lookup(self, url: str) -> Optional[Path]:
+        """
+        Get the cached object for a URL
+        
+        Corrupt or missing objects are removed from the store and reported as
+        a cache miss.
+        
+        Args:
+            url: URL the object was downloaded from
+            
+        Returns:
+            Path to the object, or None if it is not cached
+        """
+        with self._lock:
+            manifest = self._load_manifest()
+            sha256 = manifest["urls"].get(url)
+            entry = manifest["objects"].get(sha256) if sha256 is not None else None
+        if entry is None:
+            return None
+        
+        # Verify outside the lock, so hashing a large object does not block other store operations
+        stamp = self._check(entry)
+        
+        with self._lock:
+            manifest = self._load_manifest()
+            if manifest["urls"].get(url) != sha256 or sha256 not in manifest["objects"]:
+                # Removed or replaced while it was verified
+                return None
+            entry = manifest["objects"][sha256]
+            if stamp is None:
+                print(f"Warning: cached object for {url} is corrupt, discarding it")
+                self._drop_object(manifest, sha256)
+                self._save_manifest(manifest)
+                return None
+            
+            entry["verified"] = stamp
+            entry["last_access"] = time.time()
+            self._save_manifest(manifest)
+            return self._object_path(entry)
+    
+    def put(self, url: str, src_path: Union[str, Path], filename: Optional[str] = None) -> Path:
+        """
+        Move a file into the store and record it in the manifest
+        
+        Args:
+            url: URL the file was downloaded from
+            src_path: Path to the file, which is moved into the store
+            filename: Name of the stored file, defaults to the last URL segment
+            
+        Returns:
+            Path to the stored object
+        """
+        src_path = Path(src_path)
+        sha256 = self.hash_file(src_path)
+        size = src_path.stat().st_size
+        if filename is None:
+            filename = url.split('/')[-1].split('?')[0] or sha256
+        
+        with self._lock:
+            manifest = self._load_manifest()
+            entry = manifest["objects"].get(sha256)
+            if entry is not None and self._object_path(entry).is_file():
+                # Identical content is already stored
+                src_path.unlink()
+            else:
+                # Rename within the store file system, so readers never see a partial object
+                relative_path = Path("objects") / sha256[:2] / sha256 / filename
+                dest_path = self.root / relative_path
+                dest_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(src_path, dest_path)
+                entry = {
+                    "path": relative_path.as_posix(),
+                    "size": size,
+                    "sha256": sha256,
+                    "urls": [],
+                    "verified": self._stamp(dest_path),
+                }
+                manifest["objects"][sha256] = entry
+            
+            if manifest["urls"].get(url, sha256) != sha256:
+                # The URL now serves different content
+                self._unlink_url(manifest, url)
+            
+            if url not in entry["urls"]:
+                entry["urls"].append(url)
+            entry["last_access"] = time.time()
+            manifest["urls"][url] = sha256
+            
+            self._evict(manifest, protect=[sha256])
+            self._save_manifest(manifest)
+            return self._object_path(entry)
+    
+    def _unlink_url(self, manifest: Dict[str, Any], url: str) -> None:
+        """Remove a URL from the manifest, dropping its object once no other URL shares it"""
+        sha256 = manifest["urls"].pop(url, None)
+        entry = manifest["objects"].get(sha256) if sha256 is not None else None
+        if entry is None:
+            return
+        entry["urls"] = [u for u in entry["urls"] if u != url]
+        if not entry["urls"]:
+            self._drop_object(manifest, sha256)
+    
+    def remove(self, url: str) -> None:
+        """
+        Remove a URL from the store
+        
+        The cached object is deleted only if no other URL maps to the same content.
+        
+        Args:
+            url: URL the object was downloaded from
+        """
+        with self._lock:
+            manifest = self._load_manifest()
+            if url in manifest["urls"]:
+                self._unlink_url(manifest, url)
+                self._save_manifest(manifest)
+    
+    def _evict(self, manifest: Dict[str, Any], protect: Iterable[str] = ()) -> int:
+        """
+        Evict least recently used objects until the store fits its quota
+        
+        Args:
+            manifest: Manifest to update in place
+            protect: Checksums of objects that must not be evicted
+            
+        Returns:
+            Number of bytes freed
+        """
+        if self.max_bytes is None:
+            return 0
+        
+        protect = set(protect)
+        total = sum(entry["size"] for entry in manifest["objects"].values())
+        freed = 0
+        candidates = sorted(
+            (entry for sha256, entry in manifest["objects"].items() if sha256 not in protect),
+            key=lambda entry: entry.get("last_access", 0)
+        )
+        for entry in candidates:
+            if total - freed <= self.max_bytes:
+                break
+            print(f"Evicting cached object: {entry['path']}")
+            freed += entry["size"]
+            self._drop_object(manifest, entry["sha256"])
+        
+        if total - freed > self.max_bytes:
+            print(f"Warning: cache store exceeds its quota of {self.max_bytes} bytes")
+        return freed
+    
+    def evict(self) -> int:
+        """
+        Evict least recently used objects until the store fits its quota
+        
+        Returns:
+            Number of bytes freed
+        """
+        with self._lock:
+            manifest = self._load_manifest()
+            freed = self._evict(manifest)
+            self._save_manifest(manifest)
+            return freed
+    
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """Get the manifest entries of all stored objects keyed by sha256"""
+        return self._load_manifest()["objects"]
+    
+    @property
+    def total_bytes(self) -> int:
+        """Total size of all stored objects in bytes"""
+        return sum(entry["size"] for entry in self.entries().values())
+    
+    def clear(self) -> None:
+        """Remove all stored objects and the manifest"""
+        with self._lock:
+            shutil.rmtree(self.objects_dir, ignore_errors=True)
+            if self.manifest_path.exists():
+                self.manifest_path.unlink()
+            self.objects_dir.mkdir(parents=True, exist_ok=True)
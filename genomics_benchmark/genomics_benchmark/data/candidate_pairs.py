@@ -0,0 +1,168 @@
+"""
+Genome-scale enumeration of candidate enhancer-gene pairs
+"""
+import gzip
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Any, Union, Iterator
+from .tss_index import TSSIndex
+from ..utils.locking import atomic_output
+
+# Default number of pairs materialized at once, roughly 100 bytes each
+DEFAULT_MAX_PAIRS_PER_CHUNK = 2000000
+
+PAIR_GENE_COLUMNS = {'gene_name': 'gene_name', 'gene_id': 'gene_id', 'tss': 'gene_tss', 'strand': 'strand'}
+PAIR_COLUMNS = [
+    'element_id', 'chr', 'start', 'end', 'enhancer_center',
+    'gene_name', 'gene_id', 'gene_tss', 'strand', 'distance', 'distance_rank'
+]
+# Columns written as strings in Parquet, all others as int64
+PAIR_STRING_COLUMNS = {'chr', 'gene_name', 'gene_id', 'strand'}
+
+def iter_candidate_pairs(
+    elements: pd.DataFrame,
+    tss_index: TSSIndex,
+    distance_threshold: int,
+    max_pairs_per_chunk: int = DEFAULT_MAX_PAIRS_PER_CHUNK
+) -> Iterator[pd.DataFrame]:
+    """
+    Enumerate every element-gene pair within distance_threshold, chunk by chunk
+    
+    Distances follow EnhancerProcessor: the absolute distance between the
+    element center (start + end) // 2 and the gene TSS. Elements are swept per
+    chromosome in center order, so the window of each element is found with
+    two binary searches over the sorted TSS array, and only the pairs of the
+    current chunk are ever materialized.
+    
+    Args:
+        elements: DataFrame with 'chr', 'start' and 'end' columns
+        tss_index: TSS index of the gene annotation
+        distance_threshold: Maximum distance between element center and TSS, inclusive
+        max_pairs_per_chunk: Upper bound on the pairs per chunk, exceeded only by
+            a single element with more candidate genes
+            
+    Yields:
+        DataFrames with columns element_id (row position in elements), chr,
+        start, end, enhancer_center, gene_name, gene_id, gene_tss, strand,
+        distance and distance_rank (0-based rank of the gene by distance for the element)
+    """
+    for column in ('chr', 'start', 'end'):
+        if column not in elements.columns:
+            raise ValueError(f"Column not found in elements: {column}")
+    if max_pairs_per_chunk < 1:
+        raise ValueError("max_pairs_per_chunk must be positive")
+    
+    chroms = elements['chr'].astype(str).to_numpy()
+    starts = elements['start'].to_numpy().astype(np.int64)
+    ends = elements['end'].to_numpy().astype(np.int64)
+    centers = (starts + ends) // 2
+    
+    order = np.lexsort((centers, chroms))
+    lo, hi = tss_index.window_bounds(chroms[order], centers[order], distance_threshold)
+    cumulative = np.cumsum(hi - lo)
+    gene_columns = [column for column in PAIR_GENE_COLUMNS if column in tss_index.genes.columns]
+    
+    begin = 0
+    while begin < len(order):
+        done = cumulative[begin - 1] if begin > 0 else 0
+        stop = max(int(np.searchsorted(cumulative, done + max_pairs_per_chunk, side='right')), begin + 1)
+        rows = order[begin:stop]
+        hits = tss_index.hits_from_bounds(centers[rows], lo[begin:stop], hi[begin:stop], sort_by_distance=False)
+        begin = stop
+        if not len(hits.query):
+            continue
+        
+        element_rows = rows[hits.query]
+        chunk = pd.DataFrame({
+            'element_id': element_rows,
+            'chr': chroms[element_rows],
+            'start': starts[element_rows],
+            'end': ends[element_rows],
+            'enhancer_center': centers[element_rows],
+        })
+        genes = tss_index.genes.iloc[hits.gene]
+        for column in gene_columns:
+            values = genes[column].to_numpy()
+            chunk[PAIR_GENE_COLUMNS[column]] = values.astype(np.int64) if column == 'tss' else values
+        chunk['distance'] = hits.distance
+        chunk['distance_rank'] = hits.rank
+        yield chunk
+
+def _write_tsv(chunks: Iterator[pd.DataFrame], path: Path, compress: bool) -> Dict[str, int]:
+    num_pairs, num_chunks = 0, 0
+    opener = gzip.open if compress else open
+    with opener(path, 'wt') as f:
+        for chunk in chunks:
+            chunk.to_csv(f, sep='\t', index=False, header=num_chunks == 0)
+            num_pairs += len(chunk)
+            num_chunks += 1
+        if num_chunks == 0:
+            f.write('\t'.join(PAIR_COLUMNS) + '\n')
+    return {'num_pairs': num_pairs, 'num_chunks': num_chunks}
+
+def _pair_schema(columns):
+    """Parquet schema of the pair columns, fixed so chunks with all-null columns match"""
+    import pyarrow as pa
+    
+    return pa.schema([
+        (column, pa.string() if column in PAIR_STRING_COLUMNS else pa.int64())
+        for column in columns
+    ])
+
+def _write_parquet(chunks: Iterator[pd.DataFrame], path: Path) -> Dict[str, int]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    num_pairs, num_chunks = 0, 0
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                schema = _pair_schema(chunk.columns)
+                writer = pq.ParquetWriter(str(path), schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            num_pairs += len(chunk)
+            num_chunks += 1
+        if writer is None:
+            pq.write_table(_pair_schema(PAIR_COLUMNS).empty_table(), str(path))
+    finally:
+        if writer is not None:
+            writer.close()
+    return {'num_pairs': num_pairs, 'num_chunks': num_chunks}
+
+def write_candidate_pairs(
+    elements: pd.DataFrame,
+    tss_index: TSSIndex,
+    output_path: Union[str, Path],
+    distance_threshold: int,
+    max_pairs_per_chunk: int = DEFAULT_MAX_PAIRS_PER_CHUNK
+) -> Dict[str, Any]:
+    """
+    Stream all candidate element-gene pairs to a file
+    
+    Pairs are appended chunk by chunk, so memory use is bounded by
+    max_pairs_per_chunk regardless of the total number of pairs. The file is
+    published atomically once complete.
+    
+    Args:
+        elements: DataFrame with 'chr', 'start' and 'end' columns
+        tss_index: TSS index of the gene annotation
+        output_path: Output file, .parquet (requires pyarrow), .tsv or .tsv.gz
+        distance_threshold: Maximum distance between element center and TSS, inclusive
+        max_pairs_per_chunk: Upper bound on the pairs held in memory at once
+        
+    Returns:
+        Dictionary with output_path, num_elements, num_pairs and num_chunks
+    """
+    output_path = Path(output_path)
+    chunks = iter_candidate_pairs(elements, tss_index, distance_threshold, max_pairs_per_chunk)
+    
+    with atomic_output(output_path) as tmp_path:
+        if output_path.suffix == '.parquet':
+            summary = _write_parquet(chunks, tmp_path)
+        else:
+            summary = _write_tsv(chunks, tmp_path, compress=output_path.suffix == '.gz')
+    
+    print(f"Wrote {summary['num_pairs']:,} candidate pairs for {len(elements):,} elements to: {output_path}")
+    return {'output_path': str(output_path), 'num_elements': len(elements), **summary}
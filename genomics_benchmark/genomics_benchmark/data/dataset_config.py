@@ -172,7 +172,10 @@ DATASET_CONFIG = {
                 "variant_id", "pip", "af",  # 变异信息
                 "afc", "afc_se",  # 效应信息
                 "labels"  # 标签（如果启用）
-            ]
+            ],
+            "label_column": "pip",  # Posterior inclusion probability used for labels
+            "positive_threshold": 0.5,  # pip >= threshold is a positive (causal) variant
+            "negative_threshold": 0.01  # pip < threshold is a confident negative
         },
         # Dataset-specific configuration
         "Adipose_Subcutaneous": {
@@ -196,4 +199,31 @@ DATASET_CONFIG = {
             "additional_columns": []
         }
     }
-} 
\ No newline at end of file
+}
+
+def get_dataset_config(task_name: str, dataset_name: str = None) -> dict:
+    """
+    Get configuration for specified task and dataset
+    
+    Args:
+        task_name: Task name, e.g., 'enhancer'
+        dataset_name: Dataset name, e.g., 'fulco', returns task-level config if None
+        
+    Returns:
+        Dictionary containing configuration information
+    """
+    if task_name not in DATASET_CONFIG:
+        raise ValueError(f"Unknown task name: {task_name}")
+    
+    if dataset_name is None:
+        return DATASET_CONFIG[task_name]["task_config"]
+    
+    if dataset_name not in DATASET_CONFIG[task_name]:
+        raise ValueError(f"Unknown dataset name: {dataset_name}")
+    
+    # Merge task-level config and dataset-specific config
+    config = {
+        **DATASET_CONFIG[task_name]["task_config"],
+        **DATASET_CONFIG[task_name][dataset_name]
+    }
+    return config
@@ -2,24 +2,56 @@
 Data download module providing basic data download and caching functionality
 """
 import os
+import json
 import hashlib
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from tqdm import tqdm
-from typing import Optional, Union
+from typing import Optional, Union, List, Dict, Any, TYPE_CHECKING
+from .cache_store import CacheStore
+from ..utils.locking import FileLock
+from ..utils.instrumentation import record_stage, file_size
+
+# requests and tqdm are imported when a file is actually fetched, keeping imports light
+if TYPE_CHECKING:
+    import requests
+    from tqdm import tqdm
 
 class DataDownloader:
     """Base data downloader class"""
     
-    def __init__(self, cache_dir: Union[str, Path]):
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        num_chunks: int = 8,
+        block_size: int = 8192,
+        max_retries: int = 3,
+        store: Optional[CacheStore] = None,
+        session: Optional['requests.Session'] = None
+    ):
         """
         Initialize data downloader
         
         Args:
             cache_dir: Data cache directory
+            num_chunks: Number of parallel HTTP Range requests used by ranged downloads
+            block_size: Size in bytes of each block read from the response stream
+            max_retries: Number of attempts per chunk before a ranged download gives up
+            store: Optional content-addressed store that completed downloads are
+                moved into. Cached objects are looked up by URL and verified
+                before being reused
+            session: Optional requests session used for all HTTP requests, so that
+                keep-alive connections can be shared between downloaders
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.num_chunks = max(1, int(num_chunks))
+        self.block_size = int(block_size)
+        self.max_retries = max(1, int(max_retries))
+        self.store = store
+        self.session = session
+        self.bytes_downloaded = 0
+        self._counter_lock = threading.Lock()
     
     def _get_cache_path(self, url: str) -> Path:
         """
@@ -38,44 +70,344 @@ class DataDownloader:
             filename = hashlib.md5(url.encode()).hexdigest()
         return self.cache_dir / filename
     
-    def download(self, url: str, force: bool = False) -> Path:
+    def download(self, url: str, force: bool = False, ranged: bool = False) -> Path:
         """
         Download data file
         
+        The file is written to a .part file next to the cache path and only
+        renamed into place once it is complete, so an interrupted download never
+        leaves a truncated file behind that later runs would treat as cached.
+        
         Args:
             url: URL of the data file
             force: Whether to force re-download
-            
+            ranged: Whether to fetch the file in parallel chunks using HTTP Range
+                requests. Interrupted ranged downloads resume from the .part
+                file on the next call. Falls back to a single stream if the server
+                does not support ranges.
+                
         Returns:
             Path to the downloaded file
         """
+        bytes_before = self.bytes_downloaded
+        with record_stage('download', url=url) as stage:
+            path = self._download(url, force, ranged)
+            stage['bytes_written'] = file_size(path)
+            stage['bytes_downloaded'] = self.bytes_downloaded - bytes_before
+            stage['cached'] = stage['bytes_downloaded'] == 0
+        return path
+    
+    def _download(self, url: str, force: bool, ranged: bool) -> Path:
+        """Download data file unless it is cached, see download"""
         cache_path = self._get_cache_path(url)
         
-        if not force and cache_path.exists():
-            print(f"Using cached file: {cache_path}")
+        if not force:
+            cached_path = self._lookup_cached(url, cache_path)
+            if cached_path is not None:
+                print(f"Using cached file: {cached_path}")
+                return cached_path
+        
+        # Only one process fetches a URL at a time, the others wait and reuse its result
+        with self._lock_for(url, cache_path):
+            if not force:
+                cached_path = self._lookup_cached(url, cache_path)
+                if cached_path is not None:
+                    print(f"Using cached file: {cached_path}")
+                    return cached_path
+            
+            print(f"Downloading file: {url}")
+            print(f"Saving to: {cache_path if self.store is None else self.store.root}")
+            
+            part_path = cache_path.with_name(cache_path.name + '.part')
+            if force:
+                self._remove_partial(part_path)
+            
+            total_size = self._probe_range_support(url) if ranged else None
+            if total_size:
+                self._download_ranged(url, part_path, total_size)
+            else:
+                if ranged:
+                    print("Server does not support range requests, falling back to a single stream")
+                self._download_stream(url, part_path)
+            
+            if self.store is not None:
+                return self.store.put(url, part_path, filename=cache_path.name)
+            os.replace(part_path, cache_path)
             return cache_path
+    
+    def _lookup_cached(self, url: str, cache_path: Path) -> Optional[Path]:
+        """
+        Find a complete cached copy of a URL
         
-        print(f"Downloading file: {url}")
-        print(f"Saving to: {cache_path}")
+        Args:
+            url: URL of the data file
+            cache_path: Cache file path used when no store is configured
+            
+        Returns:
+            Path to the cached file, or None if it is not cached
+        """
+        if self.store is not None:
+            return self.store.lookup(url)
+        return cache_path if cache_path.exists() else None
+    
+    def _lock_for(self, url: str, cache_path: Path) -> FileLock:
+        """
+        Get the cross-process lock guarding the download of a URL
         
-        response = requests.get(url, stream=True)
+        Args:
+            url: URL of the data file
+            cache_path: Cache file path used when no store is configured
+            
+        Returns:
+            File lock for the URL
+        """
+        if self.store is not None:
+            return self.store.lock_for(url)
+        return FileLock(cache_path.with_name(cache_path.name + '.lock'))
+    
+    @property
+    def _http(self):
+        """HTTP client used for requests, either the shared session or the requests module"""
+        if self.session is not None:
+            return self.session
+        import requests
+        return requests
+    
+    def _count_bytes(self, size: int) -> None:
+        with self._counter_lock:
+            self.bytes_downloaded += size
+    
+    def _download_stream(self, url: str, part_path: Path) -> None:
+        """
+        Download a file as a single stream into a partial file
+        
+        Args:
+            url: URL of the data file
+            part_path: Path of the partial file to write
+        """
+        from tqdm import tqdm
+        
+        self._remove_partial(part_path)
+        response = self._http.get(url, stream=True)
         response.raise_for_status()
         
         total_size = int(response.headers.get('content-length', 0))
-        block_size = 8192
+        written = 0
         
-        with open(cache_path, 'wb') as f, tqdm(
+        with open(part_path, 'wb') as f, tqdm(
             desc="Download progress",
             total=total_size,
             unit='iB',
             unit_scale=True,
             unit_divisor=1024,
         ) as pbar:
-            for data in response.iter_content(block_size):
+            for data in response.iter_content(self.block_size):
                 size = f.write(data)
+                written += size
+                self._count_bytes(size)
                 pbar.update(size)
         
-        return cache_path
+        if total_size and written != total_size:
+            raise IOError(f"Incomplete download of {url}: got {written} of {total_size} bytes")
+    
+    def _probe_range_support(self, url: str) -> Optional[int]:
+        """
+        Check whether the server supports byte range requests for a URL
+        
+        Args:
+            url: URL of the data file
+            
+        Returns:
+            Total size of the file in bytes, or None if ranges are not supported
+        """
+        response = self._http.head(url, allow_redirects=True)
+        if not response.ok:
+            return None
+        total_size = int(response.headers.get('content-length', 0))
+        if response.headers.get('accept-ranges', '').lower() != 'bytes' or total_size <= 0:
+            return None
+        return total_size
+    
+    def _plan_chunks(self, total_size: int) -> List[List[int]]:
+        """
+        Split a file into contiguous byte ranges
+        
+        Args:
+            total_size: Total size of the file in bytes
+            
+        Returns:
+            List of [start, end, done] entries, end inclusive
+        """
+        num_chunks = min(self.num_chunks, total_size)
+        chunk_size = -(-total_size // num_chunks)
+        return [
+            [start, min(start + chunk_size, total_size) - 1, 0]
+            for start in range(0, total_size, chunk_size)
+        ]
+    
+    def _download_ranged(self, url: str, part_path: Path, total_size: int) -> None:
+        """
+        Download a file in parallel byte ranges, resuming from a previous partial file
+        
+        Progress of every chunk is recorded in a .part.json state file next to
+        the partial file. Only bytes that have been written and flushed are
+        recorded, so a resumed download never skips missing data.
+        
+        Args:
+            url: URL of the data file
+            part_path: Path of the partial file to write
+            total_size: Total size of the file in bytes
+        """
+        state_path = part_path.with_name(part_path.name + '.json')
+        state = self._load_state(state_path, url, total_size) if part_path.exists() else None
+        if state is None:
+            state = {'url': url, 'size': total_size, 'chunks': self._plan_chunks(total_size)}
+            with open(part_path, 'wb') as f:
+                f.truncate(total_size)
+        else:
+            print(f"Resuming partial download: {part_path}")
+        
+        chunks = state['chunks']
+        state_lock = threading.Lock()
+        self._save_state(state_path, state, state_lock)
+        
+        from tqdm import tqdm
+        with tqdm(
+            desc="Download progress",
+            total=total_size,
+            initial=sum(chunk[2] for chunk in chunks),
+            unit='iB',
+            unit_scale=True,
+            unit_divisor=1024,
+        ) as pbar:
+            pending = [chunk for chunk in chunks if chunk[0] + chunk[2] <= chunk[1]]
+            with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+                futures = [
+                    executor.submit(
+                        self._fetch_chunk, url, part_path, chunk, state_path, state, state_lock, pbar
+                    )
+                    for chunk in pending
+                ]
+                errors = [future.exception() for future in futures]
+        
+        self._save_state(state_path, state, state_lock)
+        errors = [error for error in errors if error is not None]
+        if errors:
+            raise IOError(f"Ranged download of {url} interrupted, rerun to resume: {errors[0]}")
+        
+        if part_path.stat().st_size != total_size:
+            raise IOError(f"Size mismatch for {url}: expected {total_size} bytes")
+        state_path.unlink()
+    
+    def _fetch_chunk(
+        self,
+        url: str,
+        part_path: Path,
+        chunk: List[int],
+        state_path: Path,
+        state: Dict[str, Any],
+        state_lock: threading.Lock,
+        pbar: 'tqdm'
+    ) -> None:
+        """
+        Fetch one byte range into the partial file, retrying from the last written byte
+        
+        Args:
+            url: URL of the data file
+            part_path: Path of the partial file to write
+            chunk: [start, end, done] entry updated in place as bytes arrive
+            state_path: Path of the resume state file
+            state: Resume state shared by all chunks
+            state_lock: Lock guarding state and its file
+            pbar: Shared progress bar
+        """
+        import requests
+        
+        start, end = chunk[0], chunk[1]
+        last_error = None
+        for _ in range(self.max_retries):
+            offset = start + chunk[2]
+            if offset > end:
+                return
+            try:
+                response = self._http.get(
+                    url, stream=True, headers={'Range': f'bytes={offset}-{end}'}
+                )
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise IOError(f"Server ignored range request (HTTP {response.status_code})")
+                
+                with open(part_path, 'r+b') as f:
+                    f.seek(offset)
+                    for data in response.iter_content(self.block_size):
+                        data = data[:end + 1 - (start + chunk[2])]
+                        f.write(data)
+                        f.flush()
+                        self._count_bytes(len(data))
+                        with state_lock:
+                            chunk[2] += len(data)
+                            pbar.update(len(data))
+                self._save_state(state_path, state, state_lock)
+                
+                if start + chunk[2] <= end:
+                    raise IOError(f"Connection closed at byte {start + chunk[2]} of range {start}-{end}")
+                return
+            except (requests.RequestException, IOError) as e:
+                last_error = e
+                self._save_state(state_path, state, state_lock)
+        raise last_error
+    
+    @staticmethod
+    def _load_state(state_path: Path, url: str, total_size: int) -> Optional[Dict[str, Any]]:
+        """
+        Load the resume state of a partial download if it matches the remote file
+        
+        Args:
+            state_path: Path of the resume state file
+            url: URL of the data file
+            total_size: Total size of the remote file in bytes
+            
+        Returns:
+            Resume state, or None if it is missing or stale
+        """
+        if not state_path.exists():
+            return None
+        try:
+            with open(state_path) as f:
+                state = json.load(f)
+        except ValueError:
+            return None
+        if state.get('url') != url or state.get('size') != total_size:
+            return None
+        return state
+    
+    @staticmethod
+    def _save_state(state_path: Path, state: Dict[str, Any], state_lock: threading.Lock) -> None:
+        """
+        Atomically write the resume state of a partial download
+        
+        Args:
+            state_path: Path of the resume state file
+            state: Resume state
+            state_lock: Lock guarding state and its file
+        """
+        with state_lock:
+            tmp_path = state_path.with_name(state_path.name + '.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, state_path)
+    
+    @staticmethod
+    def _remove_partial(part_path: Path) -> None:
+        """
+        Remove a partial file and its resume state
+        
+        Args:
+            part_path: Path of the partial file
+        """
+        for path in (part_path, part_path.with_name(part_path.name + '.json')):
+            if path.exists():
+                path.unlink()
     
     def clear_cache(self):
         """Clear all cached files"""
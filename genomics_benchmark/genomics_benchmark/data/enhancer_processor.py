@@ -4,42 +4,78 @@ Enhancer data processing module
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Dict, Any, Union, Optional, Tuple
-from sklearn.metrics import roc_auc_score, average_precision_score
+from typing import Dict, Any, Union, Optional, Tuple, List, Iterator
 from .base_dataset import BaseDataset
-from .reference_genome import get_dataset_config
+from .gene_annotation import load_gene_table
+from ..utils.instrumentation import StageRecorder, file_size
+from ..utils.metrics import evaluate_predictors
+from ..utils.stratified import stratified_metrics, DEFAULT_DISTANCE_BINS
+from .table_cache import load_cached_table, find_cached_table, iter_cached_table
+from .tss_index import TSSIndex
+from .candidate_pairs import write_candidate_pairs, DEFAULT_MAX_PAIRS_PER_CHUNK
+
+# Standard columns stored as dictionary-encoded categoricals and as int32
+CATEGORICAL_COLUMNS = ['chr', 'gene_name']
+COORDINATE_COLUMNS = ['start', 'end', 'gene_tss']
 
 class EnhancerProcessor(BaseDataset):
     """Enhancer data processing class"""
     
-    def __init__(self, dataset_name: str, cache_root: Optional[Union[str, Path]] = None):
+    def __init__(
+        self,
+        dataset_name: str,
+        cache_root: Optional[Union[str, Path]] = None,
+        max_cache_bytes: Optional[int] = None
+    ):
         """
         Initialize enhancer data processor
         
         Args:
             dataset_name: Dataset name, e.g., 'fulco'
             cache_root: Cache root directory, defaults to .cache/genomics_benchmark in user's home directory
+            max_cache_bytes: Byte quota of the shared download store, no limit if None
         """
-        super().__init__("enhancer", dataset_name, cache_root)
+        super().__init__("enhancer", dataset_name, cache_root, max_cache_bytes)
         
-    def load(self, distance_threshold: Optional[int] = None) -> pd.DataFrame:
+    def load(
+        self,
+        distance_threshold: Optional[int] = None,
+        use_cache: bool = True,
+        chunksize: Optional[int] = None
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
         """
         Load and preprocess data
         
+        The parsed and standardized table is cached in the dataset cache
+        directory, keyed by the source file checksum and the column config,
+        so only the first load parses the raw file.
+        
         Args:
             distance_threshold: Optional distance threshold, no filtering if not specified
+            use_cache: Whether to use the parsed table cache
+            chunksize: If given, return a generator of processed and filtered chunks
+                of at most chunksize rows instead of one DataFrame
             
         Returns:
-            Processed DataFrame
+            Processed DataFrame, or a generator of processed DataFrames if chunksize is given
         """
         if self.data_path is None:
             self.download()
         
-        # Load data based on file format
-        raw_data = self._load_file(self.data_path)
-        
-        # Standardize column names
-        processed_data = self._standardize_columns(raw_data)
+        if chunksize is not None:
+            if chunksize < 1:
+                raise ValueError("chunksize must be positive")
+            return self._load_chunks(distance_threshold, use_cache, chunksize)
+        
+        # Load data based on file format and standardize column names
+        processed_data = load_cached_table(
+            self.data_path,
+            self.cache_dir,
+            self.parse_config(),
+            self._parse_file,
+            use_cache=use_cache,
+            source_id=self.config['data_url']
+        )
         
         # Calculate distances and labels
         processed_data = self._process_data(processed_data)
@@ -49,6 +85,128 @@ class EnhancerProcessor(BaseDataset):
         
         return processed_data
     
+    def _load_chunks(
+        self,
+        distance_threshold: Optional[int],
+        use_cache: bool,
+        chunksize: int
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Generate processed and filtered chunks of the dataset
+        
+        Chunks come from the memory-mapped parsed table if it is cached.
+        Otherwise CSV/TSV files are parsed chunk by chunk without building the
+        cache, so memory use stays flat for files larger than RAM. Excel files
+        cannot be read in chunks and are parsed (and cached) as a whole.
+        
+        Args:
+            distance_threshold: Optional distance threshold
+            use_cache: Whether to use the parsed table cache
+            chunksize: Number of source rows per chunk
+            
+        Yields:
+            Processed DataFrames
+        """
+        data_path = Path(self.data_path)
+        cached_path = None
+        if use_cache:
+            cached_path = find_cached_table(data_path, self.cache_dir, self.parse_config())
+            if cached_path is None and data_path.suffix not in ('.csv', '.tsv'):
+                load_cached_table(
+                    data_path, self.cache_dir, self.parse_config(), self._parse_file,
+                    source_id=self.config['data_url']
+                )
+                cached_path = find_cached_table(data_path, self.cache_dir, self.parse_config())
+        
+        if cached_path is not None:
+            chunks = iter_cached_table(cached_path, chunksize)
+        elif data_path.suffix in ('.csv', '.tsv'):
+            chunks = (
+                self._compact_dtypes(self._standardize_columns(chunk))
+                for chunk in self._read_csv(data_path, chunksize=chunksize)
+            )
+        else:
+            parsed = self._parse_file(data_path)
+            chunks = (parsed.iloc[start:start + chunksize].copy() for start in range(0, len(parsed), chunksize))
+        
+        for chunk in chunks:
+            yield self._filter_data(self._process_data(chunk), distance_threshold)
+    
+    def parse_config(self) -> Dict[str, Any]:
+        """
+        Get the configuration entries that determine the parsed table
+        
+        Returns:
+            Column mapping, required columns and label column, part of the
+            parsed table cache key and usable by callers keying derived results
+        """
+        return {
+            'column_mapping': self.config['column_mapping'],
+            'required_columns': self.config['required_columns'],
+            'label_column': self.config.get('label_column'),
+        }
+    
+    def _parse_file(self, file_path: Union[str, Path]) -> pd.DataFrame:
+        """
+        Parse a raw data file into a table with standardized column names
+        
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            DataFrame with standardized column names and compact dtypes
+        """
+        return self._compact_dtypes(self._standardize_columns(self._load_file(file_path)))
+    
+    def _source_columns(self) -> List[str]:
+        """
+        Get the source columns needed for processing and output
+        
+        Returns:
+            Source names of all mapped columns, the label column and the additional columns
+        """
+        column_mapping = self.config["column_mapping"]
+        columns = list(column_mapping.values())
+        extra_columns = [self.config.get("label_column")] + self.config.get("additional_columns", [])
+        for col in extra_columns:
+            if col and column_mapping.get(col, col) not in columns:
+                columns.append(column_mapping.get(col, col))
+        return columns
+    
+    def _compact_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert standardized columns to compact dtypes
+        
+        Chromosome and gene symbols become categoricals, coordinates int32 and
+        all other float columns (scores) float32. Coordinates with missing
+        values become nullable Int32, which is written like int32, so every
+        chunk of a streamed file is written like the whole table. Coordinates
+        that are not integers keep their dtype.
+        
+        Args:
+            df: DataFrame with standardized column names
+            
+        Returns:
+            DataFrame with compact dtypes
+        """
+        for column in df.columns:
+            series = df[column]
+            if column in CATEGORICAL_COLUMNS:
+                df[column] = series.astype('category')
+            elif column in COORDINATE_COLUMNS:
+                values = series.dropna()
+                if not pd.api.types.is_numeric_dtype(series) or not (values == np.floor(values)).all() or (
+                    len(values) and values.abs().max() >= np.iinfo(np.int32).max
+                ):
+                    print(f"Warning: keeping {series.dtype} coordinates in column {column}, not all are int32 values")
+                elif len(values) < len(series):
+                    df[column] = series.astype('Int32')
+                else:
+                    df[column] = series.astype(np.int32)
+            elif pd.api.types.is_float_dtype(series):
+                df[column] = series.astype(np.float32)
+        return df
+    
     def _load_file(self, file_path: Union[str, Path]) -> pd.DataFrame:
         """
         Load data based on file format
@@ -61,14 +219,36 @@ class EnhancerProcessor(BaseDataset):
         """
         file_path = Path(file_path)
         if file_path.suffix == '.xlsx':
-            return pd.read_excel(file_path)
-        elif file_path.suffix == '.csv':
-            return pd.read_csv(file_path)
-        elif file_path.suffix == '.tsv':
-            return pd.read_csv(file_path, sep='\t')
+            return pd.read_excel(file_path, usecols=self._read_options()['usecols'])
+        elif file_path.suffix in ('.csv', '.tsv'):
+            return self._read_csv(file_path)
         else:
             raise ValueError(f"Unsupported file format: {file_path.suffix}")
     
+    def _read_options(self) -> Dict[str, Any]:
+        """Column projection and parse-time dtypes shared by all readers"""
+        # Only read the columns that are used, with symbols dictionary-encoded while parsing
+        source_columns = set(self._source_columns())
+        column_mapping = self.config["column_mapping"]
+        return {
+            'usecols': lambda column: column in source_columns,
+            'dtype': {column_mapping[col]: 'category' for col in CATEGORICAL_COLUMNS if col in column_mapping},
+        }
+    
+    def _read_csv(self, file_path: Path, chunksize: Optional[int] = None):
+        """
+        Read a CSV or TSV file with column projection
+        
+        Args:
+            file_path: Path to the file
+            chunksize: If given, return an iterator of DataFrames with chunksize rows
+            
+        Returns:
+            DataFrame, or a chunk iterator if chunksize is given
+        """
+        sep = '\t' if file_path.suffix == '.tsv' else ','
+        return pd.read_csv(file_path, sep=sep, chunksize=chunksize, **self._read_options())
+    
     def _standardize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Standardize column names
@@ -122,7 +302,7 @@ class EnhancerProcessor(BaseDataset):
         label_column = self.config["label_column"]
         
         # Determine regulatory labels based on effect size
-        df['labels'] = df[label_column].apply(lambda x: 1 if x == 1 else 0)
+        df['labels'] = (df[label_column] == 1).astype(np.uint8)
         
         return df
     
@@ -138,17 +318,19 @@ class EnhancerProcessor(BaseDataset):
         Returns:
             Filtered DataFrame
         """
-        if distance_threshold is not None:
-            df = df[df['distance'] <= distance_threshold]
-        elif 'distance_threshold' in self.config:
-            df = df[df['distance'] <= self.config['distance_threshold']]
+        if distance_threshold is None:
+            distance_threshold = self.config.get('distance_threshold')
             
         # Get all columns to keep
         columns_to_keep = self.config["output_columns"].copy()
         if "additional_columns" in self.config:
             columns_to_keep.extend(self.config["additional_columns"])
-            
-        return df[columns_to_keep]
+        
+        # Select rows and columns in one copy, rows with a missing distance fail the threshold
+        if distance_threshold is None:
+            return df[columns_to_keep]
+        within = (df['distance'] <= distance_threshold).to_numpy(dtype=bool, na_value=False)
+        return df.loc[within, columns_to_keep]
     
     def save_processed_data(self, output_path: Union[str, Path]) -> None:
         """
@@ -202,6 +384,7 @@ class EnhancerProcessor(BaseDataset):
         labels = df.loc[valid_mask, 'labels']
         
         # Calculate AUROC and AUPRC
+        from sklearn.metrics import roc_auc_score, average_precision_score
         auroc = roc_auc_score(labels, scores)
         auprc = average_precision_score(labels, scores)
         
@@ -210,33 +393,48 @@ class EnhancerProcessor(BaseDataset):
             'AUPRC': auprc
         }
     
-    def analyze_label_distribution(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def evaluate_predictors(
+        self,
+        df: pd.DataFrame,
+        score_columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
         """
-        Analyze label distribution
+        Calculate AUROC and AUPRC of many predictor columns in one pass over the labels
         
         Args:
             df: DataFrame
-            
+            score_columns: Predictor columns, defaults to 'ABC Score' and 'distance'.
+                Lower distances are treated as stronger predictions
+                
         Returns:
-            Dictionary containing label distribution information
+            DataFrame with one row per predictor and columns score_column, n, n_positive, AUROC and AUPRC
         """
-        if 'labels' not in df.columns:
-            raise ValueError("Labels column not found in data")
-        
-        # Calculate label distribution
-        label_counts = df['labels'].value_counts()
-        label_percentages = df['labels'].value_counts(normalize=True) * 100
-        
-        # Calculate total samples and positive-negative ratio
-        total_samples = len(df)
-        pos_neg_ratio = label_counts[1] / label_counts[0] if 0 in label_counts and 1 in label_counts else 0
+        if score_columns is None:
+            score_columns = [col for col in ('ABC Score', 'distance') if col in df.columns]
+        return evaluate_predictors(df, score_columns, label_column='labels')
+    
+    def stratified_metrics(
+        self,
+        df: pd.DataFrame,
+        score_columns: Optional[List[str]] = None,
+        strata: Tuple[str, ...] = ('distance_bin', 'chr', 'gene_name'),
+        distance_bins: Tuple[float, ...] = DEFAULT_DISTANCE_BINS
+    ) -> pd.DataFrame:
+        """
+        Calculate AUROC, AUPRC and label counts per distance bin, chromosome and gene
         
-        return {
-            'total_samples': total_samples,
-            'label_counts': label_counts.to_dict(),
-            'label_percentages': label_percentages.to_dict(),
-            'positive_negative_ratio': pos_neg_ratio
-        }
+        Args:
+            df: DataFrame
+            score_columns: Predictor columns, defaults to 'ABC Score'
+            strata: Columns to stratify by, 'distance_bin' bins the distance column
+            distance_bins: Distance bin edges in bp, bins are closed on the left
+            
+        Returns:
+            DataFrame with one row per stratum value and predictor, see utils.stratified.stratified_metrics
+        """
+        if score_columns is None:
+            score_columns = ['ABC Score']
+        return stratified_metrics(df, score_columns, strata, label_column='labels', bins=distance_bins)
     
     def _add_strand_info(self, df: pd.DataFrame, gtf_file: Union[str, Path]) -> pd.DataFrame:
         """
@@ -250,20 +448,14 @@ class EnhancerProcessor(BaseDataset):
             DataFrame with added strand information
         """
         print("Reading gene annotation from GTF file...")
-        # Read GTF file
-        gene_annotation = pd.read_csv(
-            gtf_file, sep='\t', comment='#', header=None,
-            names=['chr', 'source', 'type', 'start', 'end', 'score', 'strand', 'frame', 'attribute']
-        )
-        
-        # Extract gene information
-        gene_annotation = gene_annotation[gene_annotation['type'] == 'gene']
-        gene_annotation['gene_name'] = gene_annotation['attribute'].str.extract(r'gene_name "(.*?)";')
-        gene_annotation['gene_name'] = gene_annotation['gene_name'].str.replace('"', '')
+        # Compact gene table, parsed from the GTF once and cached next to it
+        gene_annotation = load_gene_table(gtf_file)
         
         # 如果存在重复的gene_name，保留第一个出现的strand信息
+        gene_annotation = gene_annotation.dropna(subset=['gene_name'])
         gene_annotation = gene_annotation.drop_duplicates(subset=['gene_name'], keep='first')
         gene_annotation = gene_annotation[['gene_name', 'strand']]
+        gene_annotation['strand'] = gene_annotation['strand'].astype(object)
         
         # Merge strand information
         print("Adding strand information...")
@@ -280,6 +472,35 @@ class EnhancerProcessor(BaseDataset):
             
         return df
 
+    def generate_candidate_pairs(
+        self,
+        elements: pd.DataFrame,
+        gtf_file: Union[str, Path],
+        output_path: Union[str, Path],
+        distance_threshold: Optional[int] = None,
+        max_pairs_per_chunk: int = DEFAULT_MAX_PAIRS_PER_CHUNK
+    ) -> Dict[str, Any]:
+        """
+        Enumerate all candidate element-gene pairs genome-wide and stream them to a file
+        
+        Args:
+            elements: DataFrame of candidate elements with 'chr', 'start' and 'end' columns
+            gtf_file: Path to GTF file providing the gene TSS positions
+            output_path: Output file, .parquet, .tsv or .tsv.gz
+            distance_threshold: Maximum enhancer center to TSS distance, uses config threshold if not specified
+            max_pairs_per_chunk: Upper bound on the pairs held in memory at once
+            
+        Returns:
+            Dictionary with output_path, num_elements, num_pairs and num_chunks
+        """
+        if distance_threshold is None:
+            if 'distance_threshold' not in self.config:
+                raise ValueError("No distance threshold given or configured")
+            distance_threshold = self.config['distance_threshold']
+        
+        tss_index = TSSIndex.from_gtf(gtf_file)
+        return write_candidate_pairs(elements, tss_index, output_path, distance_threshold, max_pairs_per_chunk)
+    
     def initialize_pipeline(
         self,
         output_path: Optional[Union[str, Path]] = None,
@@ -288,11 +509,23 @@ class EnhancerProcessor(BaseDataset):
         do_statistics: bool = True,
         download_genome: bool = False,
         genome_file_type: str = "both",
-        add_strand: bool = False
+        add_strand: bool = False,
+        chunksize: Optional[int] = None,
+        recorder: Optional[StageRecorder] = None,
+        genome_files: Optional[Dict[str, Union[str, Path]]] = None
     ) -> Dict[str, Any]:
         """
         Initialize and run data processing pipeline
         
+        With chunksize the dataset is processed and written chunk by chunk,
+        only the score and label columns are kept in memory for statistics.
+        Loading and strand annotation then run lazily inside the stage that
+        consumes the chunks.
+        
+        Every numbered stage, and the downloads and decompressions inside it,
+        is recorded with its wall time, CPU time, memory, rows and bytes under
+        results['stages'].
+        
         Args:
             output_path: Path to save processed data
             distance_threshold: Optional distance threshold
@@ -301,11 +534,19 @@ class EnhancerProcessor(BaseDataset):
             download_genome: Whether to download reference genome files
             genome_file_type: Type of genome files to download, options: 'fasta', 'gtf', 'both'
             add_strand: Whether to add gene strand information
+            chunksize: Optional number of rows per chunk for streaming processing
+            recorder: Optional stage recorder, e.g. with hooks forwarding the stages
+                to a telemetry system or JSON event output
+            genome_files: Reference genome files already prepared for this dataset's
+                genome version, e.g. by download_reference_genome, used instead of
+                downloading them again
             
         Returns:
             Dictionary containing processing results
         """
         results = {}
+        recorder = recorder if recorder is not None else StageRecorder()
+        stages_before = len(recorder.records)
         
         try:
             # Output dataset basic information
@@ -316,70 +557,127 @@ class EnhancerProcessor(BaseDataset):
             print()
             
             # 0. Download reference genome (if needed)
-            if download_genome or add_strand:
+            if genome_files is not None:
+                print("0. Using prepared reference genome files:")
+                for file_type, file_path in genome_files.items():
+                    print(f"{file_type.upper()} file: {file_path}")
+                results['genome_files'] = {file_type: Path(path) for file_type, path in genome_files.items()}
+                print()
+            elif download_genome or add_strand:
                 if not genome_version:
                     print("Warning: Dataset has no specified genome version, skipping genome download")
                 else:
                     print("0. Downloading reference genome files...")
-                    try:
-                        from .reference_genome import download_reference_genome
-                        genome_files = download_reference_genome(
-                            genome_version=genome_version,
-                            cache_root=self.cache_root,
-                            file_type="both" if download_genome else "gtf"
-                        )
-                        print("Reference genome files downloaded successfully:")
-                        for file_type, file_path in genome_files.items():
-                            print(f"{file_type.upper()} file: {file_path}")
-                        results['genome_files'] = genome_files
-                        print()
-                    except Exception as e:
-                        print(f"Failed to download reference genome: {str(e)}\n")
-                        results['genome_download_error'] = str(e)
-                        if add_strand:
-                            raise ValueError("Cannot add strand information: Reference genome download failed")
+                    with recorder.stage("0. download_genome", genome_version=genome_version) as stage:
+                        try:
+                            from .reference_genome import download_reference_genome
+                            genome_files = download_reference_genome(
+                                genome_version=genome_version,
+                                cache_root=self.cache_root,
+                                file_type="both" if download_genome else "gtf",
+                                max_cache_bytes=self.store.max_bytes
+                            )
+                            print("Reference genome files downloaded successfully:")
+                            for file_type, file_path in genome_files.items():
+                                print(f"{file_type.upper()} file: {file_path}")
+                            results['genome_files'] = genome_files
+                            stage['bytes_written'] = sum(file_size(path) or 0 for path in genome_files.values())
+                            print()
+                        except Exception as e:
+                            print(f"Failed to download reference genome: {str(e)}\n")
+                            results['genome_download_error'] = str(e)
+                            stage['error_message'] = str(e)
+                            if add_strand:
+                                raise ValueError("Cannot add strand information: Reference genome download failed")
             
             # 1. Download data
             print("1. Starting data download...")
-            data_path = self.download()
+            with recorder.stage("1. download") as stage:
+                data_path = self.download()
+                stage['bytes_written'] = file_size(data_path)
             print(f"Data downloaded to: {data_path}")
             results['download_path'] = str(data_path)
             
             # 2. Process data
             print("\n2. Processing data...")
-            processed_data = self.load(distance_threshold=distance_threshold)
+            with recorder.stage("2. process", bytes_read=file_size(data_path), streamed=chunksize is not None) as stage:
+                processed_data = self.load(distance_threshold=distance_threshold, chunksize=chunksize)
+                if chunksize is None:
+                    stage['rows_out'] = len(processed_data)
             
             # 2.1 Add strand information (if needed)
             if add_strand:
                 if 'genome_files' not in results or 'gtf' not in results['genome_files']:
                     raise ValueError("Cannot add strand information: GTF file not available")
-                processed_data = self._add_strand_info(processed_data, results['genome_files']['gtf'])
+                gtf_file = results['genome_files']['gtf']
+                with recorder.stage(
+                    "2.1 add_strand", bytes_read=file_size(gtf_file), streamed=chunksize is not None
+                ) as stage:
+                    if chunksize is None:
+                        stage['rows_in'] = len(processed_data)
+                        processed_data = self._add_strand_info(processed_data, gtf_file)
+                        stage['rows_out'] = len(processed_data)
+                    else:
+                        processed_data = (self._add_strand_info(chunk, gtf_file) for chunk in processed_data)
+            
+            if chunksize is not None:
+                # 2.2 / 3. Stream chunks to the output file
+                print(f"Processing in chunks of {chunksize:,} rows...")
+                if output_path:
+                    print("\n3. Saving processed data...")
+                with recorder.stage("3. save" if output_path else "2.2 stream", chunksize=chunksize) as stage:
+                    summary = self.write_chunks(
+                        processed_data,
+                        output_path,
+                        keep_columns=['ABC Score', 'labels'] if do_statistics else []
+                    )
+                    stage['rows_out'] = summary['num_rows']
+                    stage['bytes_written'] = file_size(output_path) if output_path else None
+                processed_data = summary['kept']
+                if output_path:
+                    print(f"Data saved to: {output_path}")
+                    results['output_path'] = str(output_path)
+                data_shape = (summary['num_rows'], len(summary['columns']))
+                columns = summary['columns']
+                memory_bytes = summary['max_chunk_bytes']
+            else:
+                data_shape = processed_data.shape
+                columns = processed_data.columns.tolist()
+                memory_bytes = self.memory_footprint(processed_data)['total']
             
-            print(f"Data shape: {processed_data.shape}")
-            print(f"Columns: {processed_data.columns.tolist()}")
-            results['data_shape'] = processed_data.shape
-            results['columns'] = processed_data.columns.tolist()
+            print(f"Data shape: {data_shape}")
+            print(f"Columns: {columns}")
+            results['data_shape'] = data_shape
+            results['columns'] = columns
+            print(f"Memory footprint: {memory_bytes / 2**20:.2f} MiB" + (" (largest chunk)" if chunksize else ""))
+            results['memory_bytes'] = memory_bytes
             
             # 3. Save processed data
-            if output_path:
+            if output_path and chunksize is None:
                 print("\n3. Saving processed data...")
                 output_path = Path(output_path)
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                processed_data.to_csv(output_path, sep='\t', index=False)
+                with recorder.stage("3. save", rows_in=len(processed_data)) as stage:
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
+                    processed_data.to_csv(output_path, sep='\t', index=False)
+                    stage['bytes_written'] = file_size(output_path)
                 print(f"Data saved to: {output_path}")
                 results['output_path'] = str(output_path)
             
             # 4. Clear cache
             if clear_cache:
                 print("\n4. Clearing cache...")
-                self.clear_cache(clear_all=True)
+                with recorder.stage("4. clear_cache"):
+                    self.clear_cache(clear_all=True)
                 results['cache_cleared'] = True
             
             # 5. Statistical analysis
             if do_statistics:
                 print("\n5. Performing statistical analysis...")
-                # Calculate performance metrics
-                metrics = self.calculate_metrics(processed_data, score_column='ABC Score')
+                with recorder.stage("5. statistics", rows_in=len(processed_data)):
+                    # Calculate performance metrics
+                    metrics = self.calculate_metrics(processed_data, score_column='ABC Score')
+                    # Analyze label distribution
+                    distribution = self.analyze_label_distribution(processed_data)
                 print("\nPerformance metrics:")
                 
                 if metrics['AUROC'] is not None and metrics['AUPRC'] is not None:
@@ -388,8 +686,6 @@ class EnhancerProcessor(BaseDataset):
                 
                 results['metrics'] = metrics
                 
-                # Analyze label distribution
-                distribution = self.analyze_label_distribution(processed_data)
                 print("\nLabel distribution:")
                 print(f"Total samples: {distribution['total_samples']:,}")
                 print("\nLabel counts:")
@@ -409,5 +705,7 @@ class EnhancerProcessor(BaseDataset):
             results['status'] = 'error'
             results['error_message'] = str(e)
             raise
+        finally:
+            results['stages'] = recorder.summary()[stages_before:]
         
-        return results 
\ No newline at end of file
+        return results
@@ -0,0 +1,379 @@
+"""
+eQTL data processing module for the GTEx SuSiE fine-mapping Parquet files
+"""
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Dict, Any, Union, Optional, List, Iterator, Sequence
+from .base_dataset import BaseDataset
+from .dataset_config import DATASET_CONFIG
+from ..utils.instrumentation import StageRecorder, file_size
+from ..utils.metrics import evaluate_predictors
+
+# Gene columns stored as dictionary-encoded categoricals
+CATEGORICAL_COLUMNS = ['phenotype_id', 'gene_name', 'biotype']
+
+# Rows per record batch read from the Parquet row groups
+DEFAULT_BATCH_SIZE = 65536
+
+def eqtl_tissues() -> List[str]:
+    """Names of all eQTL datasets (tissues) in DATASET_CONFIG"""
+    return [name for name in DATASET_CONFIG["eqtl"] if name != "task_config"]
+
+class EqtlProcessor(BaseDataset):
+    """eQTL data processing class"""
+    
+    def __init__(
+        self,
+        dataset_name: str,
+        cache_root: Optional[Union[str, Path]] = None,
+        max_cache_bytes: Optional[int] = None
+    ):
+        """
+        Initialize eQTL data processor
+        
+        Args:
+            dataset_name: Dataset (tissue) name, e.g., 'Adipose_Subcutaneous'
+            cache_root: Cache root directory, defaults to .cache/genomics_benchmark in user's home directory
+            max_cache_bytes: Byte quota of the shared download store, no limit if None
+        """
+        super().__init__("eqtl", dataset_name, cache_root, max_cache_bytes)
+    
+    def _open_dataset(self):
+        """Open the downloaded Parquet file as a pyarrow dataset"""
+        try:
+            import pyarrow.dataset as ds
+        except ImportError as e:
+            raise ImportError("Reading eQTL Parquet files requires pyarrow") from e
+        if self.data_path is None:
+            self.download()
+        return ds.dataset(str(self.data_path), format="parquet")
+    
+    def _source_columns(self, available: Sequence[str]) -> List[str]:
+        """
+        Get the source columns to read
+        
+        Args:
+            available: Column names of the Parquet file
+            
+        Returns:
+            Source names of the mapped columns present in the file
+        """
+        column_mapping = self.config["column_mapping"]
+        required_columns = []
+        for cols in self.config["required_columns"].values():
+            if isinstance(cols, list):
+                required_columns.extend(cols)
+            else:
+                required_columns.append(cols)
+        
+        missing_columns = [
+            col for col in required_columns
+            if col not in column_mapping or column_mapping[col] not in available
+        ]
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {missing_columns}")
+        
+        return [source for source in column_mapping.values() if source in available]
+    
+    def _filter_expression(self, min_pip: Optional[float] = None, drop_ambiguous: bool = False):
+        """
+        Build the row filter on the label column that is pushed down to the Parquet reader
+        
+        Row groups whose pip statistics cannot match are skipped without being read.
+        
+        Args:
+            min_pip: Optional minimum pip
+            drop_ambiguous: Whether to drop variants between the negative and positive thresholds
+            
+        Returns:
+            pyarrow filter expression, None if no filter is needed
+        """
+        import pyarrow.dataset as ds
+        
+        label_column = self.config["label_column"]
+        label_column = ds.field(self.config["column_mapping"].get(label_column, label_column))
+        expression = None
+        if min_pip is not None:
+            expression = label_column >= min_pip
+        if drop_ambiguous:
+            confident = (
+                (label_column >= self.config["positive_threshold"])
+                | (label_column < self.config["negative_threshold"])
+            )
+            expression = confident if expression is None else expression & confident
+        return expression
+    
+    def iter_batches(
+        self,
+        min_pip: Optional[float] = None,
+        drop_ambiguous: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Generate processed batches of the dataset
+        
+        The Parquet file is scanned row group by row group, reading only the
+        mapped columns and only the rows passing the pip filter, so memory use
+        is bounded by batch_size regardless of the file size.
+        
+        Args:
+            min_pip: Optional minimum pip, no filtering if not specified
+            drop_ambiguous: Whether to drop variants with negative_threshold <= pip < positive_threshold
+            batch_size: Maximum number of rows per batch
+            
+        Yields:
+            Processed DataFrames with standardized columns and labels
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        dataset = self._open_dataset()
+        scanner = dataset.scanner(
+            columns=self._source_columns(dataset.schema.names),
+            filter=self._filter_expression(min_pip, drop_ambiguous),
+            batch_size=batch_size
+        )
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield self._process_data(batch.to_pandas())
+    
+    def _process_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Process data: standardize column names and calculate labels
+        
+        Args:
+            df: DataFrame with source column names
+            
+        Returns:
+            Processed DataFrame
+        """
+        reverse_mapping = {v: k for k, v in self.config["column_mapping"].items()}
+        df = df.rename(columns=reverse_mapping)
+        
+        # Labels are computed before the float32 conversion so thresholds are exact
+        df['labels'] = (df[self.config["label_column"]] >= self.config["positive_threshold"]).astype(np.uint8)
+        
+        for column in df.columns:
+            if pd.api.types.is_float_dtype(df[column]):
+                df[column] = df[column].astype(np.float32)
+        return df
+    
+    def load(
+        self,
+        min_pip: Optional[float] = None,
+        drop_ambiguous: bool = False,
+        chunksize: Optional[int] = None
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """
+        Load and preprocess data
+        
+        Args:
+            min_pip: Optional minimum pip, no filtering if not specified
+            drop_ambiguous: Whether to drop variants with negative_threshold <= pip < positive_threshold
+            chunksize: If given, return a generator of processed batches of at
+                most chunksize rows instead of one DataFrame
+                
+        Returns:
+            Processed DataFrame, or a generator of processed DataFrames if chunksize is given
+        """
+        if chunksize is not None:
+            if chunksize < 1:
+                raise ValueError("chunksize must be positive")
+            return self.iter_batches(min_pip, drop_ambiguous, batch_size=chunksize)
+        
+        batches = list(self.iter_batches(min_pip, drop_ambiguous))
+        if not batches:
+            return pd.DataFrame(columns=self.config["output_columns"])
+        processed_data = pd.concat(batches, ignore_index=True)
+        
+        # Categories are only built for the full table, since they differ between batches
+        for column in CATEGORICAL_COLUMNS:
+            if column in processed_data.columns:
+                processed_data[column] = processed_data[column].astype('category')
+        return processed_data
+    
+    def evaluate_predictors(self, df: pd.DataFrame, score_columns: List[str]) -> pd.DataFrame:
+        """
+        Calculate AUROC and AUPRC of predictor columns against the pip labels
+        
+        Args:
+            df: DataFrame
+            score_columns: Predictor columns, e.g. variant effect scores
+            
+        Returns:
+            DataFrame with one row per predictor and columns score_column, n, n_positive, AUROC and AUPRC
+        """
+        return evaluate_predictors(df, score_columns, label_column='labels')
+    
+    def initialize_pipeline(
+        self,
+        output_path: Optional[Union[str, Path]] = None,
+        min_pip: Optional[float] = None,
+        drop_ambiguous: bool = False,
+        clear_cache: bool = True,
+        do_statistics: bool = True,
+        score_columns: Optional[List[str]] = None,
+        chunksize: Optional[int] = None,
+        recorder: Optional[StageRecorder] = None
+    ) -> Dict[str, Any]:
+        """
+        Initialize and run data processing pipeline
+        
+        With chunksize the dataset is processed and written batch by batch,
+        only the score and label columns are kept in memory for statistics.
+        Stages are recorded as in EnhancerProcessor.initialize_pipeline.
+        
+        Args:
+            output_path: Path to save processed data
+            min_pip: Optional minimum pip
+            drop_ambiguous: Whether to drop variants between the label thresholds
+            clear_cache: Whether to clear cache
+            do_statistics: Whether to perform statistical analysis
+            score_columns: Optional predictor columns to evaluate against the labels
+            chunksize: Optional number of rows per batch for streaming processing
+            recorder: Optional stage recorder
+            
+        Returns:
+            Dictionary containing processing results
+        """
+        results = {}
+        recorder = recorder if recorder is not None else StageRecorder()
+        stages_before = len(recorder.records)
+        score_columns = list(score_columns or [])
+        
+        try:
+            # Output dataset basic information
+            print(f"Dataset name: {self.config['name']}")
+            print(f"Description: {self.config['description']}")
+            print()
+            
+            # 1. Download data
+            print("1. Starting data download...")
+            with recorder.stage("1. download") as stage:
+                data_path = self.download()
+                stage['bytes_written'] = file_size(data_path)
+            print(f"Data downloaded to: {data_path}")
+            results['download_path'] = str(data_path)
+            
+            # 2. Process data
+            print("\n2. Processing data...")
+            with recorder.stage("2. process", bytes_read=file_size(data_path), streamed=chunksize is not None) as stage:
+                processed_data = self.load(min_pip=min_pip, drop_ambiguous=drop_ambiguous, chunksize=chunksize)
+                if chunksize is None:
+                    stage['rows_out'] = len(processed_data)
+            
+            if chunksize is not None:
+                # 2.2 / 3. Stream batches to the output file
+                print(f"Processing in batches of {chunksize:,} rows...")
+                if output_path:
+                    print("\n3. Saving processed data...")
+                with recorder.stage("3. save" if output_path else "2.2 stream", chunksize=chunksize) as stage:
+                    summary = self.write_chunks(
+                        processed_data,
+                        output_path,
+                        keep_columns=score_columns + ['labels'] if do_statistics else []
+                    )
+                    stage['rows_out'] = summary['num_rows']
+                    stage['bytes_written'] = file_size(output_path) if output_path else None
+                processed_data = summary['kept']
+                if output_path:
+                    print(f"Data saved to: {output_path}")
+                    results['output_path'] = str(output_path)
+                data_shape = (summary['num_rows'], len(summary['columns']))
+                columns = summary['columns']
+                memory_bytes = summary['max_chunk_bytes']
+            else:
+                data_shape = processed_data.shape
+                columns = processed_data.columns.tolist()
+                memory_bytes = self.memory_footprint(processed_data)['total']
+            
+            print(f"Data shape: {data_shape}")
+            print(f"Columns: {columns}")
+            results['data_shape'] = data_shape
+            results['columns'] = columns
+            print(f"Memory footprint: {memory_bytes / 2**20:.2f} MiB" + (" (largest batch)" if chunksize else ""))
+            results['memory_bytes'] = memory_bytes
+            
+            # 3. Save processed data
+            if output_path and chunksize is None:
+                print("\n3. Saving processed data...")
+                output_path = Path(output_path)
+                with recorder.stage("3. save", rows_in=len(processed_data)) as stage:
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
+                    processed_data.to_csv(output_path, sep='\t', index=False)
+                    stage['bytes_written'] = file_size(output_path)
+                print(f"Data saved to: {output_path}")
+                results['output_path'] = str(output_path)
+            
+            # 4. Clear cache
+            if clear_cache:
+                print("\n4. Clearing cache...")
+                with recorder.stage("4. clear_cache"):
+                    self.clear_cache(clear_all=True)
+                results['cache_cleared'] = True
+            
+            # 5. Statistical analysis
+            if do_statistics:
+                print("\n5. Performing statistical analysis...")
+                with recorder.stage("5. statistics", rows_in=len(processed_data)):
+                    if score_columns:
+                        metrics = self.evaluate_predictors(processed_data, score_columns)
+                        results['metrics'] = metrics.to_dict(orient='records')
+                    distribution = self.analyze_label_distribution(processed_data)
+                
+                if score_columns:
+                    print("\nPerformance metrics:")
+                    for row in results['metrics']:
+                        print(f"{row['score_column']}: AUROC {row['AUROC']:.3f}, AUPRC {row['AUPRC']:.3f}")
+                
+                print("\nLabel distribution:")
+                print(f"Total samples: {distribution['total_samples']:,}")
+                print("\nLabel counts:")
+                for label, count in distribution['label_counts'].items():
+                    print(f"Label {label}: {count:,}")
+                print(f"\nPositive-negative ratio: {distribution['positive_negative_ratio']:.3f}")
+                results['distribution'] = distribution
+            
+            print("\nInitialization complete!")
+            results['status'] = 'success'
+        
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            results['status'] = 'error'
+            results['error_message'] = str(e)
+            raise
+        finally:
+            results['stages'] = recorder.summary()[stages_before:]
+        
+        return results
+
+def iter_tissue_batches(
+    tissues: Optional[Sequence[str]] = None,
+    cache_root: Optional[Union[str, Path]] = None,
+    max_cache_bytes: Optional[int] = None,
+    min_pip: Optional[float] = None,
+    drop_ambiguous: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream processed batches of several tissues one after another
+    
+    Only one batch is in memory at a time, so all GTEx tissues can be
+    written to one file, e.g. with BaseDataset.write_chunks.
+    
+    Args:
+        tissues: eQTL datasets to read, defaults to all eQTL datasets
+        cache_root: Cache root directory
+        max_cache_bytes: Byte quota of the shared download store, no limit if None
+        min_pip: Optional minimum pip
+        drop_ambiguous: Whether to drop variants between the label thresholds
+        batch_size: Maximum number of rows per batch
+        
+    Yields:
+        Processed DataFrames with a leading 'tissue' column
+    """
+    for tissue in (tissues if tissues is not None else eqtl_tissues()):
+        processor = EqtlProcessor(tissue, cache_root=cache_root, max_cache_bytes=max_cache_bytes)
+        for batch in processor.iter_batches(min_pip, drop_ambiguous, batch_size=batch_size):
+            batch.insert(0, 'tissue', tissue)
+            yield batch
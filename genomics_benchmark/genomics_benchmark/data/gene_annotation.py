@@ -0,0 +1,135 @@
+"""
+Compact gene annotation table built once from a GTF file and cached per genome version
+"""
+import re
+import gzip
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Dict, Union, Optional
+from ..utils.locking import FileLock, atomic_output
+
+GENE_TABLE_COLUMNS = ['gene_id', 'gene_name', 'chrom', 'start', 'end', 'strand', 'tss', 'biotype']
+
+_ATTRIBUTE_PATTERNS = {
+    'gene_id': re.compile(r'gene_id "([^"]*)"'),
+    'gene_name': re.compile(r'gene_name "([^"]*)"'),
+    # GENCODE uses gene_type, Ensembl uses gene_biotype
+    'biotype': re.compile(r'gene_(?:type|biotype) "([^"]*)"'),
+}
+
+# In-process cache of loaded tables keyed by (path, mtime)
+_loaded_tables: Dict[tuple, pd.DataFrame] = {}
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def build_gene_table(gtf_path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Build a compact gene table by streaming through a GTF file
+    
+    Only 'gene' records are parsed; all other lines are skipped with a
+    substring check, so the full file is never loaded into memory.
+    Coordinates are converted to 0-based half-open intervals, matching the
+    BED-style startTSS columns of the enhancer datasets.
+    
+    Args:
+        gtf_path: Path to the GTF file, optionally gzip compressed
+        
+    Returns:
+        DataFrame with columns gene_id, gene_name, chrom, start, end, strand, tss
+        and biotype. chrom, strand and biotype are categorical, coordinates int32
+    """
+    gtf_path = Path(gtf_path)
+    opener = gzip.open if gtf_path.suffix == '.gz' else open
+    columns = {name: [] for name in ('gene_id', 'gene_name', 'chrom', 'start', 'end', 'strand', 'biotype')}
+    
+    with opener(gtf_path, 'rt') as f:
+        for line in f:
+            if '\tgene\t' not in line or line.startswith('#'):
+                continue
+            fields = line.rstrip('\n').split('\t', 8)
+            if len(fields) < 9 or fields[2] != 'gene':
+                continue
+            attributes = fields[8]
+            values = {}
+            for name, pattern in _ATTRIBUTE_PATTERNS.items():
+                match = pattern.search(attributes)
+                values[name] = match.group(1) if match else None
+            columns['gene_id'].append(values['gene_id'])
+            columns['gene_name'].append(values['gene_name'])
+            columns['chrom'].append(fields[0])
+            columns['start'].append(int(fields[3]) - 1)
+            columns['end'].append(int(fields[4]))
+            columns['strand'].append(fields[6])
+            columns['biotype'].append(values['biotype'])
+    
+    genes = pd.DataFrame({
+        'gene_id': pd.Series(columns['gene_id'], dtype=object),
+        'gene_name': pd.Series(columns['gene_name'], dtype=object),
+        'chrom': pd.Categorical(columns['chrom']),
+        'start': np.asarray(columns['start'], dtype=np.int32),
+        'end': np.asarray(columns['end'], dtype=np.int32),
+        'strand': pd.Categorical(columns['strand'], categories=['+', '-']),
+        'biotype': pd.Categorical(columns['biotype']),
+    })
+    genes['tss'] = np.where(genes['strand'] == '-', genes['end'] - 1, genes['start']).astype(np.int32)
+    return genes[GENE_TABLE_COLUMNS]
+
+def _gene_table_path(gtf_path: Path) -> Path:
+    name = gtf_path.name
+    for suffix in ('.gz', '.gtf'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return gtf_path.with_name(name + ('.genes.feather' if _has_pyarrow() else '.genes.pkl'))
+
+def load_gene_table(
+    gtf_path: Union[str, Path],
+    cache_path: Optional[Union[str, Path]] = None
+) -> pd.DataFrame:
+    """
+    Load the compact gene table of a GTF file, building and caching it on first use
+    
+    The table is persisted next to the GTF file (one per genome version under
+    cache_root/reference_genome) as Feather if pyarrow is installed, otherwise
+    as a pickle, and rebuilt only if the GTF file is newer. Within a process
+    the loaded table is also kept in memory.
+    
+    Args:
+        gtf_path: Path to the GTF file, optionally gzip compressed
+        cache_path: Path of the cached table, defaults to <gtf name>.genes.feather next to the GTF
+        
+    Returns:
+        Gene table as returned by build_gene_table
+    """
+    gtf_path = Path(gtf_path)
+    cache_path = Path(cache_path) if cache_path is not None else _gene_table_path(gtf_path)
+    memo_key = (str(gtf_path.resolve()), gtf_path.stat().st_mtime_ns)
+    if memo_key in _loaded_tables:
+        return _loaded_tables[memo_key].copy()
+    
+    def is_fresh() -> bool:
+        return cache_path.exists() and cache_path.stat().st_mtime >= gtf_path.stat().st_mtime
+    
+    if not is_fresh():
+        with FileLock(cache_path.with_name(cache_path.name + '.lock')):
+            if not is_fresh():
+                print(f"Building gene table from GTF file: {gtf_path}")
+                genes = build_gene_table(gtf_path)
+                with atomic_output(cache_path) as tmp_path:
+                    if cache_path.suffix == '.feather':
+                        genes.to_feather(tmp_path)
+                    else:
+                        genes.to_pickle(tmp_path)
+                print(f"Gene table saved to: {cache_path}")
+    
+    if cache_path.suffix == '.feather':
+        genes = pd.read_feather(cache_path)
+    else:
+        genes = pd.read_pickle(cache_path)
+    _loaded_tables[memo_key] = genes
+    return genes.copy()
@@ -0,0 +1,239 @@
+"""
+Concurrent prefetch of every dataset and reference genome in DATASET_CONFIG
+"""
+import os
+import time
+import argparse
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Union, List, Dict, Any, Sequence
+from urllib.parse import urlsplit
+from .dataset_config import DATASET_CONFIG
+from .download import DataDownloader
+from .cache_store import CacheStore
+
+class SessionPool:
+    """Pool of keep-alive requests sessions, one per host"""
+    
+    def __init__(self, pool_maxsize: int = 32):
+        """
+        Initialize session pool
+        
+        Args:
+            pool_maxsize: Maximum number of pooled connections per host
+        """
+        self.pool_maxsize = pool_maxsize
+        self._sessions = {}
+        self._lock = threading.Lock()
+    
+    def get(self, url: str) -> requests.Session:
+        """
+        Get the session for the host of a URL
+        
+        Args:
+            url: URL to be requested
+            
+        Returns:
+            Session shared by all requests to the same host
+        """
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_maxsize
+                )
+                session.mount(host, adapter)
+                self._sessions[host] = session
+            return session
+    
+    def close(self):
+        """Close all sessions"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def list_prefetch_targets(
+    cache_root: Union[str, Path],
+    tasks: Optional[Sequence[str]] = None,
+    genome_versions: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    List every file referenced by DATASET_CONFIG together with its cache directory
+    
+    Cache directories match the ones used by BaseDataset and
+    download_reference_genome, so prefetched files are found by later runs.
+    
+    Args:
+        cache_root: Cache root directory
+        tasks: Tasks to include, e.g. ['enhancer', 'reference_genome'], defaults to all
+        genome_versions: Reference genome versions to include, defaults to all
+        
+    Returns:
+        List of targets with 'task', 'dataset', 'url', 'cache_dir' and 'ranged' keys
+    """
+    cache_root = Path(cache_root)
+    tasks = list(DATASET_CONFIG) if tasks is None else list(tasks)
+    
+    targets = []
+    seen_urls = set()
+    for task_name in tasks:
+        if task_name not in DATASET_CONFIG:
+            raise ValueError(f"Unknown task name: {task_name}")
+        
+        for dataset_name, dataset_config in DATASET_CONFIG[task_name].items():
+            if task_name == "reference_genome":
+                if genome_versions is not None and dataset_name not in genome_versions:
+                    continue
+                urls = [dataset_config["fasta_url"], dataset_config["gtf_url"]]
+                cache_dir = cache_root / "reference_genome" / dataset_name
+                ranged = True
+            elif dataset_name == "task_config" or "data_url" not in dataset_config:
+                continue
+            else:
+                urls = [dataset_config["data_url"]]
+                cache_dir = cache_root / task_name / dataset_name
+                ranged = False
+            
+            for url in urls:
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                targets.append({
+                    'task': task_name,
+                    'dataset': dataset_name,
+                    'url': url,
+                    'cache_dir': cache_dir,
+                    'ranged': ranged
+                })
+    return targets
+
+def prefetch_datasets(
+    cache_root: Optional[Union[str, Path]] = None,
+    tasks: Optional[Sequence[str]] = None,
+    genome_versions: Optional[Sequence[str]] = None,
+    max_workers: int = 8,
+    num_chunks: int = 4,
+    max_cache_bytes: Optional[int] = None,
+    force: bool = False
+) -> Dict[str, Any]:
+    """
+    Download every dataset and reference genome file concurrently
+    
+    All downloads share one keep-alive session per host and run in a bounded
+    thread pool. Reference genome files are additionally split into parallel
+    range requests. Failures are recorded per file instead of aborting the run.
+    
+    Args:
+        cache_root: Cache root directory, defaults to .cache/genomics_benchmark in user's home directory
+        tasks: Tasks to include, defaults to all tasks in DATASET_CONFIG
+        genome_versions: Reference genome versions to include, defaults to all
+        max_workers: Maximum number of files downloaded at the same time
+        num_chunks: Number of range requests per reference genome file
+        max_cache_bytes: Byte quota of the shared download store, no limit if None
+        force: Whether to force re-download
+        
+    Returns:
+        Dictionary with per-file results and aggregate size, time and throughput
+    """
+    if cache_root is None:
+        cache_root = os.path.expanduser("~/.cache/genomics_benchmark")
+    cache_root = Path(cache_root)
+    
+    targets = list_prefetch_targets(cache_root, tasks=tasks, genome_versions=genome_versions)
+    store = CacheStore(cache_root / "store", max_bytes=max_cache_bytes)
+    
+    def fetch(session_pool: SessionPool, target: Dict[str, Any]) -> Dict[str, Any]:
+        downloader = DataDownloader(
+            target['cache_dir'],
+            num_chunks=num_chunks,
+            block_size=1 << 16,
+            store=store,
+            session=session_pool.get(target['url'])
+        )
+        result = {
+            'task': target['task'],
+            'dataset': target['dataset'],
+            'url': target['url']
+        }
+        start_time = time.perf_counter()
+        try:
+            path = downloader.download(target['url'], force=force, ranged=target['ranged'])
+            result['status'] = 'success'
+            result['path'] = str(path)
+            result['size'] = path.stat().st_size
+        except Exception as e:
+            result['status'] = 'error'
+            result['error_message'] = str(e)
+        result['bytes_downloaded'] = downloader.bytes_downloaded
+        result['seconds'] = time.perf_counter() - start_time
+        return result
+    
+    print(f"Prefetching {len(targets)} files with {max_workers} workers...")
+    start_time = time.perf_counter()
+    with SessionPool(pool_maxsize=max_workers * num_chunks) as session_pool:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            files = list(executor.map(lambda target: fetch(session_pool, target), targets))
+    elapsed = time.perf_counter() - start_time
+    
+    downloaded_bytes = sum(result['bytes_downloaded'] for result in files)
+    failed = [result for result in files if result['status'] != 'success']
+    summary = {
+        'files': files,
+        'num_files': len(files),
+        'num_failed': len(failed),
+        'downloaded_bytes': downloaded_bytes,
+        'cached_bytes': sum(result.get('size', 0) for result in files) - downloaded_bytes,
+        'seconds': elapsed,
+        'throughput_mb_per_s': downloaded_bytes / (1 << 20) / elapsed if elapsed > 0 else 0.0
+    }
+    
+    print(f"Downloaded {downloaded_bytes / (1 << 20):.1f} MiB in {elapsed:.1f}s "
+          f"({summary['throughput_mb_per_s']:.1f} MiB/s)")
+    for result in failed:
+        print(f"Failed to prefetch {result['url']}: {result['error_message']}")
+    return summary
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point for prefetching all datasets"""
+    parser = argparse.ArgumentParser(
+        description="Download every dataset and reference genome in DATASET_CONFIG concurrently"
+    )
+    parser.add_argument("--cache-root", default=None, help="Cache root directory")
+    parser.add_argument("--tasks", nargs="+", default=None,
+                        help="Tasks to prefetch, e.g. enhancer reference_genome (default: all)")
+    parser.add_argument("--genome-versions", nargs="+", default=None,
+                        help="Reference genome versions to prefetch (default: all)")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent downloads")
+    parser.add_argument("--chunks", type=int, default=4,
+                        help="Number of range requests per reference genome file")
+    parser.add_argument("--max-cache-bytes", type=int, default=None, help="Byte quota of the download store")
+    parser.add_argument("--force", action="store_true", help="Force re-download")
+    args = parser.parse_args(argv)
+    
+    summary = prefetch_datasets(
+        cache_root=args.cache_root,
+        tasks=args.tasks,
+        genome_versions=args.genome_versions,
+        max_workers=args.workers,
+        num_chunks=args.chunks,
+        max_cache_bytes=args.max_cache_bytes,
+        force=args.force
+    )
+    return 1 if summary['num_failed'] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,66 +2,116 @@
 Reference genome processing module
 """
 import os
-import gzip
+import mmap
+import numpy as np
+from collections import namedtuple
 from pathlib import Path
-from typing import Dict, Union
-from .dataset_config import DATASET_CONFIG
+from typing import Dict, Union, Optional, List, Iterable
+from .dataset_config import DATASET_CONFIG, get_dataset_config  # noqa: F401, re-exported
 from .download import DataDownloader
+from .cache_store import CacheStore
+from .bgzf import BgzfWriter, BgzfReader, is_bgzf, iter_gzip_chunks
+from ..utils.locking import FileLock, atomic_output
+from ..utils.instrumentation import record_stage, file_size
 
-def get_dataset_config(task_name: str, dataset_name: str = None) -> dict:
-    """
-    Get configuration for specified task and dataset
-    
-    Args:
-        task_name: Task name, e.g., 'enhancer'
-        dataset_name: Dataset name, e.g., 'fulco', returns task-level config if None
-    
-    Returns:
-        Dictionary containing configuration information
-    """
-    if task_name not in DATASET_CONFIG:
-        raise ValueError(f"Unknown task name: {task_name}")
-    
-    if dataset_name is None:
-        return DATASET_CONFIG[task_name]["task_config"]
-        
-    if dataset_name not in DATASET_CONFIG[task_name]:
-        raise ValueError(f"Unknown dataset name: {dataset_name}")
-    
-    # Merge task-level config and dataset-specific config
-    config = {
-        **DATASET_CONFIG[task_name]["task_config"],
-        **DATASET_CONFIG[task_name][dataset_name]
-    }
-    return config
-
-def _decompress_gz(gz_path: Path) -> Path:
+def _decompress_gz(
+    gz_path: Path,
+    output_path: Optional[Path] = None,
+    threads: Optional[int] = None,
+    bgzf: bool = False
+) -> Path:
     """
     Decompress a .gz file
     
+    The file is streamed in bounded memory. With bgzf=True the content is
+    re-encoded as block-gzip with a samtools-compatible .gzi index instead of
+    being stored uncompressed, so it stays compressed on disk but can still be
+    accessed randomly.
+    
     Args:
         gz_path: Path to the .gz file
+        output_path: Path to the output file, defaults to gz_path without the .gz
+            extension (or with a .bgz extension if bgzf is set)
+        threads: Number of threads for BGZF decompression and compression, defaults to the CPU count
+        bgzf: Whether to write block-gzip output with a .gzi index
         
     Returns:
         Path to the decompressed file
     """
-    output_path = gz_path.with_suffix('')  # Remove .gz extension
+    with record_stage('decompress_gz', bytes_read=file_size(gz_path)) as stage:
+        output_path = _decompress_gz_file(gz_path, output_path, threads, bgzf)
+        stage['bytes_written'] = file_size(output_path)
+    return output_path
+
+def _decompress_gz_file(
+    gz_path: Path,
+    output_path: Optional[Path],
+    threads: Optional[int],
+    bgzf: bool
+) -> Path:
+    """Decompress a .gz file unless the output exists, see _decompress_gz"""
+    if output_path is None:
+        # Remove .gz extension
+        output_path = gz_path.with_suffix('.bgz') if bgzf else gz_path.with_suffix('')
     
     if output_path.exists():
         print(f"Decompressed file already exists: {output_path}")
         return output_path
+    
+    # Only one process decompresses, the others wait for the published file
+    with FileLock(output_path.with_name(output_path.name + '.lock')):
+        if output_path.exists():
+            print(f"Decompressed file already exists: {output_path}")
+            return output_path
         
-    print(f"Decompressing file: {gz_path}")
-    with gzip.open(gz_path, 'rb') as f_in:
-        with open(output_path, 'wb') as f_out:
-            f_out.write(f_in.read())
+        print(f"Decompressing file: {gz_path}")
+        with atomic_output(output_path) as tmp_path:
+            if bgzf:
+                # The index is published before the data file it belongs to
+                index_path = output_path.with_name(output_path.name + '.gzi')
+                with atomic_output(index_path) as tmp_index_path:
+                    with BgzfWriter(tmp_path, tmp_index_path, threads=threads) as f_out:
+                        for chunk in iter_gzip_chunks(gz_path, threads=threads):
+                            f_out.write(chunk)
+            else:
+                with open(tmp_path, 'wb') as f_out:
+                    for chunk in iter_gzip_chunks(gz_path, threads=threads):
+                        f_out.write(chunk)
     print(f"Decompressed to: {output_path}")
     return output_path
 
+def _convert_to_twobit(fasta_path: Path, twobit_path: Path) -> Path:
+    """
+    Convert a FASTA file into a .2bit file once, safely across processes
+    
+    Args:
+        fasta_path: Path to the FASTA file
+        twobit_path: Path of the .2bit file
+        
+    Returns:
+        Path to the .2bit file
+    """
+    from .twobit import fasta_to_twobit
+    
+    if twobit_path.exists():
+        print(f"Using existing 2bit file: {twobit_path}")
+        return twobit_path
+    
+    with FileLock(twobit_path.with_name(twobit_path.name + '.lock')):
+        if not twobit_path.exists():
+            print(f"Converting to 2bit: {twobit_path}")
+            with atomic_output(twobit_path) as tmp_path:
+                fasta_to_twobit(fasta_path, tmp_path)
+    return twobit_path
+
 def download_reference_genome(
     genome_version: str,
     cache_root: Union[str, Path],
-    file_type: str = "both"
+    file_type: str = "both",
+    max_cache_bytes: Optional[int] = None,
+    fasta_format: str = "plain",
+    threads: Optional[int] = None,
+    twobit: bool = False
 ) -> Dict[str, Path]:
     """
     Download reference genome files for specified version
@@ -70,6 +120,13 @@ def download_reference_genome(
         genome_version: Genome version, e.g., 'hg19', 'hg38', 'mm10'
         cache_root: Cache root directory
         file_type: Type of files to download, options: 'fasta', 'gtf', 'both'
+        max_cache_bytes: Byte quota of the shared download store under cache_root,
+            compressed downloads are evicted least recently used first
+        fasta_format: Storage format of the FASTA file, options: 'plain', 'bgzf'.
+            'bgzf' keeps the genome block-gzip compressed with a .gzi index
+        threads: Number of threads used for decompression, defaults to the CPU count
+        twobit: Whether to also convert the FASTA file into a memory-mappable
+            2-bit packed .2bit file, returned under the 'twobit' key
         
     Returns:
         Dictionary containing paths to downloaded files
@@ -80,30 +137,42 @@ def download_reference_genome(
     if file_type not in ['fasta', 'gtf', 'both']:
         raise ValueError(f"Unsupported file type: {file_type}")
     
+    if fasta_format not in ['plain', 'bgzf']:
+        raise ValueError(f"Unsupported FASTA format: {fasta_format}")
+    
     # Create download directory
     cache_dir = Path(cache_root) / "reference_genome" / genome_version
     cache_dir.mkdir(parents=True, exist_ok=True)
     
     # Get download URLs
     genome_config = DATASET_CONFIG["reference_genome"][genome_version]
-    downloader = DataDownloader(cache_dir=cache_dir)
+    store = CacheStore(Path(cache_root) / "store", max_bytes=max_cache_bytes)
+    downloader = DataDownloader(cache_dir=cache_dir, store=store)
     downloaded_files = {}
     
     try:
         if file_type in ['fasta', 'both']:
             # Check if decompressed file already exists
-            fasta_path = cache_dir / genome_config['fasta_url'].split('/')[-1].replace('.gz', '')
+            fasta_name = genome_config['fasta_url'].split('/')[-1]
+            fasta_path = cache_dir / fasta_name.replace('.gz', '.bgz' if fasta_format == 'bgzf' else '')
             if not fasta_path.exists():
                 # Download and decompress
                 gz_path = downloader.download(
                     url=genome_config['fasta_url'],
-                    force=False
+                    force=False,
+                    ranged=True
+                )
+                fasta_path = _decompress_gz(
+                    gz_path, fasta_path, threads=threads, bgzf=fasta_format == 'bgzf'
                 )
-                fasta_path = _decompress_gz(gz_path)
             else:
                 print(f"Using existing decompressed file: {fasta_path}")
             downloaded_files['fasta'] = fasta_path
             
+            if twobit:
+                twobit_path = cache_dir / fasta_name.replace('.fa.gz', '.2bit').replace('.gz', '.2bit')
+                downloaded_files['twobit'] = _convert_to_twobit(fasta_path, twobit_path)
+            
         if file_type in ['gtf', 'both']:
             # Check if decompressed file already exists
             gtf_path = cache_dir / genome_config['gtf_url'].split('/')[-1].replace('.gz', '')
@@ -111,9 +180,10 @@ def download_reference_genome(
                 # Download and decompress
                 gz_path = downloader.download(
                     url=genome_config['gtf_url'],
-                    force=False
+                    force=False,
+                    ranged=True
                 )
-                gtf_path = _decompress_gz(gz_path)
+                gtf_path = _decompress_gz(gz_path, gtf_path, threads=threads)
             else:
                 print(f"Using existing decompressed file: {gtf_path}")
             downloaded_files['gtf'] = gtf_path
@@ -121,4 +191,311 @@ def download_reference_genome(
     except Exception as e:
         raise Exception(f"Failed to download reference genome files: {str(e)}")
     
-    return downloaded_files 
\ No newline at end of file
+    return downloaded_files 
+
+# One line of a samtools .fai index
+FaiRecord = namedtuple('FaiRecord', ['name', 'length', 'offset', 'linebases', 'linewidth'])
+
+def _iter_fasta_chunks(fasta_path: Path, chunk_size: int = 1 << 24) -> Iterable[bytes]:
+    """Iterate over the uncompressed content of a plain or BGZF FASTA file"""
+    if is_bgzf(fasta_path):
+        yield from iter_gzip_chunks(fasta_path)
+        return
+    with open(fasta_path, 'rb') as f:
+        yield from iter(lambda: f.read(chunk_size), b'')
+
+def build_fai(fasta_path: Union[str, Path]) -> List[FaiRecord]:
+    """
+    Build a samtools-compatible .fai index by streaming through a FASTA file
+    
+    Line lengths are measured with NumPy per chunk, so the whole file is never
+    held in memory. Offsets of BGZF files refer to the uncompressed stream, as
+    in samtools.
+    
+    Args:
+        fasta_path: Path to the FASTA file, plain or BGZF
+        
+    Returns:
+        Index records in file order
+    """
+    fasta_path = Path(fasta_path)
+    records = []
+    current = None  # [name, length, offset, linebases, linewidth, short_line_seen]
+    
+    def finish():
+        if current is not None:
+            records.append(FaiRecord(current[0], current[1], current[2], current[3] or 0, current[4] or 0))
+    
+    def add_lines(widths: np.ndarray, bases: np.ndarray):
+        if current is None:
+            if np.any(bases > 0):
+                raise ValueError(f"Sequence data before the first header in {fasta_path}")
+            return
+        if current[3] is None and len(bases):
+            current[3], current[4] = int(bases[0]), int(widths[0])
+        mismatched = np.flatnonzero((bases != current[3]) | (widths != current[4]))
+        if current[5] and np.any(bases > 0) or (
+            len(mismatched) and np.any(bases[mismatched[0] + 1:] > 0)
+        ):
+            raise ValueError(f"Different line length in sequence '{current[0]}' of {fasta_path}")
+        if len(mismatched):
+            current[5] = True
+        current[1] += int(bases.sum())
+    
+    position = 0
+    carry = b''
+    for chunk in _iter_fasta_chunks(fasta_path):
+        data = carry + chunk
+        start_position = position - len(carry)
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        newlines = np.flatnonzero(buffer == 10)
+        if not len(newlines):
+            carry = data
+            position += len(chunk)
+            continue
+        
+        line_starts = np.concatenate(([0], newlines[:-1] + 1))
+        line_ends = newlines + 1
+        widths = line_ends - line_starts
+        bases = widths - 1 - (buffer[np.maximum(newlines - 1, 0)] == 13) * (widths > 1)
+        headers = np.flatnonzero(buffer[line_starts] == ord('>'))
+        
+        previous = 0
+        for header in headers:
+            add_lines(widths[previous:header], bases[previous:header])
+            finish()
+            name = bytes(data[line_starts[header] + 1:newlines[header]]).decode().strip().split()[0]
+            current = [name, 0, start_position + int(line_ends[header]), None, None, False]
+            previous = header + 1
+        add_lines(widths[previous:], bases[previous:])
+        
+        carry = data[int(line_ends[-1]):]
+        position += len(chunk)
+    
+    if carry:
+        # Last line without a trailing newline
+        last_bases = len(carry.rstrip(b'\r'))
+        add_lines(np.array([last_bases + 1]), np.array([last_bases]))
+    finish()
+    return records
+
+def write_fai(fai_path: Union[str, Path], records: List[FaiRecord]) -> None:
+    """
+    Write a samtools-compatible .fai index
+    
+    Args:
+        fai_path: Path of the index file
+        records: Index records
+    """
+    with atomic_output(fai_path) as tmp_path:
+        with open(tmp_path, 'w') as f:
+            for record in records:
+                f.write('\t'.join(str(field) for field in record) + '\n')
+
+def read_fai(fai_path: Union[str, Path]) -> List[FaiRecord]:
+    """
+    Read a samtools .fai index
+    
+    Args:
+        fai_path: Path of the index file
+        
+    Returns:
+        Index records in file order
+    """
+    records = []
+    with open(fai_path) as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) >= 5:
+                records.append(FaiRecord(fields[0], *(int(field) for field in fields[1:5])))
+    return records
+
+class ReferenceGenome:
+    """Random-access reference genome backed by a .fai index and a memory-mapped FASTA file"""
+    
+    def __init__(self, fasta_path: Union[str, Path], fai_path: Optional[Union[str, Path]] = None):
+        """
+        Open a reference genome
+        
+        An existing .fai index (e.g. from samtools faidx) is reused if it is newer
+        than the FASTA file, otherwise it is built once and written next to it.
+        Plain FASTA files are memory mapped, so queries are served from the page
+        cache without reopening the file and single-line slices are zero-copy.
+        BGZF-compressed FASTA files are read through their .gzi index.
+        
+        Args:
+            fasta_path: Path to the FASTA file, plain or BGZF compressed
+            fai_path: Path to the .fai index, defaults to fasta_path + '.fai'
+        """
+        self.fasta_path = Path(fasta_path)
+        self.fai_path = Path(fai_path) if fai_path is not None else \
+            self.fasta_path.with_name(self.fasta_path.name + '.fai')
+        
+        records = self._load_index()
+        self.index = {record.name: record for record in records}
+        
+        self._file = None
+        self._mmap = None
+        self._reader = None
+        if is_bgzf(self.fasta_path):
+            self._data = None
+            self._reader = BgzfReader(self.fasta_path)
+        else:
+            self._file = open(self.fasta_path, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data = np.frombuffer(self._mmap, dtype=np.uint8)
+    
+    def __reduce__(self):
+        # Worker processes reopen the genome from its path instead of copying mapped data
+        return (self.__class__, (self.fasta_path, self.fai_path))
+    
+    @classmethod
+    def from_genome_version(
+        cls,
+        genome_version: str,
+        cache_root: Union[str, Path],
+        fasta_format: str = "plain"
+    ) -> 'ReferenceGenome':
+        """
+        Download (if needed) and open the reference genome of a genome version
+        
+        Args:
+            genome_version: Genome version, e.g., 'hg19', 'hg38', 'mm10'
+            cache_root: Cache root directory
+            fasta_format: Storage format of the FASTA file, options: 'plain', 'bgzf'
+            
+        Returns:
+            Opened reference genome
+        """
+        genome_files = download_reference_genome(
+            genome_version, cache_root, file_type="fasta", fasta_format=fasta_format
+        )
+        return cls(genome_files['fasta'])
+    
+    def _load_index(self) -> List[FaiRecord]:
+        if self.fai_path.exists() and self.fai_path.stat().st_mtime >= self.fasta_path.stat().st_mtime:
+            return read_fai(self.fai_path)
+        
+        with FileLock(self.fai_path.with_name(self.fai_path.name + '.lock')):
+            if self.fai_path.exists() and self.fai_path.stat().st_mtime >= self.fasta_path.stat().st_mtime:
+                return read_fai(self.fai_path)
+            print(f"Building FASTA index: {self.fai_path}")
+            records = build_fai(self.fasta_path)
+            write_fai(self.fai_path, records)
+            return records
+    
+    @property
+    def chromosomes(self) -> List[str]:
+        """Names of all sequences in file order"""
+        return list(self.index)
+    
+    @property
+    def lengths(self) -> Dict[str, int]:
+        """Length of every sequence"""
+        return {name: record.length for name, record in self.index.items()}
+    
+    def __contains__(self, chrom: str) -> bool:
+        return chrom in self.index
+    
+    def _record(self, chrom: str) -> FaiRecord:
+        record = self.index.get(chrom)
+        if record is None:
+            raise ValueError(f"Unknown chromosome: {chrom}")
+        return record
+    
+    def _file_offset(self, record: FaiRecord, position):
+        """File offset of 0-based sequence positions (scalar or array)"""
+        return record.offset + (position // record.linebases) * record.linewidth + position % record.linebases
+    
+    def fetch_array(self, chrom: str, start: int, end: int) -> np.ndarray:
+        """
+        Get a sequence as an array of ASCII codes
+        
+        Args:
+            chrom: Chromosome name
+            start: 0-based start position
+            end: 0-based exclusive end position
+            
+        Returns:
+            uint8 array of length end - start. For plain FASTA files, regions
+            within one line are a read-only view of the memory-mapped file
+        """
+        record = self._record(chrom)
+        if start < 0 or end > record.length or start > end:
+            raise ValueError(f"Invalid region {chrom}:{start}-{end} (length {record.length})")
+        if start == end:
+            return np.empty(0, dtype=np.uint8)
+        
+        first = self._file_offset(record, start)
+        last = self._file_offset(record, end - 1) + 1
+        if self._data is not None:
+            raw = self._data[first:last]
+        else:
+            raw = np.frombuffer(self._reader.read(first, last - first), dtype=np.uint8)
+        if last - first == end - start:
+            return raw
+        # Drop line terminators, keeping only the base columns of each line
+        columns = (first - record.offset) % record.linewidth + np.arange(last - first)
+        return raw[columns % record.linewidth < record.linebases]
+    
+    def fetch(self, chrom: str, start: int, end: int) -> str:
+        """
+        Get a sequence as a string
+        
+        Args:
+            chrom: Chromosome name
+            start: 0-based start position
+            end: 0-based exclusive end position
+            
+        Returns:
+            Sequence with the case of the FASTA file
+        """
+        return self.fetch_array(chrom, start, end).tobytes().decode('ascii')
+    
+    def fetch_windows(self, chrom: str, starts: np.ndarray, width: int, pad: str = 'N') -> np.ndarray:
+        """
+        Get many fixed-width windows of one chromosome at once
+        
+        Args:
+            chrom: Chromosome name
+            starts: 0-based start positions of the windows, may extend past the chromosome ends
+            width: Window width
+            pad: Character used for positions outside the chromosome
+            
+        Returns:
+            uint8 array of ASCII codes with shape (len(starts), width)
+        """
+        record = self._record(chrom)
+        positions = np.asarray(starts, dtype=np.int64)[:, None] + np.arange(width, dtype=np.int64)
+        valid = (positions >= 0) & (positions < record.length)
+        windows = np.full(positions.shape, ord(pad), dtype=np.uint8)
+        if self._data is not None:
+            windows[valid] = self._data[self._file_offset(record, positions[valid])]
+        else:
+            for row in np.flatnonzero(valid.any(axis=1)):
+                columns = np.flatnonzero(valid[row])
+                windows[row, columns] = self.fetch_array(
+                    chrom, int(positions[row, columns[0]]), int(positions[row, columns[-1]]) + 1
+                )
+        return windows
+    
+    def close(self) -> None:
+        """Release the memory map and file handles"""
+        if self._mmap is not None:
+            self._data = None
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Views returned by fetch_array are still alive, let garbage collection unmap
+                pass
+            self._file.close()
+            self._mmap = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,183 @@
+"""
+Batched extraction of one-hot encoded sequence windows
+"""
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Union, Sequence, Tuple
+
+def _build_one_hot_lut() -> np.ndarray:
+    lut = np.zeros((256, 4), dtype=np.uint8)
+    for column, bases in enumerate((b"Aa", b"Cc", b"Gg", b"Tt")):
+        lut[list(bases), column] = 1
+    return lut
+
+# Lookup table from ASCII code to one-hot row in A, C, G, T order; N and other codes map to zeros
+ONE_HOT_LUT = _build_one_hot_lut()
+
+def one_hot_encode(sequences: np.ndarray) -> np.ndarray:
+    """
+    One-hot encode ASCII sequences with a vectorized lookup table
+    
+    Args:
+        sequences: uint8 array of ASCII codes with any shape
+        
+    Returns:
+        uint8 array with an extra trailing axis of size 4 (A, C, G, T). Bases
+        other than A/C/G/T (e.g. N) are all zeros
+    """
+    return ONE_HOT_LUT[np.asarray(sequences, dtype=np.uint8)]
+
+def extract_windows(
+    genome,
+    chroms: Sequence[str],
+    centers: Sequence[int],
+    width: int,
+    one_hot: bool = True
+) -> np.ndarray:
+    """
+    Extract fixed-width windows centered on positions
+    
+    Rows are grouped by chromosome and each group is gathered from the genome
+    in one vectorized call. Positions beyond chromosome ends are padded with N.
+    Windows on chromosomes missing from the genome are all N.
+    
+    Args:
+        genome: Opened genome providing fetch_windows, e.g. ReferenceGenome
+        chroms: Chromosome of every window
+        centers: 0-based center position of every window
+        width: Window width
+        one_hot: Whether to one-hot encode the windows
+        
+    Returns:
+        uint8 array of shape (N, width, 4) if one_hot, else (N, width) ASCII codes
+    """
+    chrom_codes, chrom_names = pd.factorize(pd.Series(chroms))
+    starts = np.asarray(centers, dtype=np.int64) - width // 2
+    windows = np.full((len(starts), width), ord('N'), dtype=np.uint8)
+    
+    for code, chrom in enumerate(chrom_names):
+        rows = np.flatnonzero(chrom_codes == code)
+        if chrom not in genome:
+            print(f"Warning: chromosome {chrom} not in reference genome, {len(rows)} windows set to N")
+            continue
+        windows[rows] = genome.fetch_windows(chrom, starts[rows], width)
+    
+    return one_hot_encode(windows) if one_hot else windows
+
+_worker_genome = None
+
+def _init_worker(genome) -> None:
+    global _worker_genome
+    _worker_genome = genome
+
+def _extract_batch_to_file(
+    output_path: str,
+    start: int,
+    chroms: np.ndarray,
+    centers: np.ndarray,
+    width: int
+) -> int:
+    output = np.load(output_path, mmap_mode='r+')
+    output[start:start + len(centers)] = extract_windows(_worker_genome, chroms, centers, width)
+    output.flush()
+    return len(centers)
+
+def _window_coordinates(
+    df: pd.DataFrame,
+    center_column: str,
+    chrom_column: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get chromosome and center arrays for windows from DataFrame columns
+    
+    'enhancer_center' is derived from start/end when the column was dropped
+    by EnhancerProcessor._filter_data.
+    """
+    if chrom_column not in df.columns:
+        raise ValueError(f"Column not found in data: {chrom_column}")
+    if center_column in df.columns:
+        centers = df[center_column]
+    elif center_column == 'enhancer_center' and {'start', 'end'} <= set(df.columns):
+        centers = (df['start'] + df['end']) // 2
+    else:
+        raise ValueError(f"Column not found in data: {center_column}")
+    if centers.isna().any():
+        raise ValueError(f"Missing values in column: {center_column}")
+    return df[chrom_column].to_numpy(), centers.to_numpy().astype(np.int64)
+
+def extract_sequence_tensors(
+    df: pd.DataFrame,
+    genome,
+    width: int,
+    center_column: str = 'enhancer_center',
+    chrom_column: str = 'chr',
+    output_path: Optional[Union[str, Path]] = None,
+    num_workers: int = 1,
+    batch_size: int = 50000
+) -> np.ndarray:
+    """
+    Extract one-hot encoded windows for every row of a DataFrame
+    
+    Typical use is windows around 'enhancer_center' or 'gene_tss' of the
+    output of EnhancerProcessor.load. With num_workers > 1 batches are split
+    across worker processes, which reopen the genome from its path (the memory
+    map is shared through the page cache) and write into a memory-mapped .npy
+    file.
+    
+    Args:
+        df: DataFrame with chromosome and center columns
+        genome: Opened genome, e.g. ReferenceGenome
+        width: Window width
+        center_column: Column with 0-based window centers, e.g. 'enhancer_center' or 'gene_tss'
+        chrom_column: Column with chromosome names
+        output_path: Optional .npy file to write the (N, width, 4) array to. The
+            returned array is then memory mapped from this file
+        num_workers: Number of worker processes
+        batch_size: Number of windows per batch
+        
+    Returns:
+        uint8 array of shape (N, width, 4)
+    """
+    chroms, centers = _window_coordinates(df, center_column, chrom_column)
+    shape = (len(centers), width, 4)
+    
+    if num_workers <= 1 and output_path is None:
+        output = np.empty(shape, dtype=np.uint8)
+        for start in range(0, len(centers), batch_size):
+            stop = start + batch_size
+            output[start:stop] = extract_windows(genome, chroms[start:stop], centers[start:stop], width)
+        return output
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        npy_path = Path(output_path) if output_path is not None else Path(tmp_dir) / 'windows.npy'
+        npy_path.parent.mkdir(parents=True, exist_ok=True)
+        output = np.lib.format.open_memmap(npy_path, mode='w+', dtype=np.uint8, shape=shape)
+        
+        if num_workers <= 1:
+            for start in range(0, len(centers), batch_size):
+                stop = start + batch_size
+                output[start:stop] = extract_windows(genome, chroms[start:stop], centers[start:stop], width)
+        else:
+            output.flush()
+            with ProcessPoolExecutor(
+                max_workers=num_workers, initializer=_init_worker, initargs=(genome,)
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _extract_batch_to_file, str(npy_path), start,
+                        chroms[start:start + batch_size], centers[start:start + batch_size], width
+                    )
+                    for start in range(0, len(centers), batch_size)
+                ]
+                for future in futures:
+                    future.result()
+            output = np.load(npy_path, mmap_mode='r+')
+        
+        if output_path is None:
+            # Copy out of the temporary file before it is removed
+            return np.array(output)
+        output.flush()
+        return output
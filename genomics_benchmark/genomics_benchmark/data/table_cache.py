@@ -0,0 +1,204 @@
+"""
+Columnar cache of parsed source tables keyed by source checksum and parsing config
+"""
+import json
+import hashlib
+import pandas as pd
+from pathlib import Path
+from typing import Callable, Dict, Any, Union, Tuple, Optional, Iterator
+from .cache_store import CacheStore
+from ..utils.locking import FileLock, atomic_output
+
+# Bump when the cached representation changes so old entries are not reused
+TABLE_CACHE_VERSION = 4
+
+# In-process cache of source checksums keyed by (path, size, mtime)
+_source_hashes: Dict[Tuple[str, int, int], str] = {}
+
+def _source_hash(path: Path) -> str:
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if key not in _source_hashes:
+        _source_hashes[key] = CacheStore.hash_file(path)
+    return _source_hashes[key]
+
+def table_cache_key(source_path: Union[str, Path], config: Dict[str, Any]) -> str:
+    """
+    Compute the cache key of a parsed table
+    
+    Args:
+        source_path: Path to the raw source file
+        config: Configuration that affects parsing, e.g. column_mapping and label_column
+        
+    Returns:
+        Hex digest combining the source checksum, the config and the cache version
+    """
+    digest = hashlib.sha256()
+    digest.update(_source_hash(Path(source_path)).encode())
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+    digest.update(str(TABLE_CACHE_VERSION).encode())
+    return digest.hexdigest()
+
+def _read_table(path: Path) -> pd.DataFrame:
+    if path.suffix == '.feather':
+        import pyarrow.feather as feather
+        # Uncompressed Feather is memory mapped. Without block consolidation, numeric
+        # columns without nulls stay read-only views of the mapping and are paged in
+        # on demand; other columns are copied, and Arrow frees them as it goes
+        table = feather.read_table(str(path), memory_map=True)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    return pd.read_pickle(path)
+
+def _write_table(df: pd.DataFrame, path: Path) -> Path:
+    """Write Feather if possible, falling back to pickle for columns Arrow cannot represent"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        path = path.with_suffix('.pkl')
+    else:
+        try:
+            with atomic_output(path) as tmp_path:
+                df.reset_index(drop=True).to_feather(tmp_path, compression='uncompressed')
+            return path
+        except (ValueError, TypeError) as e:
+            print(f"Warning: cannot store table as Feather ({e}), using pickle")
+            path = path.with_suffix('.pkl')
+    with atomic_output(path) as tmp_path:
+        df.to_pickle(tmp_path)
+    return path
+
+def _source_config_id(source_id: str, config: Dict[str, Any]) -> str:
+    """Identity of a source and parsing config that outlives new versions of the source content"""
+    digest = hashlib.sha256()
+    digest.update(source_id.encode())
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+def _prune_stale_tables(cache_dir: Path, source_id: str, config: Dict[str, Any], key: str) -> None:
+    """
+    Delete the tables cached for earlier versions of a source with the same config
+    
+    The key of the current table of every source and config is recorded in
+    parsed_index.json, so replaced tables do not accumulate on disk.
+    """
+    index_path = cache_dir / "parsed_index.json"
+    with FileLock(cache_dir / "parsed_index.lock"):
+        index = json.loads(index_path.read_text()) if index_path.exists() else {}
+        identity = _source_config_id(source_id, config)
+        previous = index.get(identity)
+        if previous == key:
+            return
+        index[identity] = key
+        with atomic_output(index_path) as tmp_path:
+            Path(tmp_path).write_text(json.dumps(index, indent=1, sort_keys=True))
+    if previous is not None and previous not in index.values():
+        for suffix in ('.feather', '.pkl', '.lock'):
+            stale_path = cache_dir / f"parsed-{previous}{suffix}"
+            if stale_path.exists():
+                stale_path.unlink()
+                print(f"Removed stale parsed table: {stale_path}")
+
+def find_cached_table(
+    source_path: Union[str, Path],
+    cache_dir: Union[str, Path],
+    config: Dict[str, Any]
+) -> Optional[Path]:
+    """
+    Find the cached table of a source file
+    
+    Args:
+        source_path: Path to the raw source file
+        cache_dir: Directory of the cached tables
+        config: Configuration that affects parsing, part of the cache key
+        
+    Returns:
+        Path of the cached table, or None if it has not been cached
+    """
+    key = table_cache_key(source_path, config)
+    for suffix in ('.feather', '.pkl'):
+        path = Path(cache_dir) / f"parsed-{key}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+def iter_cached_table(path: Union[str, Path], chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Iterate over a cached table in chunks of rows
+    
+    Feather tables are memory mapped and sliced without copying, so only the
+    current chunk is converted to pandas.
+    
+    Args:
+        path: Path of the cached table
+        chunksize: Number of rows per chunk
+        
+    Yields:
+        DataFrames of at most chunksize rows
+    """
+    path = Path(path)
+    if path.suffix == '.feather':
+        import pyarrow.feather as feather
+        table = feather.read_table(str(path), memory_map=True)
+        for start in range(0, table.num_rows, chunksize):
+            chunk = table.slice(start, chunksize).to_pandas()
+            # Keep row labels consistent with loading the whole table
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            yield chunk
+    else:
+        df = pd.read_pickle(path)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize].copy()
+
+def load_cached_table(
+    source_path: Union[str, Path],
+    cache_dir: Union[str, Path],
+    config: Dict[str, Any],
+    parse: Callable[[Path], pd.DataFrame],
+    use_cache: bool = True,
+    source_id: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Load a parsed table from the cache, parsing and caching it on a miss
+    
+    Tables are stored as uncompressed Feather files named after the cache
+    key, so a changed source file or parsing config never hits a stale
+    entry. They are memory mapped when read, and numeric columns without
+    missing values are returned as read-only views of the file instead of
+    copies. The table of an earlier version of the same source_id with the
+    same config is deleted. Concurrent processes parse a given table only once.
+    
+    Args:
+        source_path: Path to the raw source file
+        cache_dir: Directory of the cached tables
+        config: Configuration that affects parsing, part of the cache key
+        parse: Function parsing the source file into a DataFrame
+        use_cache: Whether to use the cache, parse directly if False
+        source_id: Stable name of the source across versions, e.g. its data URL,
+            since new downloads are stored at new content-addressed paths.
+            Defaults to the resolved source path
+        
+    Returns:
+        Parsed DataFrame
+    """
+    source_path = Path(source_path)
+    if not use_cache:
+        return parse(source_path)
+    
+    cache_dir = Path(cache_dir)
+    path = find_cached_table(source_path, cache_dir, config)
+    if path is not None:
+        return _read_table(path)
+    
+    key = table_cache_key(source_path, config)
+    candidates = [cache_dir / f"parsed-{key}.feather", cache_dir / f"parsed-{key}.pkl"]
+    with FileLock(cache_dir / f"parsed-{key}.lock"):
+        for path in candidates:
+            if path.exists():
+                return _read_table(path)
+        df = parse(source_path)
+        path = _write_table(df, candidates[0])
+        print(f"Parsed table cached to: {path}")
+    if source_id is None:
+        source_id = str(source_path.resolve())
+    _prune_stale_tables(cache_dir, source_id, config, key)
+    return _read_table(path)
@@ -0,0 +1,186 @@
+"""
+Sorted-array index of gene TSS positions for bulk positional queries
+"""
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+from pathlib import Path
+from typing import Union, Sequence, Tuple
+
+# Hits of many queries in CSR layout: hits of query i are entries offsets[i]:offsets[i + 1]
+TSSHits = namedtuple('TSSHits', ['offsets', 'query', 'gene', 'distance', 'rank'])
+
+class TSSIndex:
+    """Per-chromosome sorted TSS arrays queried with vectorized binary search"""
+    
+    def __init__(self, genes: pd.DataFrame):
+        """
+        Build the index from a gene table
+        
+        All TSS positions are kept in one array sorted by chromosome and then
+        position, so every chromosome is a contiguous sorted slice of it.
+        
+        Args:
+            genes: Gene table with at least 'chrom' and 'tss' columns, e.g. the
+                output of load_gene_table. Query results refer to its rows by position
+        """
+        for column in ('chrom', 'tss'):
+            if column not in genes.columns:
+                raise ValueError(f"Column not found in gene table: {column}")
+        self.genes = genes.reset_index(drop=True)
+        
+        chrom_codes, chrom_names = pd.factorize(self.genes['chrom'].astype(object), sort=True)
+        tss = self.genes['tss'].to_numpy().astype(np.int64)
+        order = np.lexsort((tss, chrom_codes))
+        
+        self._tss = tss[order]
+        self._gene_rows = order.astype(np.int64)
+        bounds = np.searchsorted(chrom_codes[order], np.arange(len(chrom_names) + 1))
+        self._chrom_slices = {
+            chrom: (int(bounds[code]), int(bounds[code + 1]))
+            for code, chrom in enumerate(chrom_names)
+        }
+    
+    @classmethod
+    def from_gtf(cls, gtf_path: Union[str, Path]) -> 'TSSIndex':
+        """
+        Build the index from the cached gene table of a GTF file
+        
+        Args:
+            gtf_path: Path to the GTF file, optionally gzip compressed
+            
+        Returns:
+            TSS index over all genes of the annotation
+        """
+        from .gene_annotation import load_gene_table
+        return cls(load_gene_table(gtf_path))
+    
+    @property
+    def chromosomes(self):
+        """Chromosomes with at least one gene"""
+        return list(self._chrom_slices)
+    
+    def __len__(self) -> int:
+        return len(self._tss)
+    
+    def _group_queries(self, chroms: Sequence[str]):
+        """Yield (chromosome slice, query rows) for every chromosome among the queries"""
+        query_codes, query_chroms = pd.factorize(pd.Series(chroms, dtype=object))
+        for code, chrom in enumerate(query_chroms):
+            rows = np.flatnonzero(query_codes == code)
+            yield self._chrom_slices.get(chrom, (0, 0)), rows
+    
+    def window_bounds(
+        self,
+        chroms: Sequence[str],
+        positions: Sequence[int],
+        max_distance: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Locate the genes within max_distance of every query position
+        
+        Args:
+            chroms: Chromosome of every query
+            positions: 0-based position of every query
+            max_distance: Maximum absolute distance to the TSS, inclusive
+            
+        Returns:
+            Arrays lo and hi, the TSS of query i are the sorted index entries lo[i]:hi[i]
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        lo = np.zeros(len(positions), dtype=np.int64)
+        hi = np.zeros(len(positions), dtype=np.int64)
+        for (begin, end), rows in self._group_queries(chroms):
+            tss = self._tss[begin:end]
+            lo[rows] = begin + np.searchsorted(tss, positions[rows] - max_distance, side='left')
+            hi[rows] = begin + np.searchsorted(tss, positions[rows] + max_distance, side='right')
+        return lo, hi
+    
+    def nearest(self, chroms: Sequence[str], positions: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the nearest TSS of every query position
+        
+        Args:
+            chroms: Chromosome of every query
+            positions: 0-based position of every query
+            
+        Returns:
+            Tuple of (gene row, distance) arrays. Ties go to the upstream TSS;
+            queries on chromosomes without genes get gene row -1 and distance -1
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        gene = np.full(len(positions), -1, dtype=np.int64)
+        distance = np.full(len(positions), -1, dtype=np.int64)
+        for (begin, end), rows in self._group_queries(chroms):
+            if begin == end:
+                continue
+            tss = self._tss[begin:end]
+            right = np.minimum(np.searchsorted(tss, positions[rows], side='left'), len(tss) - 1)
+            left = np.maximum(right - 1, 0)
+            left_distance = np.abs(positions[rows] - tss[left])
+            right_distance = np.abs(positions[rows] - tss[right])
+            best = np.where(left_distance <= right_distance, left, right)
+            gene[rows] = self._gene_rows[begin + best]
+            distance[rows] = np.minimum(left_distance, right_distance)
+        return gene, distance
+    
+    def hits_from_bounds(
+        self,
+        positions: Sequence[int],
+        lo: np.ndarray,
+        hi: np.ndarray,
+        sort_by_distance: bool = True
+    ) -> TSSHits:
+        """
+        Expand window bounds into flat per-query hit arrays
+        
+        Args:
+            positions: 0-based position of every query
+            lo: Start of every query's range in the index, from window_bounds
+            hi: End of every query's range in the index, from window_bounds
+            sort_by_distance: Whether to order the hits of each query by distance
+                (ties by TSS position) instead of by TSS position
+                
+        Returns:
+            TSSHits with offsets of length n_queries + 1 and flat arrays query,
+            gene (row in the gene table), distance and rank (0-based rank by
+            distance within the query)
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        counts = hi - lo
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        
+        query = np.repeat(np.arange(len(counts), dtype=np.int64), counts)
+        entries = np.arange(offsets[-1], dtype=np.int64) - offsets[query] + lo[query]
+        distance = np.abs(self._tss[entries] - positions[query])
+        
+        # Hits of each query are sorted by TSS; ranking by distance only reorders within a query
+        by_distance = np.lexsort((distance, query))
+        rank = np.empty(len(query), dtype=np.int64)
+        rank[by_distance] = np.arange(len(query), dtype=np.int64) - offsets[query]
+        if sort_by_distance:
+            entries, distance, rank = entries[by_distance], distance[by_distance], rank[by_distance]
+        return TSSHits(offsets, query, self._gene_rows[entries], distance, rank)
+    
+    def within(
+        self,
+        chroms: Sequence[str],
+        positions: Sequence[int],
+        max_distance: int,
+        sort_by_distance: bool = True
+    ) -> TSSHits:
+        """
+        Find all genes whose TSS is within max_distance of every query position
+        
+        Args:
+            chroms: Chromosome of every query
+            positions: 0-based position of every query
+            max_distance: Maximum absolute distance to the TSS, inclusive
+            sort_by_distance: Whether to order the hits of each query by distance
+            
+        Returns:
+            TSSHits, see hits_from_bounds
+        """
+        lo, hi = self.window_bounds(chroms, positions, max_distance)
+        return self.hits_from_bounds(positions, lo, hi, sort_by_distance)
@@ -0,0 +1,366 @@
+"""
+2-bit packed, memory-mapped genome store in the UCSC .2bit format
+"""
+import mmap
+import struct
+import numpy as np
+from pathlib import Path
+from typing import Dict, Union, Optional, List, Tuple
+
+TWOBIT_SIGNATURE = 0x1A412743
+# Packed code order of the .2bit format
+TWOBIT_BASES = b"TCAG"
+CHUNK_SIZE = 1 << 24
+
+def _build_lookup_tables() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # ASCII -> 2-bit code (anything other than C/A/G is stored as T, as in UCSC faToTwoBit)
+    encode = np.zeros(256, dtype=np.uint8)
+    for code, base in enumerate(TWOBIT_BASES):
+        encode[base] = code
+        encode[base + 32] = code
+    # Packed byte -> its 4 codes, first base in the most significant bits
+    byte_values = np.arange(256, dtype=np.uint8)
+    unpack = np.stack([(byte_values >> shift) & 3 for shift in (6, 4, 2, 0)], axis=1).astype(np.uint8)
+    # 2-bit code -> ASCII and one-hot row in A, C, G, T order
+    decode = np.frombuffer(TWOBIT_BASES, dtype=np.uint8).copy()
+    one_hot = np.zeros((4, 4), dtype=np.uint8)
+    for code, column in enumerate((3, 1, 0, 2)):
+        one_hot[code, column] = 1
+    return encode, unpack, decode, one_hot
+
+ENCODE_LUT, UNPACK_LUT, DECODE_LUT, ONE_HOT_CODE_LUT = _build_lookup_tables()
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) of every run of True values"""
+    padded = np.concatenate(([False], mask, [False])).view(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[::2], edges[1::2]
+
+class _BlockCollector:
+    """Collects runs across chunks, merging runs that touch a chunk boundary"""
+    
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+    
+    def add(self, mask: np.ndarray, offset: int) -> None:
+        starts, ends = _runs(mask)
+        if not len(starts):
+            return
+        starts, ends = starts + offset, ends + offset
+        if self.ends and self.ends[-1][-1] == starts[0]:
+            self.ends[-1][-1] = ends[0]
+            starts, ends = starts[1:], ends[1:]
+        if len(starts):
+            self.starts.append(starts)
+            self.ends.append(ends.copy())
+    
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.starts:
+            return np.empty(0, dtype='<u4'), np.empty(0, dtype='<u4')
+        starts = np.concatenate(self.starts)
+        return starts.astype('<u4'), (np.concatenate(self.ends) - starts).astype('<u4')
+
+def fasta_to_twobit(
+    fasta_path: Union[str, Path],
+    output_path: Union[str, Path]
+) -> Path:
+    """
+    Convert a FASTA file into the UCSC .2bit format
+    
+    Each chromosome is read in chunks from the memory-mapped FASTA file.
+    Bases are packed 4 per byte, runs of non-ACGT characters are stored as
+    N blocks and runs of lower-case bases as soft-mask blocks. Memory use is
+    bounded by a quarter of the largest chromosome.
+    
+    Args:
+        fasta_path: Path to the FASTA file, plain or BGZF compressed
+        output_path: Path of the .2bit file to write
+        
+    Returns:
+        Path to the .2bit file
+    """
+    from .reference_genome import ReferenceGenome
+    
+    output_path = Path(output_path)
+    with ReferenceGenome(fasta_path) as genome:
+        names = genome.chromosomes
+        # Use 64-bit offsets (format version 1) when packed data approaches 4 GB
+        version = 1 if sum(genome.lengths.values()) // 4 > 0xe0000000 else 0
+        offset_format = '<Q' if version else '<I'
+        index_size = sum(1 + len(name.encode()) + struct.calcsize(offset_format) for name in names)
+        
+        with open(output_path, 'wb') as f:
+            f.write(struct.pack('<4I', TWOBIT_SIGNATURE, version, len(names), 0))
+            index_offset = f.tell()
+            f.seek(index_offset + index_size)
+            
+            offsets = []
+            for name in names:
+                length = genome.lengths[name]
+                packed = np.empty((length + 3) // 4, dtype=np.uint8)
+                n_blocks = _BlockCollector()
+                mask_blocks = _BlockCollector()
+                for start in range(0, length, CHUNK_SIZE):
+                    end = min(start + CHUNK_SIZE, length)
+                    bases = genome.fetch_array(name, start, end)
+                    upper = bases & 0xdf
+                    n_blocks.add(
+                        (upper != ord('A')) & (upper != ord('C')) & (upper != ord('G')) & (upper != ord('T')),
+                        start
+                    )
+                    mask_blocks.add((bases >= ord('a')) & (bases <= ord('z')), start)
+                    
+                    codes = ENCODE_LUT[bases]
+                    if len(codes) % 4:
+                        codes = np.concatenate((codes, np.zeros(4 - len(codes) % 4, dtype=np.uint8)))
+                    codes = codes.reshape(-1, 4)
+                    packed[start // 4:start // 4 + len(codes)] = (
+                        (codes[:, 0] << 6) | (codes[:, 1] << 4) | (codes[:, 2] << 2) | codes[:, 3]
+                    )
+                
+                offsets.append(f.tell())
+                f.write(struct.pack('<I', length))
+                for starts, sizes in (n_blocks.arrays(), mask_blocks.arrays()):
+                    f.write(struct.pack('<I', len(starts)))
+                    f.write(starts.tobytes())
+                    f.write(sizes.tobytes())
+                f.write(struct.pack('<I', 0))
+                f.write(packed.tobytes())
+            
+            f.seek(index_offset)
+            for name, offset in zip(names, offsets):
+                encoded = name.encode()
+                f.write(struct.pack('<B', len(encoded)) + encoded + struct.pack(offset_format, offset))
+    return output_path
+
+class TwoBitGenome:
+    """Read-only, memory-mapped genome in the UCSC .2bit format"""
+    
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open a .2bit genome
+        
+        Only the index is parsed on open; sequences are unpacked on demand
+        from the memory map, so opening is near-instant and the packed data
+        is shared read-only between all processes through the page cache.
+        
+        Args:
+            path: Path to the .2bit file
+        """
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._data = np.frombuffer(self._mmap, dtype=np.uint8)
+        
+        signature, version, count, _ = struct.unpack_from('<4I', self._mmap, 0)
+        if signature != TWOBIT_SIGNATURE:
+            raise ValueError(f"Not a .2bit file (or wrong byte order): {self.path}")
+        offset_format = '<Q' if version == 1 else '<I'
+        
+        self._offsets = {}
+        position = 16
+        for _ in range(count):
+            name_size = self._mmap[position]
+            name = self._mmap[position + 1:position + 1 + name_size].decode()
+            position += 1 + name_size
+            self._offsets[name] = struct.unpack_from(offset_format, self._mmap, position)[0]
+            position += struct.calcsize(offset_format)
+        self._records = {}
+    
+    def __reduce__(self):
+        # Worker processes reopen the file instead of copying mapped data
+        return (self.__class__, (self.path,))
+    
+    @classmethod
+    def from_genome_version(cls, genome_version: str, cache_root: Union[str, Path]) -> 'TwoBitGenome':
+        """
+        Download and convert (if needed) and open the .2bit genome of a genome version
+        
+        Args:
+            genome_version: Genome version, e.g., 'hg19', 'hg38', 'mm10'
+            cache_root: Cache root directory
+            
+        Returns:
+            Opened genome
+        """
+        from .reference_genome import download_reference_genome
+        
+        genome_files = download_reference_genome(genome_version, cache_root, file_type="fasta", twobit=True)
+        return cls(genome_files['twobit'])
+    
+    def _record(self, chrom: str) -> Dict[str, np.ndarray]:
+        """Parse (once) the record header of a sequence"""
+        record = self._records.get(chrom)
+        if record is not None:
+            return record
+        if chrom not in self._offsets:
+            raise ValueError(f"Unknown chromosome: {chrom}")
+        
+        position = self._offsets[chrom]
+        length, = struct.unpack_from('<I', self._mmap, position)
+        position += 4
+        blocks = []
+        for _ in range(2):
+            count, = struct.unpack_from('<I', self._mmap, position)
+            starts = np.frombuffer(self._mmap, dtype='<u4', count=count, offset=position + 4).astype(np.int64)
+            sizes = np.frombuffer(self._mmap, dtype='<u4', count=count, offset=position + 4 + 4 * count)
+            blocks.append((starts, starts + sizes))
+            position += 4 + 8 * count
+        position += 4  # reserved
+        
+        record = {
+            'length': length,
+            'n_blocks': blocks[0],
+            'mask_blocks': blocks[1],
+            'packed': self._data[position:position + (length + 3) // 4],
+        }
+        self._records[chrom] = record
+        return record
+    
+    @property
+    def chromosomes(self) -> List[str]:
+        """Names of all sequences in file order"""
+        return list(self._offsets)
+    
+    @property
+    def lengths(self) -> Dict[str, int]:
+        """Length of every sequence"""
+        return {name: self._record(name)['length'] for name in self._offsets}
+    
+    def __contains__(self, chrom: str) -> bool:
+        return chrom in self._offsets
+    
+    @staticmethod
+    def _in_blocks(blocks: Tuple[np.ndarray, np.ndarray], positions: np.ndarray) -> np.ndarray:
+        """Whether each position falls in one of the sorted, non-overlapping blocks"""
+        starts, ends = blocks
+        if not len(starts):
+            return np.zeros(positions.shape, dtype=bool)
+        block = np.searchsorted(starts, positions, side='right') - 1
+        return (block >= 0) & (positions < ends[np.maximum(block, 0)])
+    
+    def fetch_codes(self, chrom: str, start: int, end: int) -> np.ndarray:
+        """
+        Get the 2-bit codes of a region (T=0, C=1, A=2, G=3)
+        
+        Args:
+            chrom: Chromosome name
+            start: 0-based start position
+            end: 0-based exclusive end position
+            
+        Returns:
+            uint8 array of codes, N bases are stored as T
+        """
+        record = self._record(chrom)
+        if start < 0 or end > record['length'] or start > end:
+            raise ValueError(f"Invalid region {chrom}:{start}-{end} (length {record['length']})")
+        packed = record['packed'][start // 4:(end + 3) // 4]
+        return UNPACK_LUT[packed].reshape(-1)[start % 4:start % 4 + end - start]
+    
+    def _apply_blocks(self, record, positions: np.ndarray, bases: np.ndarray, soft_mask: bool) -> np.ndarray:
+        bases[self._in_blocks(record['n_blocks'], positions)] = ord('N')
+        if soft_mask:
+            masked = self._in_blocks(record['mask_blocks'], positions)
+            bases[masked] |= 0x20
+        return bases
+    
+    def fetch_array(self, chrom: str, start: int, end: int, soft_mask: bool = True) -> np.ndarray:
+        """
+        Get a sequence as an array of ASCII codes
+        
+        Args:
+            chrom: Chromosome name
+            start: 0-based start position
+            end: 0-based exclusive end position
+            soft_mask: Whether to restore lower-case soft-masked bases
+            
+        Returns:
+            uint8 array of length end - start
+        """
+        record = self._record(chrom)
+        bases = DECODE_LUT[self.fetch_codes(chrom, start, end)]
+        positions = np.arange(start, end, dtype=np.int64)
+        return self._apply_blocks(record, positions, bases, soft_mask)
+    
+    def fetch(self, chrom: str, start: int, end: int, soft_mask: bool = True) -> str:
+        """
+        Get a sequence as a string
+        
+        Args:
+            chrom: Chromosome name
+            start: 0-based start position
+            end: 0-based exclusive end position
+            soft_mask: Whether to restore lower-case soft-masked bases
+            
+        Returns:
+            Sequence string
+        """
+        return self.fetch_array(chrom, start, end, soft_mask).tobytes().decode('ascii')
+    
+    def fetch_windows(
+        self,
+        chrom: str,
+        starts: np.ndarray,
+        width: int,
+        pad: str = 'N',
+        soft_mask: bool = True
+    ) -> np.ndarray:
+        """
+        Get many fixed-width windows of one chromosome at once
+        
+        Args:
+            chrom: Chromosome name
+            starts: 0-based start positions of the windows, may extend past the chromosome ends
+            width: Window width
+            pad: Character used for positions outside the chromosome
+            soft_mask: Whether to restore lower-case soft-masked bases
+            
+        Returns:
+            uint8 array of ASCII codes with shape (len(starts), width)
+        """
+        record = self._record(chrom)
+        positions = np.asarray(starts, dtype=np.int64)[:, None] + np.arange(width, dtype=np.int64)
+        valid = (positions >= 0) & (positions < record['length'])
+        windows = np.full(positions.shape, ord(pad), dtype=np.uint8)
+        
+        valid_positions = positions[valid]
+        codes = (record['packed'][valid_positions // 4] >> (6 - 2 * (valid_positions % 4))) & 3
+        windows[valid] = self._apply_blocks(record, valid_positions, DECODE_LUT[codes], soft_mask)
+        return windows
+    
+    def one_hot(self, chrom: str, start: int, end: int) -> np.ndarray:
+        """
+        Get a region one-hot encoded directly from the packed codes
+        
+        Args:
+            chrom: Chromosome name
+            start: 0-based start position
+            end: 0-based exclusive end position
+            
+        Returns:
+            uint8 array of shape (end - start, 4) in A, C, G, T order, N bases are all zeros
+        """
+        record = self._record(chrom)
+        encoded = ONE_HOT_CODE_LUT[self.fetch_codes(chrom, start, end)]
+        encoded[self._in_blocks(record['n_blocks'], np.arange(start, end, dtype=np.int64))] = 0
+        return encoded
+    
+    def close(self) -> None:
+        """Release the memory map and file handle"""
+        if self._mmap is not None:
+            self._data = None
+            self._records = {}
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Views returned by queries are still alive, let garbage collection unmap
+                pass
+            self._file.close()
+            self._mmap = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,242 @@
+"""
+Vectorized parsing of GTEx variant ids and extraction of ref/alt sequence windows
+"""
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Union, Optional, Sequence, Iterator, Tuple
+from .sequence import one_hot_encode
+
+# Parsed variant ids: chromosome codes indexing chroms, 1-based positions and bytes allele arrays
+ParsedVariants = namedtuple('ParsedVariants', ['chrom_codes', 'chroms', 'positions', 'ref', 'alt'])
+
+def _to_bytes_matrix(variant_ids) -> Tuple[np.ndarray, np.ndarray]:
+    """Fixed-width bytes of the ids as a (N, L) uint8 matrix and the id lengths"""
+    ids = np.asarray(variant_ids)
+    if ids.dtype.kind != 'S':
+        ids = ids.astype('S')
+    if ids.ndim != 1:
+        raise ValueError("variant_ids must be one-dimensional")
+    width = max(ids.dtype.itemsize, 1)
+    matrix = np.ascontiguousarray(ids, dtype=f'S{width}').view(np.uint8).reshape(len(ids), width)
+    # Fixed-width bytes are padded with NUL
+    return matrix, (matrix != 0).sum(axis=1)
+
+def _gather_field(matrix: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Left-aligned bytes of one field of every row as a fixed-width bytes array"""
+    width = max(int((ends - starts).max()), 1) if len(starts) else 1
+    columns = starts[:, None] + np.arange(width)
+    inside = columns < ends[:, None]
+    field = np.take_along_axis(matrix, np.minimum(columns, matrix.shape[1] - 1), axis=1)
+    field = np.where(inside, field, 0).astype(np.uint8)
+    return np.ascontiguousarray(field).view(f'S{width}').ravel()
+
+def _parse_positions(matrix: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Decimal field of every row as int64, without converting through strings"""
+    field = _gather_field(matrix, starts, ends)
+    digits = np.ascontiguousarray(field).view(np.uint8).reshape(len(starts), field.dtype.itemsize)
+    num_digits = ends - starts
+    exponents = num_digits[:, None] - 1 - np.arange(digits.shape[1])
+    inside = exponents >= 0
+    values = digits.astype(np.int64) - ord('0')
+    if (num_digits < 1).any() or (num_digits > 18).any() or ((values < 0) | (values > 9))[inside].any():
+        raise ValueError("Invalid positions in variant ids")
+    positions = (np.where(inside, values, 0) * 10 ** np.maximum(exponents, 0)).sum(axis=1)
+    if (positions < 1).any():
+        raise ValueError("Variant positions must be 1-based")
+    return positions
+
+def parse_variant_ids(variant_ids: Union[Sequence[str], np.ndarray, pd.Series]) -> ParsedVariants:
+    """
+    Parse GTEx variant ids (chr_pos_ref_alt_b38) into coordinate and allele arrays
+    
+    All ids are split at once on a byte matrix instead of one string at a
+    time. The build suffix is optional.
+    
+    Args:
+        variant_ids: Variant ids, e.g. 'chr1_13550_G_A_b38'
+        
+    Returns:
+        ParsedVariants with chrom_codes (int32 index into chroms), chroms
+        (chromosome names), positions (1-based int64) and ref and alt
+        (bytes arrays of the alleles)
+    """
+    matrix, lengths = _to_bytes_matrix(variant_ids)
+    separators = matrix == ord('_')
+    num_separators = separators.sum(axis=1)
+    invalid = np.flatnonzero((num_separators < 3) | (num_separators > 4))
+    if len(invalid):
+        examples = [matrix[row, :lengths[row]].tobytes().decode() for row in invalid[:3]]
+        raise ValueError(f"Invalid variant ids, expected chr_pos_ref_alt[_build]: {examples}")
+    
+    # Column of the k-th separator of every row, the row end if there is no 4th.
+    # np.nonzero returns the separators row by row, in column order
+    bounds = np.repeat(lengths[:, None], 4, axis=1).astype(np.int64)
+    rows, columns = np.nonzero(separators)
+    first = np.concatenate([[0], np.cumsum(num_separators)[:-1]])
+    bounds[rows, np.arange(len(rows)) - first[rows]] = columns
+    starts = np.concatenate([np.zeros((len(matrix), 1), dtype=np.int64), bounds[:, :3] + 1], axis=1)
+    
+    chrom_codes, chroms = pd.factorize(_gather_field(matrix, starts[:, 0], bounds[:, 0]))
+    positions = _parse_positions(matrix, starts[:, 1], bounds[:, 1])
+    
+    return ParsedVariants(
+        chrom_codes=chrom_codes.astype(np.int32),
+        chroms=np.array([chrom.decode('ascii') for chrom in chroms], dtype=object),
+        positions=positions,
+        ref=_gather_field(matrix, starts[:, 2], bounds[:, 2]),
+        alt=_gather_field(matrix, starts[:, 3], bounds[:, 3]),
+    )
+
+def _allele_matrix(alleles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Alleles as a (N, A) uint8 matrix and their lengths"""
+    width = max(alleles.dtype.itemsize, 1)
+    matrix = np.ascontiguousarray(alleles, dtype=f'S{width}').view(np.uint8).reshape(len(alleles), width)
+    return matrix, (matrix != 0).sum(axis=1)
+
+def _upper(codes: np.ndarray) -> np.ndarray:
+    return np.where((codes >= ord('a')) & (codes <= ord('z')), codes - 32, codes).astype(np.uint8)
+
+def variant_windows(genome, variants: ParsedVariants, width: int) -> Dict[str, np.ndarray]:
+    """
+    Get reference and alternative sequence windows of parsed variants
+    
+    Windows start width // 2 bases before the variant, so the first base of
+    the ref and alt alleles is at column width // 2. In alt windows the ref
+    allele is replaced by the alt allele and the downstream sequence shifts
+    by the length difference, so indels keep the window width.
+    
+    Args:
+        genome: Opened genome providing fetch_windows, e.g. ReferenceGenome or TwoBitGenome
+        variants: Variants from parse_variant_ids
+        width: Window width
+        
+    Returns:
+        Dictionary with 'ref' and 'alt' uint8 arrays of ASCII codes of shape
+        (N, width) and 'ref_match', whether the genome matches the ref allele.
+        Windows on chromosomes missing from the genome are all N
+    """
+    center = width // 2
+    ref_matrix, ref_lengths = _allele_matrix(variants.ref)
+    alt_matrix, alt_lengths = _allele_matrix(variants.alt)
+    # Extra bases downstream of the window replace deleted reference bases
+    extended_width = width + ref_matrix.shape[1]
+    starts = variants.positions - 1 - center
+    extended = np.full((len(starts), extended_width), ord('N'), dtype=np.uint8)
+    
+    for code, chrom in enumerate(variants.chroms):
+        rows = np.flatnonzero(variants.chrom_codes == code)
+        if chrom not in genome:
+            print(f"Warning: chromosome {chrom} not in reference genome, {len(rows)} windows set to N")
+            continue
+        extended[rows] = genome.fetch_windows(chrom, starts[rows], extended_width)
+    
+    allele_columns = np.arange(ref_matrix.shape[1])
+    in_ref = allele_columns < ref_lengths[:, None]
+    ref_match = (
+        (_upper(extended[:, center:center + ref_matrix.shape[1]]) == _upper(ref_matrix)) | ~in_ref
+    ).all(axis=1)
+    
+    # Alt window column j: reference before the variant, then the alt allele, then
+    # the reference after the ref allele
+    columns = np.arange(width)
+    offset = columns - center
+    source = np.where(
+        offset < 0,
+        columns,
+        np.where(
+            offset < alt_lengths[:, None],
+            extended_width + np.minimum(offset, alt_matrix.shape[1] - 1),
+            columns - alt_lengths[:, None] + ref_lengths[:, None]
+        )
+    )
+    alt = np.take_along_axis(np.concatenate([extended, alt_matrix], axis=1), source, axis=1)
+    
+    return {'ref': extended[:, :width], 'alt': alt, 'ref_match': ref_match}
+
+def iter_variant_windows(
+    genome,
+    variant_ids: Union[Sequence[str], np.ndarray, pd.Series],
+    width: int,
+    chunk_size: int = 50000,
+    one_hot: bool = False
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Parse variant ids and extract their windows chunk by chunk
+    
+    Args:
+        genome: Opened genome providing fetch_windows
+        variant_ids: GTEx variant ids
+        width: Window width
+        chunk_size: Number of variants per chunk
+        one_hot: Whether to one-hot encode the windows
+        
+    Yields:
+        Dictionaries from variant_windows with the row 'start' of the chunk;
+        windows have shape (n, width, 4) if one_hot
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    variant_ids = np.asarray(variant_ids)
+    for start in range(0, len(variant_ids), chunk_size):
+        windows = variant_windows(genome, parse_variant_ids(variant_ids[start:start + chunk_size]), width)
+        if one_hot:
+            windows['ref'] = one_hot_encode(windows['ref'])
+            windows['alt'] = one_hot_encode(windows['alt'])
+        windows['start'] = start
+        yield windows
+
+def extract_variant_windows(
+    genome,
+    variant_ids: Union[Sequence[str], np.ndarray, pd.Series],
+    width: int,
+    one_hot: bool = True,
+    output_dir: Optional[Union[str, Path]] = None,
+    chunk_size: int = 50000
+) -> Dict[str, np.ndarray]:
+    """
+    Extract ref and alt windows of all variants into NumPy arrays
+    
+    Only one chunk of parsed ids and windows is held besides the outputs,
+    which can be memory-mapped .npy files for more variants than fit in RAM.
+    
+    Args:
+        genome: Opened genome, e.g. ReferenceGenome.from_genome_version('hg38', cache_root)
+        variant_ids: GTEx variant ids, e.g. the variant_id column of EqtlProcessor.load
+        width: Window width
+        one_hot: Whether to one-hot encode the windows
+        output_dir: Optional directory to write ref.npy, alt.npy and ref_match.npy
+            to. The returned arrays are then memory mapped from these files
+        chunk_size: Number of variants per chunk
+        
+    Returns:
+        Dictionary with 'ref' and 'alt' uint8 arrays of shape (N, width, 4) if
+        one_hot, else (N, width), and the boolean 'ref_match' array
+    """
+    num_variants = len(variant_ids)
+    window_shape = (num_variants, width, 4) if one_hot else (num_variants, width)
+    shapes = {'ref': window_shape, 'alt': window_shape, 'ref_match': (num_variants,)}
+    dtypes = {'ref': np.uint8, 'alt': np.uint8, 'ref_match': np.bool_}
+    if output_dir is None:
+        output = {key: np.empty(shape, dtype=dtypes[key]) for key, shape in shapes.items()}
+    else:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output = {
+            key: np.lib.format.open_memmap(output_dir / f"{key}.npy", mode='w+', dtype=dtypes[key], shape=shape)
+            for key, shape in shapes.items()
+        }
+    
+    for windows in iter_variant_windows(genome, variant_ids, width, chunk_size, one_hot):
+        rows = slice(windows['start'], windows['start'] + len(windows['ref_match']))
+        for key in shapes:
+            output[key][rows] = windows[key]
+    
+    num_mismatches = int(num_variants - output['ref_match'].sum())
+    if num_mismatches:
+        print(f"Warning: reference allele does not match the genome for {num_mismatches:,} variants")
+    if output_dir is not None:
+        for array in output.values():
+            array.flush()
+    return output
@@ -0,0 +1,344 @@
+"""
+Run the processing pipeline of many datasets in a process pool
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import inspect
+import importlib
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Dict, Any, Union, Optional, Sequence, List, Tuple
+from ..data.dataset_config import DATASET_CONFIG
+from ..utils.locking import atomic_output
+
+# Task name -> (module, class) of its processor, imported in the workers
+PROCESSORS = {
+    'enhancer': ('genomics_benchmark.data.enhancer_processor', 'EnhancerProcessor'),
+    'eqtl': ('genomics_benchmark.data.eqtl_processor', 'EqtlProcessor'),
+}
+
+# Tasks run when none are given; others, e.g. eqtl, have to be selected explicitly
+DEFAULT_TASKS = ['enhancer']
+
+def list_batch_jobs(
+    tasks: Optional[Sequence[str]] = None,
+    datasets: Optional[Sequence[str]] = None
+) -> List[Tuple[str, str]]:
+    """
+    List the (task, dataset) pairs to process
+    
+    Args:
+        tasks: Tasks to include, defaults to DEFAULT_TASKS
+        datasets: Datasets to include, defaults to all datasets of the tasks
+        
+    Returns:
+        List of (task, dataset) pairs in DATASET_CONFIG order
+    """
+    tasks = list(tasks) if tasks is not None else list(DEFAULT_TASKS)
+    for task in tasks:
+        if task not in PROCESSORS:
+            raise ValueError(f"No processor for task: {task}")
+    jobs = [
+        (task, dataset)
+        for task in tasks
+        for dataset in DATASET_CONFIG[task]
+        if dataset != "task_config" and (datasets is None or dataset in datasets)
+    ]
+    if datasets is not None:
+        missing = set(datasets) - {dataset for _, dataset in jobs}
+        if missing:
+            raise ValueError(f"Unknown datasets for tasks {tasks}: {sorted(missing)}")
+    return jobs
+
+def _processor_class(task: str) -> type:
+    module_name, class_name = PROCESSORS[task]
+    return getattr(importlib.import_module(module_name), class_name)
+
+def _pipeline_parameters(task: str) -> List[str]:
+    """Names of the initialize_pipeline arguments of a task's processor"""
+    return list(inspect.signature(_processor_class(task).initialize_pipeline).parameters)
+
+def _jsonable(value: Any) -> Any:
+    """Convert pipeline results to JSON-compatible values"""
+    if isinstance(value, dict):
+        return {str(_jsonable(key)): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, Path):
+        return str(value)
+    if hasattr(value, 'item') and callable(value.item):
+        # numpy scalars
+        return value.item()
+    return value
+
+@contextlib.contextmanager
+def _log_to(log_path: Optional[Path]):
+    """Redirect the output of a job to its log file so parallel jobs do not interleave"""
+    if log_path is None:
+        yield
+        return
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, 'w') as f, contextlib.redirect_stdout(f), contextlib.redirect_stderr(f):
+        yield
+
+def _prepare_genome(
+    genome_version: str,
+    cache_root: str,
+    file_type: str,
+    max_cache_bytes: Optional[int],
+    log_path: Optional[Path]
+) -> Dict[str, Any]:
+    from ..data.reference_genome import download_reference_genome
+    
+    start_time = time.perf_counter()
+    result = {'genome_version': genome_version, 'file_type': file_type}
+    try:
+        with _log_to(log_path):
+            files = download_reference_genome(
+                genome_version, cache_root, file_type=file_type, max_cache_bytes=max_cache_bytes
+            )
+        result['status'] = 'success'
+        result['files'] = {key: str(path) for key, path in files.items()}
+    except Exception as e:
+        result['status'] = 'error'
+        result['error_message'] = str(e)
+    result['seconds'] = time.perf_counter() - start_time
+    return result
+
+def _run_dataset(
+    task: str,
+    dataset: str,
+    cache_root: str,
+    max_cache_bytes: Optional[int],
+    pipeline_options: Dict[str, Any],
+    genome_files: Optional[Dict[str, str]],
+    output_path: Optional[Path],
+    log_path: Optional[Path]
+) -> Dict[str, Any]:
+    processor_class = _processor_class(task)
+    # Options of other tasks, e.g. distance_threshold for eqtl, are not passed on
+    parameters = _pipeline_parameters(task)
+    options = {
+        'output_path': output_path,
+        # Clearing the cache would remove files that other workers are still using
+        'clear_cache': False,
+        'genome_files': genome_files,
+    }
+    options.update(pipeline_options)
+    options = {key: value for key, value in options.items() if key in parameters}
+    
+    start_time = time.perf_counter()
+    result = {'task': task, 'dataset': dataset}
+    try:
+        with _log_to(log_path):
+            processor = processor_class(dataset, cache_root=cache_root, max_cache_bytes=max_cache_bytes)
+            results = processor.initialize_pipeline(**options)
+        result.update(_jsonable(results))
+    except Exception as e:
+        result['status'] = 'error'
+        result['error_message'] = str(e)
+    result['seconds'] = time.perf_counter() - start_time
+    if log_path is not None:
+        result['log_path'] = str(log_path)
+    return result
+
+def run_batch(
+    tasks: Optional[Sequence[str]] = None,
+    datasets: Optional[Sequence[str]] = None,
+    cache_root: Optional[Union[str, Path]] = None,
+    output_dir: Optional[Union[str, Path]] = None,
+    num_workers: Optional[int] = None,
+    max_cache_bytes: Optional[int] = None,
+    distance_threshold: Optional[int] = None,
+    do_statistics: bool = True,
+    download_genome: bool = False,
+    add_strand: bool = False,
+    chunksize: Optional[int] = None,
+    min_pip: Optional[float] = None,
+    drop_ambiguous: bool = False
+) -> Dict[str, Any]:
+    """
+    Run initialize_pipeline for many datasets in parallel
+    
+    Reference genome files are prepared once per genome version that any
+    selected dataset needs, and datasets waiting for a genome start as soon
+    as it is ready; datasets without a genome dependency start immediately.
+    The cache is never cleared, since workers share it. A failing dataset is
+    recorded and does not stop the others. Each processor only receives the
+    options its initialize_pipeline accepts; a warning lists the options set
+    here that a task ignores.
+    
+    Args:
+        tasks: Tasks to run, defaults to DEFAULT_TASKS
+        datasets: Datasets to run, defaults to all datasets of the tasks
+        cache_root: Cache root directory, defaults to .cache/genomics_benchmark in user's home directory
+        output_dir: Optional directory for the processed data (<task>/<dataset>.tsv)
+            and per-dataset logs (logs/<task>-<dataset>.log)
+        num_workers: Number of worker processes, defaults to the CPU count
+        max_cache_bytes: Byte quota of the shared download store, no limit if None
+        distance_threshold: Optional distance threshold
+        do_statistics: Whether to perform statistical analysis
+        download_genome: Whether to download reference genome files
+        add_strand: Whether to add gene strand information
+        chunksize: Optional number of rows per chunk for streaming processing
+        min_pip: Optional minimum pip of eQTL variants
+        drop_ambiguous: Whether to drop eQTL variants between the label thresholds
+        
+    Returns:
+        Dictionary with per-dataset results, per-genome preparation results,
+        num_failed and the total seconds
+    """
+    if cache_root is None:
+        cache_root = os.path.expanduser("~/.cache/genomics_benchmark")
+    cache_root = str(cache_root)
+    output_dir = Path(output_dir) if output_dir is not None else None
+    jobs = list_batch_jobs(tasks, datasets)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    pipeline_options = {
+        'distance_threshold': distance_threshold,
+        'do_statistics': do_statistics,
+        'download_genome': download_genome,
+        'add_strand': add_strand,
+        'chunksize': chunksize,
+        'min_pip': min_pip,
+        'drop_ambiguous': drop_ambiguous,
+    }
+    
+    defaults = inspect.signature(run_batch).parameters
+    for task in dict.fromkeys(task for task, _ in jobs):
+        ignored = [
+            key for key, value in pipeline_options.items()
+            if value != defaults[key].default and key not in _pipeline_parameters(task)
+        ]
+        if ignored:
+            print(f"Warning: options not supported by task {task} are ignored: {ignored}")
+    
+    def log_path(name: str) -> Optional[Path]:
+        return output_dir / "logs" / f"{name}.log" if output_dir is not None else None
+    
+    # Datasets grouped by the genome version they need, if any
+    waiting: Dict[str, List[Tuple[str, str]]] = {}
+    ready = []
+    for task, dataset in jobs:
+        genome_version = DATASET_CONFIG[task][dataset].get('genome_version')
+        needs_genome = 'genome_files' in _pipeline_parameters(task)
+        if (download_genome or add_strand) and genome_version and needs_genome:
+            waiting.setdefault(genome_version, []).append((task, dataset))
+        else:
+            ready.append((task, dataset))
+    
+    print(f"Running {len(jobs)} datasets with {num_workers} workers, "
+          f"preparing {len(waiting)} reference genomes: {sorted(waiting)}")
+    start_time = time.perf_counter()
+    genomes: Dict[str, Dict[str, Any]] = {}
+    results: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    
+    with ProcessPoolExecutor(max_workers=max(1, num_workers)) as executor:
+        pending: Dict[Future, Tuple[str, Any]] = {}
+        
+        def submit_dataset(task: str, dataset: str, genome_files: Optional[Dict[str, str]]) -> None:
+            output_path = output_dir / task / f"{dataset}.tsv" if output_dir is not None else None
+            future = executor.submit(
+                _run_dataset, task, dataset, cache_root, max_cache_bytes,
+                pipeline_options, genome_files, output_path, log_path(f"{task}-{dataset}")
+            )
+            pending[future] = ('dataset', (task, dataset))
+        
+        file_type = "both" if download_genome else "gtf"
+        for genome_version in waiting:
+            future = executor.submit(
+                _prepare_genome, genome_version, cache_root, file_type, max_cache_bytes,
+                log_path(f"genome-{genome_version}")
+            )
+            pending[future] = ('genome', genome_version)
+        for task, dataset in ready:
+            submit_dataset(task, dataset, None)
+        
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, key = pending.pop(future)
+                result = future.result()
+                if kind == 'genome':
+                    genomes[key] = result
+                    print(f"Reference genome {key}: {result['status']} in {result['seconds']:.1f}s")
+                    for task, dataset in waiting[key]:
+                        if result['status'] == 'success':
+                            submit_dataset(task, dataset, result['files'])
+                        else:
+                            results[(task, dataset)] = {
+                                'task': task,
+                                'dataset': dataset,
+                                'status': 'error',
+                                'error_message': f"Reference genome {key} failed: {result['error_message']}",
+                            }
+                else:
+                    results[key] = result
+                    print(f"{key[0]}/{key[1]}: {result['status']} in {result.get('seconds', 0):.1f}s")
+    
+    elapsed = time.perf_counter() - start_time
+    dataset_results = [results[job] for job in jobs]
+    failed = [result for result in dataset_results if result['status'] != 'success']
+    summary = {
+        'datasets': dataset_results,
+        'genomes': genomes,
+        'num_datasets': len(jobs),
+        'num_failed': len(failed),
+        'seconds': elapsed,
+    }
+    print(f"Processed {len(jobs)} datasets in {elapsed:.1f}s, {len(failed)} failed")
+    for result in failed:
+        print(f"Failed {result['task']}/{result['dataset']}: {result['error_message']}")
+    return summary
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point for processing many datasets in parallel"""
+    parser = argparse.ArgumentParser(
+        description="Run the processing pipeline of several datasets in a process pool"
+    )
+    parser.add_argument("--tasks", nargs="+", default=None, help="Tasks to run, e.g. enhancer eqtl (default: enhancer)")
+    parser.add_argument("--datasets", nargs="+", default=None,
+                        help="Datasets to run, e.g. Merged Fulco (default: all datasets of the tasks)")
+    parser.add_argument("--cache-root", default=None, help="Cache root directory")
+    parser.add_argument("--output-dir", default=None, help="Directory for processed data and logs")
+    parser.add_argument("--results", default="batch_results.json", help="Consolidated results JSON file")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--max-cache-bytes", type=int, default=None, help="Byte quota of the download store")
+    parser.add_argument("--distance-threshold", type=int, default=None, help="Distance threshold in bp")
+    parser.add_argument("--no-statistics", action="store_true", help="Skip the statistical analysis")
+    parser.add_argument("--download-genome", action="store_true", help="Download reference genome files")
+    parser.add_argument("--add-strand", action="store_true", help="Add gene strand information")
+    parser.add_argument("--chunksize", type=int, default=None, help="Rows per chunk for streaming processing")
+    parser.add_argument("--min-pip", type=float, default=None, help="Minimum pip of eQTL variants")
+    parser.add_argument("--drop-ambiguous", action="store_true",
+                        help="Drop eQTL variants between the negative and positive pip thresholds")
+    args = parser.parse_args(argv)
+    
+    summary = run_batch(
+        tasks=args.tasks,
+        datasets=args.datasets,
+        cache_root=args.cache_root,
+        output_dir=args.output_dir,
+        num_workers=args.workers,
+        max_cache_bytes=args.max_cache_bytes,
+        distance_threshold=args.distance_threshold,
+        do_statistics=not args.no_statistics,
+        download_genome=args.download_genome,
+        add_strand=args.add_strand,
+        chunksize=args.chunksize,
+        min_pip=args.min_pip,
+        drop_ambiguous=args.drop_ambiguous
+    )
+    with atomic_output(args.results) as tmp_path:
+        with open(tmp_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+    print(f"Results saved to: {args.results}")
+    return 1 if summary['num_failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
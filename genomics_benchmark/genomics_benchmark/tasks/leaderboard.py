@@ -0,0 +1,225 @@
+"""
+Leaderboard of enhancer-gene predictors across benchmark datasets
+"""
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Union, Optional, Sequence, List, Tuple
+from ..data.dataset_config import DATASET_CONFIG
+from ..data.cache_store import CacheStore
+from ..data.enhancer_processor import EnhancerProcessor
+from ..data.table_cache import table_cache_key
+from ..utils.locking import atomic_output
+from ..utils.metrics import evaluate_predictors
+
+# Bump when the evaluation changes so cached cells are recomputed
+LEADERBOARD_VERSION = 1
+
+# Columns joining predictions to the processed datasets
+JOIN_COLUMNS = ['chr', 'start', 'end', 'gene_name']
+
+LEADERBOARD_COLUMNS = [
+    'dataset', 'predictor', 'n', 'n_scored', 'coverage', 'n_positive', 'AUROC', 'AUPRC', 'cached'
+]
+
+def enhancer_datasets() -> List[str]:
+    """Names of all enhancer datasets in DATASET_CONFIG"""
+    return [name for name in DATASET_CONFIG["enhancer"] if name != "task_config"]
+
+def _predictor_spec(name: str, spec: Union[str, Path, Dict[str, Any]]) -> Dict[str, Any]:
+    """Normalize a predictor given as a path or a dict with path, score_column and lower_is_better"""
+    if not isinstance(spec, dict):
+        spec = {'path': spec}
+    if 'path' not in spec:
+        raise ValueError(f"No prediction file given for predictor: {name}")
+    return {
+        'path': str(spec['path']),
+        'score_column': spec.get('score_column', 'score'),
+        'lower_is_better': bool(spec.get('lower_is_better', False)),
+    }
+
+def _cell_key(dataset_key: str, predictor: Dict[str, Any]) -> str:
+    """Content hash of everything a leaderboard cell depends on"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        'dataset': dataset_key,
+        'predictor': predictor,
+        'join_columns': JOIN_COLUMNS,
+        'version': LEADERBOARD_VERSION,
+    }, sort_keys=True).encode())
+    return digest.hexdigest()
+
+# Per-process caches, so a worker loads every dataset and prediction file once
+_datasets: Dict[Tuple[str, str, str], pd.DataFrame] = {}
+_predictions: Dict[Tuple[str, str], pd.DataFrame] = {}
+
+def _load_dataset(dataset_name: str, cache_root: str, data_path: str) -> pd.DataFrame:
+    key = (dataset_name, cache_root, data_path)
+    if key not in _datasets:
+        processor = EnhancerProcessor(dataset_name, cache_root=cache_root)
+        processor.data_path = Path(data_path)
+        _datasets[key] = processor.load()
+    return _datasets[key]
+
+def _read_predictions(path: str, score_column: str) -> pd.DataFrame:
+    key = (path, score_column)
+    if key not in _predictions:
+        suffix = Path(path).suffix
+        columns = JOIN_COLUMNS + [score_column]
+        if suffix == '.parquet':
+            df = pd.read_parquet(path, columns=columns)
+        else:
+            df = pd.read_csv(path, sep=',' if suffix == '.csv' else '\t', usecols=columns)
+        df = df.rename(columns={score_column: '__score__'})
+        for column in ('chr', 'gene_name'):
+            df[column] = df[column].astype(str)
+        for column in ('start', 'end'):
+            df[column] = df[column].astype(np.int64)
+        _predictions[key] = df.drop_duplicates(subset=JOIN_COLUMNS, keep='first')
+    return _predictions[key]
+
+def _join_predictions(data: pd.DataFrame, predictions: pd.DataFrame) -> pd.DataFrame:
+    """Left join prediction scores onto a processed dataset"""
+    keys = pd.DataFrame({
+        'chr': data['chr'].astype(str).to_numpy(),
+        'start': data['start'].to_numpy().astype(np.int64),
+        'end': data['end'].to_numpy().astype(np.int64),
+        'gene_name': data['gene_name'].astype(str).to_numpy(),
+        'labels': data['labels'].to_numpy(),
+    })
+    return keys.merge(predictions, on=JOIN_COLUMNS, how='left')
+
+def _evaluate_cell(
+    dataset_name: str,
+    cache_root: str,
+    data_path: str,
+    predictor: str,
+    spec: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Evaluate one predictor on one dataset
+    
+    A predictor without spec is a baseline column of the processed dataset.
+    """
+    data = _load_dataset(dataset_name, cache_root, data_path)
+    if spec is None:
+        scored, score_column = data, predictor
+        lower_is_better = ('distance',)
+    else:
+        scored = _join_predictions(data, _read_predictions(spec['path'], spec['score_column']))
+        score_column = '__score__'
+        lower_is_better = ('__score__',) if spec['lower_is_better'] else ()
+    
+    metrics = evaluate_predictors(scored, [score_column], lower_is_better=lower_is_better).iloc[0]
+    return {
+        'dataset': dataset_name,
+        'predictor': predictor,
+        'n': len(data),
+        'n_scored': int(metrics['n']),
+        'coverage': float(metrics['n']) / len(data) if len(data) else np.nan,
+        'n_positive': int(metrics['n_positive']),
+        'AUROC': float(metrics['AUROC']),
+        'AUPRC': float(metrics['AUPRC']),
+    }
+
+def _read_cell(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def run_leaderboard(
+    predictions: Dict[str, Union[str, Path, Dict[str, Any]]],
+    datasets: Optional[Sequence[str]] = None,
+    baselines: Sequence[str] = ('ABC Score', 'distance'),
+    cache_root: Optional[Union[str, Path]] = None,
+    data_paths: Optional[Dict[str, Union[str, Path]]] = None,
+    num_workers: Optional[int] = None,
+    force: bool = False
+) -> pd.DataFrame:
+    """
+    Evaluate every predictor on every enhancer dataset
+    
+    Prediction files are left-joined to each processed dataset on chr, start,
+    end and gene_name; pairs without a prediction count against coverage and
+    are left out of the metrics. Every dataset x predictor cell is cached
+    under cache_root/leaderboard by the content hash of the dataset source,
+    its parsing config and the prediction file, so after updating one
+    predictor only its cells are recomputed. Missing cells are evaluated in
+    a process pool.
+    
+    Args:
+        predictions: Mapping from predictor name to a prediction file (.tsv, .csv
+            or .parquet with a 'score' column) or to a dict with keys path,
+            score_column and lower_is_better
+        datasets: Enhancer datasets to evaluate, defaults to all in DATASET_CONFIG
+        baselines: Columns of the processed datasets evaluated as predictors
+        cache_root: Cache root directory, defaults to .cache/genomics_benchmark in user's home directory
+        data_paths: Optional local source file per dataset instead of downloading it
+        num_workers: Number of worker processes, defaults to the CPU count
+        force: Whether to recompute cached cells
+        
+    Returns:
+        DataFrame with columns dataset, predictor, n, n_scored, coverage,
+        n_positive, AUROC, AUPRC and cached (whether the cell came from the cache)
+    """
+    datasets = list(datasets) if datasets is not None else enhancer_datasets()
+    cache_root = Path(cache_root) if cache_root is not None else Path(os.path.expanduser("~/.cache/genomics_benchmark"))
+    data_paths = data_paths or {}
+    result_dir = cache_root / "leaderboard"
+    result_dir.mkdir(parents=True, exist_ok=True)
+    specs = {name: _predictor_spec(name, spec) for name, spec in predictions.items()}
+    for name, spec in specs.items():
+        spec['sha256'] = CacheStore.hash_file(spec['path'])
+    
+    # Resolve dataset sources in the parent so workers never download
+    cells = []
+    for dataset_name in datasets:
+        processor = EnhancerProcessor(dataset_name, cache_root=cache_root)
+        if dataset_name in data_paths:
+            data_path = Path(data_paths[dataset_name])
+        else:
+            data_path = processor.download()
+        dataset_key = table_cache_key(data_path, {
+            'parse': processor.parse_config(),
+            'distance_threshold': processor.config.get('distance_threshold'),
+        })
+        for baseline in baselines:
+            cells.append((dataset_name, str(data_path), baseline, None, _cell_key(dataset_key, {'baseline': baseline})))
+        for name, spec in specs.items():
+            cells.append((dataset_name, str(data_path), name, spec, _cell_key(dataset_key, spec)))
+    
+    rows = {}
+    pending = []
+    for index, (dataset_name, data_path, predictor, spec, key) in enumerate(cells):
+        cached = None if force else _read_cell(result_dir / f"{key}.json")
+        if cached is not None:
+            rows[index] = {**cached, 'dataset': dataset_name, 'predictor': predictor, 'cached': True}
+        else:
+            pending.append(index)
+    
+    print(f"Leaderboard: {len(cells)} cells, {len(pending)} to evaluate")
+    arguments = [
+        (cells[index][0], str(cache_root), cells[index][1], cells[index][2], cells[index][3])
+        for index in pending
+    ]
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if num_workers <= 1 or len(pending) <= 1:
+        results = [_evaluate_cell(*args) for args in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=min(num_workers, len(pending))) as executor:
+            results = list(executor.map(_evaluate_cell, *zip(*arguments)))
+    
+    for index, result in zip(pending, results):
+        with atomic_output(result_dir / f"{cells[index][4]}.json") as tmp_path:
+            with open(tmp_path, 'w') as f:
+                json.dump(result, f)
+        rows[index] = {**result, 'cached': False}
+    
+    return pd.DataFrame([rows[index] for index in range(len(cells))], columns=LEADERBOARD_COLUMNS)
@@ -0,0 +1,220 @@
+"""
+Bootstrap confidence intervals and paired predictor comparisons for AUROC/AUPRC
+"""
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional, Sequence, Tuple
+from .metrics import LOWER_IS_BETTER, batch_auroc_auprc, grouped_auroc_auprc, tie_group_bins
+
+# Target number of resample index matrix entries per batch, bounds memory to about 100 MB
+BATCH_ELEMENTS = 4000000
+
+METRICS = ('AUROC', 'AUPRC')
+
+def resample_group_counts(indices: np.ndarray, bins: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Count the drawn samples of every resample per tie group and label
+    
+    Args:
+        indices: Resample index matrix of shape (n_resamples, n)
+        bins: Bin of every sample from tie_group_bins
+        n_groups: Number of tie groups
+        
+    Returns:
+        Array of shape (n_resamples, n_groups, 2) for grouped_auroc_auprc
+    """
+    n_resamples = len(indices)
+    offsets = np.arange(n_resamples, dtype=np.int64)[:, None] * (2 * n_groups)
+    counts = np.bincount((bins[indices] + offsets).ravel(), minlength=n_resamples * 2 * n_groups)
+    return counts.reshape(n_resamples, n_groups, 2)
+
+_worker_data = None
+
+def _init_worker(labels: np.ndarray, scores: np.ndarray) -> None:
+    global _worker_data
+    # Tie groups depend only on the original sample, so they are computed once per worker
+    _worker_data = (len(labels), [tie_group_bins(labels, column) for column in scores])
+
+def _bootstrap_batch(seed: np.random.SeedSequence, n_resamples: int) -> np.ndarray:
+    """
+    Compute the metrics of one batch of resamples
+    
+    Returns:
+        Array of shape (n_columns, 2, n_resamples) with AUROC and AUPRC
+    """
+    n, column_bins = _worker_data
+    indices = np.random.default_rng(seed).integers(0, n, size=(n_resamples, n))
+    return np.stack([
+        np.stack(grouped_auroc_auprc(resample_group_counts(indices, bins, n_groups)))
+        for bins, n_groups in column_bins
+    ])
+
+def bootstrap_distribution(
+    labels: np.ndarray,
+    scores: np.ndarray,
+    n_resamples: int = 1000,
+    seed: int = 0,
+    num_workers: int = 1,
+    batch_size: Optional[int] = None
+) -> np.ndarray:
+    """
+    Compute AUROC and AUPRC of every score vector on shared bootstrap resamples
+    
+    Resamples are split into batches, each with its own child of
+    SeedSequence(seed), so results are identical for any num_workers. All
+    score vectors are evaluated on the same resamples, which makes their
+    differences paired.
+    
+    Args:
+        labels: Binary labels of shape (n,)
+        scores: Scores of shape (n_columns, n), without missing values
+        n_resamples: Number of bootstrap resamples
+        seed: Seed of the resampling
+        num_workers: Number of worker processes
+        batch_size: Resamples per batch, defaults to about BATCH_ELEMENTS / n
+        
+    Returns:
+        Array of shape (n_columns, 2, n_resamples) with AUROC and AUPRC of every resample
+    """
+    labels = np.asarray(labels, dtype=np.float64)
+    scores = np.atleast_2d(np.asarray(scores, dtype=np.float64))
+    if batch_size is None:
+        batch_size = max(1, BATCH_ELEMENTS // max(len(labels), 1))
+    sizes = [min(batch_size, n_resamples - start) for start in range(0, n_resamples, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    
+    if num_workers <= 1:
+        _init_worker(labels, scores)
+        batches = [_bootstrap_batch(batch_seed, size) for batch_seed, size in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=num_workers, initializer=_init_worker, initargs=(labels, scores)
+        ) as executor:
+            batches = list(executor.map(_bootstrap_batch, seeds, sizes))
+    return np.concatenate(batches, axis=-1) if batches else np.empty((len(scores), 2, 0))
+
+def _complete_rows(
+    df: pd.DataFrame,
+    score_columns: Sequence[str],
+    label_column: str,
+    lower_is_better: Iterable[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Labels and oriented scores of the rows without missing values in any column"""
+    missing = [col for col in list(score_columns) + [label_column] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Columns not found in data: {missing}")
+    data = df[list(dict.fromkeys(list(score_columns) + [label_column]))].dropna()
+    labels = data[label_column].to_numpy(dtype=np.float64)
+    if not np.isin(labels, (0, 1)).all():
+        raise ValueError(f"Labels must be binary: {label_column}")
+    
+    lower_is_better = set(lower_is_better)
+    scores = np.stack([
+        -data[col].to_numpy(dtype=np.float64) if col in lower_is_better else data[col].to_numpy(dtype=np.float64)
+        for col in score_columns
+    ])
+    return labels, scores
+
+def bootstrap_metrics(
+    df: pd.DataFrame,
+    score_columns: Sequence[str],
+    label_column: str = 'labels',
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+    num_workers: int = 1,
+    lower_is_better: Iterable[str] = LOWER_IS_BETTER
+) -> pd.DataFrame:
+    """
+    Bootstrap percentile confidence intervals of AUROC and AUPRC
+    
+    Rows with a missing value in any of the score columns or the label are
+    dropped, so all predictors are evaluated on the same rows and resamples.
+    
+    Args:
+        df: DataFrame with the label and score columns
+        score_columns: Predictor columns to evaluate
+        label_column: Binary label column
+        n_resamples: Number of bootstrap resamples
+        confidence: Confidence level of the intervals
+        seed: Seed of the resampling
+        num_workers: Number of worker processes
+        lower_is_better: Columns where lower values predict positives, e.g. 'distance'
+        
+    Returns:
+        DataFrame with columns score_column, metric, estimate, ci_lower,
+        ci_upper and std, one row per score column and metric
+    """
+    labels, scores = _complete_rows(df, score_columns, label_column, lower_is_better)
+    estimates = np.stack(batch_auroc_auprc(np.broadcast_to(labels, scores.shape), scores), axis=1)
+    distribution = bootstrap_distribution(labels, scores, n_resamples, seed, num_workers)
+    alpha = (1 - confidence) / 2
+    
+    rows = []
+    for i, column in enumerate(score_columns):
+        for j, metric in enumerate(METRICS):
+            values = distribution[i, j]
+            rows.append({
+                'score_column': column,
+                'metric': metric,
+                'estimate': float(estimates[i, j]),
+                'ci_lower': float(np.nanquantile(values, alpha)),
+                'ci_upper': float(np.nanquantile(values, 1 - alpha)),
+                'std': float(np.nanstd(values)),
+            })
+    return pd.DataFrame(rows)
+
+def compare_predictors(
+    df: pd.DataFrame,
+    score_a: str,
+    score_b: str,
+    label_column: str = 'labels',
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+    num_workers: int = 1,
+    lower_is_better: Iterable[str] = LOWER_IS_BETTER
+) -> pd.DataFrame:
+    """
+    Paired bootstrap comparison of two predictors
+    
+    Both predictors are evaluated on the same resamples. The two-sided
+    p-value is twice the fraction of resamples on the less frequent side of
+    zero difference, capped at 1.
+    
+    Args:
+        df: DataFrame with the label and score columns
+        score_a: First predictor column
+        score_b: Second predictor column
+        label_column: Binary label column
+        n_resamples: Number of bootstrap resamples
+        confidence: Confidence level of the interval of the difference
+        seed: Seed of the resampling
+        num_workers: Number of worker processes
+        lower_is_better: Columns where lower values predict positives, e.g. 'distance'
+        
+    Returns:
+        DataFrame with columns metric, estimate_a, estimate_b, difference
+        (a - b), ci_lower, ci_upper and p_value, one row per metric
+    """
+    labels, scores = _complete_rows(df, [score_a, score_b], label_column, lower_is_better)
+    estimates = np.stack(batch_auroc_auprc(np.broadcast_to(labels, scores.shape), scores), axis=1)
+    distribution = bootstrap_distribution(labels, scores, n_resamples, seed, num_workers)
+    alpha = (1 - confidence) / 2
+    
+    rows = []
+    for j, metric in enumerate(METRICS):
+        differences = distribution[0, j] - distribution[1, j]
+        differences = differences[~np.isnan(differences)]
+        p_value = 2 * min(np.mean(differences <= 0), np.mean(differences >= 0)) if len(differences) else np.nan
+        rows.append({
+            'metric': metric,
+            'estimate_a': float(estimates[0, j]),
+            'estimate_b': float(estimates[1, j]),
+            'difference': float(estimates[0, j] - estimates[1, j]),
+            'ci_lower': float(np.quantile(differences, alpha)) if len(differences) else np.nan,
+            'ci_upper': float(np.quantile(differences, 1 - alpha)) if len(differences) else np.nan,
+            'p_value': float(min(1.0, p_value)),
+        })
+    return pd.DataFrame(rows)
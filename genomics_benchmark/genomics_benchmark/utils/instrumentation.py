@@ -0,0 +1,195 @@
+"""
+Per-stage instrumentation: wall time, CPU time, memory, rows and bytes of pipeline stages
+"""
+import sys
+import json
+import time
+import threading
+import tracemalloc
+import contextlib
+import contextvars
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Iterable, Iterator, Union, TextIO
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# A hook receives the event name ('stage_start' or 'stage_end') and the stage record
+StageHook = Callable[[str, Dict[str, Any]], None]
+
+# Hooks called by every recorder, e.g. to forward stages to a telemetry system
+_global_hooks: List[StageHook] = []
+
+# Recorder of the innermost running stage of the current thread or task
+_active = contextvars.ContextVar('active_stage', default=None)
+
+def register_hook(hook: StageHook) -> None:
+    """Call hook for the events of all recorders"""
+    _global_hooks.append(hook)
+
+def unregister_hook(hook: StageHook) -> None:
+    """Remove a hook added by register_hook"""
+    if hook in _global_hooks:
+        _global_hooks.remove(hook)
+
+def max_rss_bytes() -> Optional[int]:
+    """Peak resident set size of the process, None where it is not available"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+
+def json_event_hook(output: Union[str, Path, TextIO]) -> StageHook:
+    """
+    Create a hook writing every event as one line of JSON
+    
+    Args:
+        output: Path of a file to append to, or an open text stream
+        
+    Returns:
+        Hook for StageRecorder or register_hook
+    """
+    lock = threading.Lock()
+    
+    def hook(event: str, record: Dict[str, Any]) -> None:
+        line = json.dumps({'event': event, 'time': time.time(), **record}, default=str)
+        with lock:
+            if isinstance(output, (str, Path)):
+                with open(output, 'a') as f:
+                    f.write(line + '\n')
+            else:
+                output.write(line + '\n')
+                output.flush()
+    return hook
+
+class StageRecorder:
+    """Records wall time, CPU time, memory, rows and bytes of named stages"""
+    
+    def __init__(
+        self,
+        hooks: Optional[Iterable[StageHook]] = None,
+        events_path: Optional[Union[str, Path]] = None,
+        trace_memory: bool = False
+    ):
+        """
+        Initialize stage recorder
+        
+        Args:
+            hooks: Callables receiving the event name and the stage record at the
+                start and end of every stage
+            events_path: Optional file that every event is appended to as a line of JSON
+            trace_memory: Whether to measure the peak Python and numpy memory of each
+                stage with tracemalloc. This slows allocation-heavy code down noticeably
+        """
+        self.hooks = list(hooks or [])
+        if events_path is not None:
+            self.hooks.append(json_event_hook(events_path))
+        self.trace_memory = trace_memory
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+    
+    def _emit(self, event: str, record: Dict[str, Any]) -> None:
+        for hook in self.hooks + _global_hooks:
+            try:
+                hook(event, dict(record))
+            except Exception as e:
+                print(f"Warning: stage hook failed: {e}")
+    
+    @contextlib.contextmanager
+    def stage(self, name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Record a stage
+        
+        The yielded record can be updated inside the block, e.g. with rows_out
+        or bytes_written. Stages started inside the block, including those of
+        the download and decompression helpers, are recorded as its children.
+        Peak traced memory is only measured by the outermost traced stage,
+        since tracemalloc has a single global peak.
+        
+        Args:
+            name: Stage name, e.g. '2. process'
+            **fields: Initial fields of the record, e.g. rows_in or bytes_read
+            
+        Yields:
+            Stage record with stage, parent, wall_seconds, cpu_seconds,
+            peak_traced_bytes, max_rss_bytes, rss_growth_bytes, rows_in,
+            rows_out, bytes_read, bytes_written, status and any extra fields
+        """
+        parent = _active.get()
+        record = {
+            'stage': name,
+            'parent': parent[1]['stage'] if parent is not None else None,
+            'rows_in': None,
+            'rows_out': None,
+            'bytes_read': None,
+            'bytes_written': None,
+        }
+        record.update(fields)
+        self._emit('stage_start', record)
+        
+        owns_trace = self.trace_memory and not tracemalloc.is_tracing()
+        if owns_trace:
+            tracemalloc.start()
+        rss_start = max_rss_bytes()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        token = _active.set((self, record))
+        try:
+            yield record
+            record['status'] = 'success'
+        except BaseException as e:
+            record['status'] = 'error'
+            record['error_message'] = str(e)
+            raise
+        finally:
+            _active.reset(token)
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.process_time() - cpu_start
+            record['peak_traced_bytes'] = None
+            if owns_trace:
+                record['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            record['max_rss_bytes'] = max_rss_bytes()
+            record['rss_growth_bytes'] = (
+                record['max_rss_bytes'] - rss_start if rss_start is not None else None
+            )
+            with self._lock:
+                self.records.append(record)
+            self._emit('stage_end', record)
+    
+    def summary(self) -> List[Dict[str, Any]]:
+        """Copies of all records, in the order the stages finished"""
+        with self._lock:
+            return [dict(record) for record in self.records]
+
+@contextlib.contextmanager
+def record_stage(name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Record a stage with the recorder of the enclosing stage, if any
+    
+    Lets helpers such as downloads report their stages without taking a
+    recorder argument; outside of a recorded stage only a plain record is
+    yielded and nothing is measured.
+    
+    Args:
+        name: Stage name
+        **fields: Initial fields of the record
+        
+    Yields:
+        Stage record that can be updated inside the block
+    """
+    active = _active.get()
+    if active is None:
+        yield dict(fields, stage=name)
+    else:
+        with active[0].stage(name, **fields) as record:
+            yield record
+
+def file_size(path: Union[str, Path, None]) -> Optional[int]:
+    """Size of a file in bytes, None if it does not exist"""
+    try:
+        return Path(path).stat().st_size if path is not None else None
+    except OSError:
+        return None
@@ -0,0 +1,137 @@
+"""
+Cross-process file locks and atomic file publishing
+"""
+import os
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Union, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+class FileLock:
+    """Advisory lock on a lock file, shared between threads and processes"""
+    
+    def __init__(
+        self,
+        path: Union[str, Path],
+        timeout: Optional[float] = None,
+        poll_interval: float = 0.1
+    ):
+        """
+        Initialize file lock
+        
+        The lock is reentrant within one FileLock instance. Different instances
+        and processes locking the same path exclude each other.
+        
+        Args:
+            path: Path of the lock file, created if missing
+            timeout: Maximum number of seconds to wait for the lock, wait forever if None
+            poll_interval: Seconds between attempts while waiting with a timeout
+        """
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+    
+    def _try_lock(self, blocking: bool) -> bool:
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                fcntl.flock(self._fd, flags)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if blocking:
+                raise
+            return False
+    
+    def acquire(self) -> None:
+        """
+        Acquire the lock, waiting until it is released by other holders
+        
+        Raises:
+            TimeoutError: If the lock could not be acquired within the timeout
+        """
+        if not self._thread_lock.acquire(timeout=-1 if self.timeout is None else self.timeout):
+            raise TimeoutError(f"Timed out waiting for lock: {self.path}")
+        if self._depth > 0:
+            self._depth += 1
+            return
+        
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+            if self.timeout is None:
+                self._try_lock(blocking=True)
+            else:
+                deadline = time.monotonic() + self.timeout
+                while not self._try_lock(blocking=False):
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"Timed out waiting for lock: {self.path}")
+                    time.sleep(self.poll_interval)
+        except BaseException:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._thread_lock.release()
+            raise
+        self._depth = 1
+    
+    def release(self) -> None:
+        """Release the lock"""
+        if self._depth == 0:
+            raise RuntimeError(f"Lock is not held: {self.path}")
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.release()
+
+@contextmanager
+def atomic_output(path: Union[str, Path]) -> Iterator[Path]:
+    """
+    Write a file under a temporary name and atomically rename it into place
+    
+    The temporary file lives in the same directory as the target, so the final
+    rename never crosses file systems. Readers therefore either see the old
+    file or the complete new one, never a half-written file. The temporary
+    file is removed if the block raises.
+    
+    Args:
+        path: Final path of the file
+        
+    Yields:
+        Temporary path to write to
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
@@ -0,0 +1,343 @@
+"""
+Vectorized ranking metrics (AUROC, AUPRC, ROC and PR curves) for many predictors
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Predictors for which lower values indicate regulation
+LOWER_IS_BETTER = ('distance',)
+
+def _tie_groups(sorted_scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First and last position of the tie group of every element
+    
+    Args:
+        sorted_scores: Array of shape (..., n) sorted along the last axis
+        
+    Returns:
+        Tuple of (start, end) index arrays with the shape of sorted_scores
+    """
+    n = sorted_scores.shape[-1]
+    positions = np.broadcast_to(np.arange(n), sorted_scores.shape)
+    is_last = np.ones(sorted_scores.shape, dtype=bool)
+    is_last[..., :-1] = sorted_scores[..., :-1] != sorted_scores[..., 1:]
+    is_first = np.ones(sorted_scores.shape, dtype=bool)
+    is_first[..., 1:] = is_last[..., :-1]
+    
+    start = np.maximum.accumulate(np.where(is_first, positions, 0), axis=-1)
+    end = np.minimum.accumulate(np.where(is_last, positions, n - 1)[..., ::-1], axis=-1)[..., ::-1]
+    return start, end
+
+def batch_auroc_auprc(labels: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute AUROC and AUPRC for a batch of label/score vectors
+    
+    Each row is sorted once by decreasing score. Tied scores form one
+    threshold, so AUROC counts tied positive-negative pairs as one half and
+    AUPRC uses the precision of the whole tie group, matching
+    sklearn.metrics.roc_auc_score and average_precision_score.
+    
+    Args:
+        labels: Binary labels of shape (n,) or (batch, n)
+        scores: Scores with the same shape as labels, without missing values
+        
+    Returns:
+        Tuple of (auroc, auprc) arrays of shape (batch,), or scalars for 1-D
+        input. NaN where a row has only one class
+    """
+    labels = np.asarray(labels)
+    scores = np.asarray(scores)
+    if labels.shape != scores.shape:
+        raise ValueError(f"labels and scores have different shapes: {labels.shape} and {scores.shape}")
+    single = labels.ndim == 1
+    labels, scores = np.atleast_2d(labels), np.atleast_2d(scores)
+    if labels.shape[-1] == 0:
+        nan = np.full(labels.shape[0], np.nan)
+        return (nan[0], nan[0]) if single else (nan, nan)
+    
+    order = np.argsort(-scores, axis=-1, kind='stable')
+    sorted_scores = np.take_along_axis(scores, order, axis=-1)
+    y = np.take_along_axis(labels, order, axis=-1).astype(np.float64)
+    start, end = _tie_groups(sorted_scores)
+    
+    tps = np.cumsum(y, axis=-1)
+    fps = np.cumsum(1 - y, axis=-1)
+    positives = tps[:, -1]
+    negatives = fps[:, -1]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Negatives ranked above each element, ties counted as one half
+        fps_before_group = np.take_along_axis(fps - (1 - y), start, axis=-1)
+        fps_in_group = np.take_along_axis(fps, end, axis=-1) - fps_before_group
+        negatives_below = negatives[:, None] - fps_before_group - 0.5 * fps_in_group
+        auroc = (y * negatives_below).sum(axis=-1) / (positives * negatives)
+        
+        # Every positive contributes the precision at the end of its tie group
+        precision = np.take_along_axis(tps, end, axis=-1) / (end + 1)
+        auprc = (y * precision).sum(axis=-1) / positives
+    
+    auroc = np.where((positives > 0) & (negatives > 0), auroc, np.nan)
+    auprc = np.where((positives > 0) & (negatives > 0), auprc, np.nan)
+    if single:
+        return auroc[0], auprc[0]
+    return auroc, auprc
+
+def segmented_auroc_auprc(
+    segments: np.ndarray,
+    labels: np.ndarray,
+    scores: np.ndarray,
+    n_segments: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute AUROC and AUPRC of every segment of a sample in one pass
+    
+    Samples are sorted once by segment and decreasing score. Counts are
+    cumulated over the whole array and offset per segment, and tie groups
+    never cross a segment boundary.
+    
+    Args:
+        segments: Segment code of every sample, in range(n_segments)
+        labels: Binary labels of shape (n,)
+        scores: Scores of shape (n,), without missing values
+        n_segments: Number of segments
+        
+    Returns:
+        Tuple of (auroc, auprc) arrays of shape (n_segments,), NaN for
+        segments with only one class or no samples
+    """
+    segments = np.asarray(segments, dtype=np.int64)
+    order = np.lexsort((-np.asarray(scores, dtype=np.float64), segments))
+    c = segments[order]
+    s = np.asarray(scores)[order]
+    y = np.asarray(labels, dtype=np.float64)[order]
+    n = len(y)
+    if n == 0:
+        nan = np.full(n_segments, np.nan)
+        return nan, nan.copy()
+    
+    positions = np.arange(n)
+    is_last = np.ones(n, dtype=bool)
+    is_last[:-1] = (s[:-1] != s[1:]) | (c[:-1] != c[1:])
+    is_first = np.ones(n, dtype=bool)
+    is_first[1:] = is_last[:-1]
+    start = np.maximum.accumulate(np.where(is_first, positions, 0))
+    end = np.minimum.accumulate(np.where(is_last, positions, n - 1)[::-1])[::-1]
+    
+    # Cumulative counts restarted at every segment
+    segment_first = np.ones(n, dtype=bool)
+    segment_first[1:] = c[1:] != c[:-1]
+    segment_start = np.maximum.accumulate(np.where(segment_first, positions, 0))
+    tps_global = np.cumsum(y)
+    fps_global = np.cumsum(1 - y)
+    tps = tps_global - (tps_global - y)[segment_start]
+    fps = fps_global - (fps_global - (1 - y))[segment_start]
+    
+    positives = np.bincount(c, weights=y, minlength=n_segments)
+    negatives = np.bincount(c, weights=1 - y, minlength=n_segments)
+    
+    fps_before_group = (fps - (1 - y))[start]
+    fps_in_group = fps[end] - fps_before_group
+    negatives_below = negatives[c] - fps_before_group - 0.5 * fps_in_group
+    precision = tps[end] / (end - segment_start + 1)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        auroc = np.bincount(c, weights=y * negatives_below, minlength=n_segments) / (positives * negatives)
+        auprc = np.bincount(c, weights=y * precision, minlength=n_segments) / positives
+    
+    valid = (positives > 0) & (negatives > 0)
+    return np.where(valid, auroc, np.nan), np.where(valid, auprc, np.nan)
+
+def tie_group_bins(labels: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Assign every sample to a bin by tie group and label
+    
+    Tie groups are numbered by decreasing score, so counting samples per bin
+    (e.g. with np.bincount over bootstrap resample indices) gives the input of
+    grouped_auroc_auprc without sorting again. Runs of consecutive tie groups
+    without positives are merged into one group; this changes neither metric
+    but shrinks the counts to about twice the number of positives.
+    
+    Args:
+        labels: Binary labels of shape (n,)
+        scores: Scores of shape (n,), without missing values
+        
+    Returns:
+        Tuple of (bins, n_groups). The bin of a sample is 2 * group + label
+    """
+    labels = np.asarray(labels).astype(np.int64)
+    unique, groups = np.unique(-np.asarray(scores, dtype=np.float64), return_inverse=True)
+    groups = groups.reshape(-1)
+    
+    has_positive = np.bincount(groups, weights=labels, minlength=len(unique)) > 0
+    starts_group = has_positive.copy()
+    starts_group[0] = True
+    starts_group[1:] |= has_positive[:-1]
+    merged = np.cumsum(starts_group) - 1
+    return merged[groups] * 2 + labels, int(merged[-1]) + 1 if len(unique) else 0
+
+def grouped_auroc_auprc(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute AUROC and AUPRC from per-tie-group label counts
+    
+    Args:
+        counts: Array of shape (batch, n_groups, 2) with the (negative, positive)
+            counts or weights of every tie group, groups in decreasing score order
+            
+    Returns:
+        Tuple of (auroc, auprc) arrays of shape (batch,), NaN where a row has only one class
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    negative_counts, positive_counts = counts[..., 0], counts[..., 1]
+    tps = np.cumsum(positive_counts, axis=-1)
+    fps = np.cumsum(negative_counts, axis=-1)
+    positives = tps[:, -1]
+    negatives = fps[:, -1]
+    total = tps + fps
+    precision = np.divide(tps, total, out=np.zeros_like(tps), where=total > 0)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Negatives ranked below each group plus half of the tied ones
+        negatives_below = negatives[:, None] - fps + 0.5 * negative_counts
+        auroc = (positive_counts * negatives_below).sum(axis=-1) / (positives * negatives)
+        auprc = (positive_counts * precision).sum(axis=-1) / positives
+    
+    valid = (positives > 0) & (negatives > 0)
+    return np.where(valid, auroc, np.nan), np.where(valid, auprc, np.nan)
+
+def binary_curves(labels: np.ndarray, scores: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Compute ROC and precision-recall curves from a single sort
+    
+    Points are placed at every distinct score, in decreasing threshold order,
+    without dropping collinear points. The ROC curve starts at (0, 0) with an
+    infinite threshold as in sklearn.metrics.roc_curve, the precision-recall
+    curve at recall 0 and precision 1.
+    
+    Args:
+        labels: Binary labels of shape (n,)
+        scores: Scores of shape (n,), without missing values
+        
+    Returns:
+        Dictionary with thresholds, fpr, tpr, precision and recall arrays
+    """
+    labels = np.asarray(labels, dtype=np.float64)
+    scores = np.asarray(scores)
+    order = np.argsort(-scores, kind='stable')
+    sorted_scores = scores[order]
+    y = labels[order]
+    
+    if not len(y):
+        raise ValueError("No samples to compute curves from")
+    
+    # Index of the last element of every tie group
+    group_ends = np.flatnonzero(np.r_[sorted_scores[:-1] != sorted_scores[1:], True])
+    tps = np.cumsum(y)[group_ends]
+    fps = (group_ends + 1) - tps
+    positives, negatives = tps[-1], fps[-1]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'thresholds': np.r_[np.inf, sorted_scores[group_ends]],
+            'fpr': np.r_[0.0, fps / negatives],
+            'tpr': np.r_[0.0, tps / positives],
+            'precision': np.r_[1.0, tps / (group_ends + 1)],
+            'recall': np.r_[0.0, tps / positives],
+        }
+
+def _score_matrix(
+    df: pd.DataFrame,
+    score_columns: Sequence[str],
+    label_column: str,
+    lower_is_better: Iterable[str]
+) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """Validate labels once and get the label array and oriented score arrays"""
+    missing = [col for col in list(score_columns) + [label_column] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Columns not found in data: {missing}")
+    
+    labels = df[label_column].to_numpy()
+    valid_labels = ~pd.isna(labels)
+    labels = np.where(valid_labels, labels, 0).astype(np.float64)
+    if not np.isin(labels, (0, 1)).all():
+        raise ValueError(f"Labels must be binary: {label_column}")
+    
+    lower_is_better = set(lower_is_better)
+    scores = []
+    for column in score_columns:
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        scores.append(-values if column in lower_is_better else values)
+    return np.where(valid_labels, labels, np.nan), scores
+
+def evaluate_predictors(
+    df: pd.DataFrame,
+    score_columns: Sequence[str],
+    label_column: str = 'labels',
+    lower_is_better: Iterable[str] = LOWER_IS_BETTER
+) -> pd.DataFrame:
+    """
+    Compute AUROC and AUPRC for many score columns at once
+    
+    Labels are validated and extracted once. Rows with a missing score or
+    label are dropped per column, as in EnhancerProcessor.calculate_metrics.
+    
+    Args:
+        df: DataFrame with the label and score columns
+        score_columns: Predictor columns to evaluate
+        label_column: Binary label column
+        lower_is_better: Columns where lower values predict positives, e.g. 'distance'.
+            Their scores are negated
+            
+    Returns:
+        DataFrame with one row per score column and columns score_column, n,
+        n_positive, AUROC and AUPRC
+    """
+    labels, scores = _score_matrix(df, score_columns, label_column, lower_is_better)
+    rows = []
+    for column, values in zip(score_columns, scores):
+        valid = ~(np.isnan(values) | np.isnan(labels))
+        auroc, auprc = batch_auroc_auprc(labels[valid], values[valid])
+        rows.append({
+            'score_column': column,
+            'n': int(valid.sum()),
+            'n_positive': int(labels[valid].sum()),
+            'AUROC': float(auroc),
+            'AUPRC': float(auprc),
+        })
+    return pd.DataFrame(rows, columns=['score_column', 'n', 'n_positive', 'AUROC', 'AUPRC'])
+
+def predictor_curves(
+    df: pd.DataFrame,
+    score_columns: Sequence[str],
+    label_column: str = 'labels',
+    lower_is_better: Iterable[str] = LOWER_IS_BETTER
+) -> pd.DataFrame:
+    """
+    Compute ROC and precision-recall curves for many score columns
+    
+    Args:
+        df: DataFrame with the label and score columns
+        score_columns: Predictor columns to evaluate
+        label_column: Binary label column
+        lower_is_better: Columns where lower values predict positives, their scores
+            (and thresholds) are negated
+            
+    Returns:
+        Long DataFrame with columns score_column, threshold, fpr, tpr,
+        precision and recall, one row per curve point
+    """
+    labels, scores = _score_matrix(df, score_columns, label_column, lower_is_better)
+    frames = []
+    for column, values in zip(score_columns, scores):
+        valid = ~(np.isnan(values) | np.isnan(labels))
+        curves = binary_curves(labels[valid], values[valid])
+        frame = pd.DataFrame({
+            'score_column': column,
+            'threshold': curves['thresholds'],
+            'fpr': curves['fpr'],
+            'tpr': curves['tpr'],
+            'precision': curves['precision'],
+            'recall': curves['recall'],
+        })
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,110 @@
+"""
+Stratified benchmark metrics by distance bin, chromosome, gene or any other column
+"""
+import numpy as np
+import pandas as pd
+from typing import Iterable, Sequence
+from .metrics import LOWER_IS_BETTER, segmented_auroc_auprc
+
+# Enhancer-TSS distance bin edges in bp, bins are closed on the left
+DEFAULT_DISTANCE_BINS = (0, 10000, 100000, 1000000, np.inf)
+
+STRATIFIED_COLUMNS = [
+    'stratum', 'value', 'score_column', 'n', 'n_positive', 'n_negative', 'positive_rate', 'AUROC', 'AUPRC'
+]
+
+def distance_bins(distance: pd.Series, bins: Sequence[float] = DEFAULT_DISTANCE_BINS) -> pd.Series:
+    """
+    Assign distances to bins
+    
+    Args:
+        distance: Enhancer-TSS distances in bp
+        bins: Increasing bin edges, bins are closed on the left
+        
+    Returns:
+        Categorical series with labels such as '[10000, 100000)'
+    """
+    edges = list(bins)
+    labels = [
+        f"[{edges[i]:.0f}, {edges[i + 1]:.0f})" if np.isfinite(edges[i + 1]) else f">={edges[i]:.0f}"
+        for i in range(len(edges) - 1)
+    ]
+    return pd.cut(distance, bins=edges, right=False, labels=labels)
+
+def stratified_metrics(
+    df: pd.DataFrame,
+    score_columns: Sequence[str] = ('ABC Score',),
+    strata: Sequence[str] = ('distance_bin', 'chr', 'gene_name'),
+    label_column: str = 'labels',
+    bins: Sequence[float] = DEFAULT_DISTANCE_BINS,
+    lower_is_better: Iterable[str] = LOWER_IS_BETTER,
+    min_samples: int = 1
+) -> pd.DataFrame:
+    """
+    Compute AUROC, AUPRC and label counts for every stratum in one grouped pass
+    
+    For each stratifying column and score column the rows are sorted once by
+    stratum and score, and all strata are evaluated together by
+    segmented_auroc_auprc instead of slicing the DataFrame per stratum.
+    
+    Args:
+        df: DataFrame, e.g. the output of EnhancerProcessor.load
+        score_columns: Predictor columns to evaluate
+        strata: Columns to stratify by. 'distance_bin' bins the 'distance'
+            column by bins unless the DataFrame has such a column
+        label_column: Binary label column
+        bins: Distance bin edges for 'distance_bin'
+        lower_is_better: Columns where lower values predict positives, e.g. 'distance'
+        min_samples: Strata with fewer rows are left out
+        
+    Returns:
+        DataFrame with columns stratum, value, score_column, n, n_positive,
+        n_negative, positive_rate, AUROC and AUPRC. AUROC and AUPRC are NaN
+        for strata with only one class
+    """
+    missing = [col for col in list(score_columns) + [label_column] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Columns not found in data: {missing}")
+    labels = df[label_column]
+    lower_is_better = set(lower_is_better)
+    
+    frames = []
+    for stratum in strata:
+        if stratum in df.columns:
+            values = df[stratum]
+        elif stratum == 'distance_bin' and 'distance' in df.columns:
+            values = distance_bins(df['distance'], bins)
+        else:
+            raise ValueError(f"Column not found in data: {stratum}")
+        codes, uniques = pd.factorize(values, sort=True)
+        
+        for column in score_columns:
+            scores = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            if column in lower_is_better:
+                scores = -scores
+            valid = (codes >= 0) & ~np.isnan(scores) & labels.notna().to_numpy()
+            y = labels.to_numpy()[valid].astype(np.float64)
+            segment_codes = codes[valid]
+            
+            auroc, auprc = segmented_auroc_auprc(segment_codes, y, scores[valid], len(uniques))
+            n = np.bincount(segment_codes, minlength=len(uniques))
+            n_positive = np.bincount(segment_codes, weights=y, minlength=len(uniques)).astype(np.int64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                positive_rate = n_positive / n
+            
+            frame = pd.DataFrame({
+                'stratum': stratum,
+                'value': np.asarray(uniques, dtype=object),
+                'score_column': column,
+                'n': n,
+                'n_positive': n_positive,
+                'n_negative': n - n_positive,
+                'positive_rate': positive_rate,
+                'AUROC': auroc,
+                'AUPRC': auprc,
+            })
+            frames.append(frame[frame['n'] >= max(min_samples, 1)])
+    
+    if not frames:
+        return pd.DataFrame(columns=STRATIFIED_COLUMNS)
+    return pd.concat(frames, ignore_index=True)[STRATIFIED_COLUMNS]
@@ -0,0 +1,272 @@
+"""
+Synthetic enhancer tables, GTF annotations and FASTA genomes for offline tests and benchmarks
+"""
+import gzip
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Union, Optional
+from .locking import atomic_output
+
+# Chromosome sizes of the synthetic genome in bp
+SYNTHETIC_CHROM_SIZES = {'chr1': 60000000, 'chr2': 50000000, 'chr3': 40000000, 'chrX': 30000000}
+
+# Columns of Merged.tsv, in file order
+MERGED_COLUMNS = [
+    'dataset', 'chrom', 'chromStart', 'chromEnd', 'name', 'EffectSize', 'chrTSS', 'startTSS', 'endTSS',
+    'measuredGeneSymbol', 'Significant', 'pValueAdjusted', 'PowerAtEffectSize25', 'ValidConnection',
+    'CellType', 'Reference', 'Regulated', 'PowerAtEffectSize10', 'PowerAtEffectSize15',
+    'PowerAtEffectSize20', 'PowerAtEffectSize50', 'numTSSEnhGene', 'distanceToTSS',
+    'normalizedDNase_enh', 'normalizedDNase_prom', 'numNearbyEnhancers', 'sumNearbyEnhancers',
+    'ubiquitousExpressedGene', 'numCandidateEnhGene', '3DContactAvgHicTrack2',
+    '3DContactAvgHicTrack2_squared', 'activityEnhDNaseOnlyAvgHicTrack2_squared',
+    'activityPromDNaseOnlyAvgHicTrack2', 'ABCScoreDNaseOnlyAvgHicTrack2'
+]
+
+ENHANCER_WIDTH = 500
+
+def _open_output(tmp_path: Path, path: Path):
+    """Open the temporary file of path for binary writing, gzip compressed if path ends with .gz"""
+    return gzip.open(tmp_path, 'wb', compresslevel=1) if path.suffix == '.gz' else open(tmp_path, 'wb')
+
+def _write_delimited(df: pd.DataFrame, f, sep: str, header: bool) -> None:
+    """Write a DataFrame as delimited text, with the much faster pyarrow writer if available"""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        options = pa_csv.WriteOptions(include_header=False, delimiter=sep, quoting_style='none')
+    except (ImportError, TypeError):
+        df.to_csv(f, sep=sep, index=False, header=header)
+    else:
+        # The header is written separately because pyarrow quotes column names
+        if header:
+            f.write((sep.join(df.columns) + '\n').encode())
+        pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), f, options)
+
+def synthetic_genes(
+    n_genes: int,
+    chrom_sizes: Optional[Dict[str, int]] = None,
+    seed: int = 0
+) -> pd.DataFrame:
+    """
+    Generate random genes
+    
+    Args:
+        n_genes: Number of genes
+        chrom_sizes: Chromosome sizes, defaults to SYNTHETIC_CHROM_SIZES
+        seed: Random seed
+        
+    Returns:
+        DataFrame with columns gene_id, gene_name, chrom, start, end, strand,
+        tss and biotype. start and end are 1-based inclusive as in GTF, tss is
+        0-based as in the enhancer datasets
+    """
+    chrom_sizes = chrom_sizes or SYNTHETIC_CHROM_SIZES
+    rng = np.random.default_rng(seed)
+    names = np.array(list(chrom_sizes))
+    sizes = np.array([chrom_sizes[name] for name in names], dtype=np.int64)
+    chrom_index = rng.choice(len(names), size=n_genes, p=sizes / sizes.sum())
+    
+    length = rng.integers(1000, 100000, size=n_genes)
+    start = (rng.random(n_genes) * np.maximum(sizes[chrom_index] - length, 1)).astype(np.int64) + 1
+    end = start + length - 1
+    strand = np.where(rng.random(n_genes) < 0.5, '+', '-')
+    ids = np.arange(n_genes).astype(str)
+    return pd.DataFrame({
+        'gene_id': np.char.add('SYNG', np.char.zfill(ids, 11)),
+        'gene_name': np.char.add('GENE', ids),
+        'chrom': names[chrom_index],
+        'start': start,
+        'end': end,
+        'strand': strand,
+        'tss': np.where(strand == '-', end - 1, start - 1),
+        'biotype': np.where(rng.random(n_genes) < 0.7, 'protein_coding', 'lncRNA'),
+    })
+
+def synthetic_enhancer_table(n_rows: int, genes: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate enhancer-gene pairs in the Merged.tsv schema
+    
+    Enhancers are placed at log-uniform distances of up to 2 Mb from the TSS
+    of a random gene. Positives become rarer with distance and have higher
+    ABC scores, so the metrics are informative.
+    
+    Args:
+        n_rows: Number of enhancer-gene pairs
+        genes: Genes from synthetic_genes
+        seed: Random seed
+        
+    Returns:
+        DataFrame with the columns in MERGED_COLUMNS
+    """
+    rng = np.random.default_rng(seed)
+    gene_index = rng.integers(0, len(genes), size=n_rows)
+    chrom = genes['chrom'].to_numpy()[gene_index]
+    tss = genes['tss'].to_numpy()[gene_index]
+    gene_name = genes['gene_name'].to_numpy()[gene_index]
+    
+    distance = np.exp(rng.uniform(np.log(100), np.log(2000000), size=n_rows)).astype(np.int64)
+    center = np.maximum(tss + np.where(rng.random(n_rows) < 0.5, -distance, distance), ENHANCER_WIDTH)
+    start = center - ENHANCER_WIDTH // 2
+    end = start + ENHANCER_WIDTH
+    distance = np.abs((start + end) // 2 - tss)
+    
+    regulated = rng.random(n_rows) < 0.5 / (1 + distance / 20000)
+    contact = 1 / (1 + distance / 5000)
+    activity = rng.gamma(2.0, 20.0, size=n_rows)
+    abc = np.clip(activity * contact / 50 + regulated * rng.gamma(2.0, 0.05, size=n_rows), 0, None)
+    effect = np.where(regulated, rng.normal(-0.3, 0.1, size=n_rows), rng.normal(0, 0.05, size=n_rows))
+    names = (
+        pd.Series(gene_name).astype(str) + '|' + pd.Series(chrom).astype(str) + ':'
+        + pd.Series(start).astype(str) + '-' + pd.Series(end).astype(str) + ':*'
+    )
+    
+    return pd.DataFrame({
+        'dataset': 'Synthetic_K562',
+        'chrom': chrom,
+        'chromStart': start,
+        'chromEnd': end,
+        'name': names.to_numpy(),
+        'EffectSize': effect,
+        'chrTSS': chrom,
+        'startTSS': tss.astype(np.float64),
+        'endTSS': tss.astype(np.float64) + 1,
+        'measuredGeneSymbol': gene_name,
+        'Significant': regulated | (rng.random(n_rows) < 0.05),
+        'pValueAdjusted': np.where(regulated, rng.random(n_rows) * 0.05, rng.random(n_rows)),
+        'PowerAtEffectSize25': rng.random(n_rows),
+        'ValidConnection': True,
+        'CellType': 'K562',
+        'Reference': 'Synthetic',
+        'Regulated': regulated,
+        'PowerAtEffectSize10': rng.random(n_rows),
+        'PowerAtEffectSize15': rng.random(n_rows),
+        'PowerAtEffectSize20': rng.random(n_rows),
+        'PowerAtEffectSize50': rng.random(n_rows),
+        'numTSSEnhGene': rng.integers(0, 10, size=n_rows),
+        'distanceToTSS': distance,
+        'normalizedDNase_enh': activity,
+        'normalizedDNase_prom': rng.gamma(2.0, 0.5, size=n_rows),
+        'numNearbyEnhancers': rng.integers(0, 20, size=n_rows),
+        'sumNearbyEnhancers': rng.gamma(2.0, 5.0, size=n_rows),
+        'ubiquitousExpressedGene': rng.integers(0, 2, size=n_rows),
+        'numCandidateEnhGene': rng.integers(0, 200, size=n_rows),
+        '3DContactAvgHicTrack2': contact,
+        '3DContactAvgHicTrack2_squared': contact ** 2,
+        'activityEnhDNaseOnlyAvgHicTrack2_squared': activity ** 2,
+        'activityPromDNaseOnlyAvgHicTrack2': rng.gamma(2.0, 0.5, size=n_rows),
+        'ABCScoreDNaseOnlyAvgHicTrack2': abc,
+    })[MERGED_COLUMNS]
+
+def write_synthetic_enhancer_table(
+    path: Union[str, Path],
+    n_rows: int,
+    genes: pd.DataFrame,
+    seed: int = 0,
+    chunk_rows: int = 1000000
+) -> Path:
+    """
+    Write enhancer-gene pairs in the Merged.tsv schema, chunk by chunk
+    
+    Each chunk is generated from its own child of SeedSequence(seed), so
+    memory stays bounded for any n_rows.
+    
+    Args:
+        path: Output .tsv or .csv path, optionally with a .gz extension
+        n_rows: Number of enhancer-gene pairs
+        genes: Genes from synthetic_genes
+        seed: Random seed
+        chunk_rows: Rows generated per chunk
+        
+    Returns:
+        Path to the written file
+    """
+    path = Path(path)
+    sep = ',' if path.name.endswith(('.csv', '.csv.gz')) else '\t'
+    sizes = [min(chunk_rows, n_rows - start) for start in range(0, n_rows, chunk_rows)] or [0]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    with atomic_output(path) as tmp_path:
+        with _open_output(tmp_path, path) as f:
+            for i, (chunk_seed, size) in enumerate(zip(seeds, sizes)):
+                chunk = synthetic_enhancer_table(size, genes, seed=chunk_seed)
+                _write_delimited(chunk, f, sep, header=(i == 0))
+    return path
+
+def write_synthetic_gtf(path: Union[str, Path], genes: pd.DataFrame) -> Path:
+    """
+    Write genes as a GENCODE-style GTF with a gene and a transcript record per gene
+    
+    Args:
+        path: Output path, gzip compressed if it ends with .gz
+        genes: Genes from synthetic_genes
+        
+    Returns:
+        Path to the written file
+    """
+    path = Path(path)
+    start = genes['start'].astype(str)
+    end = genes['end'].astype(str)
+    attributes = (
+        'gene_id "' + genes['gene_id'] + '"; gene_type "' + genes['biotype']
+        + '"; gene_name "' + genes['gene_name'] + '";'
+    )
+    prefix = genes['chrom'] + '\tSYNTHETIC\t'
+    suffix = '\t' + start + '\t' + end + '\t.\t' + genes['strand'] + '\t.\t'
+    gene_lines = prefix + 'gene' + suffix + attributes
+    transcript_lines = prefix + 'transcript' + suffix + attributes + ' transcript_id "' + genes['gene_id'] + '.1";'
+    # Interleave so every gene record is followed by its transcript
+    lines = np.empty(2 * len(genes), dtype=object)
+    lines[0::2] = gene_lines.to_numpy()
+    lines[1::2] = transcript_lines.to_numpy()
+    
+    with atomic_output(path) as tmp_path:
+        with _open_output(tmp_path, path) as f:
+            f.write(b"##description: synthetic annotation\n")
+            if len(lines):
+                f.write(('\n'.join(lines) + '\n').encode())
+    return path
+
+def write_synthetic_fasta(
+    path: Union[str, Path],
+    chrom_sizes: Optional[Dict[str, int]] = None,
+    seed: int = 0,
+    line_width: int = 60,
+    chunk_bases: int = 1 << 22
+) -> Path:
+    """
+    Write a random genome as FASTA
+    
+    Sequences are uniform over ACGT with soft-masked and N-masked stretches,
+    and are generated chunk by chunk so memory stays bounded.
+    
+    Args:
+        path: Output path, gzip compressed if it ends with .gz
+        chrom_sizes: Chromosome sizes, defaults to SYNTHETIC_CHROM_SIZES
+        seed: Random seed
+        line_width: Bases per line
+        chunk_bases: Bases generated per chunk, rounded down to whole lines
+        
+    Returns:
+        Path to the written file
+    """
+    path = Path(path)
+    chrom_sizes = chrom_sizes or SYNTHETIC_CHROM_SIZES
+    alphabet = np.frombuffer(b'ACGTacgtN', dtype=np.uint8)
+    chunk_bases = max(line_width, chunk_bases - chunk_bases % line_width)
+    rng = np.random.default_rng(seed)
+    
+    with atomic_output(path) as tmp_path:
+        with _open_output(tmp_path, path) as f:
+            for chrom, size in chrom_sizes.items():
+                f.write(f">{chrom}\n".encode())
+                for start in range(0, size, chunk_bases):
+                    n = min(chunk_bases, size - start)
+                    codes = rng.integers(0, 4, size=n, dtype=np.uint8)
+                    # About 10% lowercase and 1% N, in runs of 100 bases
+                    runs = rng.random((n + 99) // 100)
+                    mask = np.repeat(runs, 100)[:n]
+                    codes[mask < 0.1] += 4
+                    codes[mask > 0.99] = 8
+                    bases = alphabet[codes]
+                    f.write(b'\n'.join(bases[i:i + line_width].tobytes() for i in range(0, n, line_width)) + b'\n')
+    return path
@@ -15,6 +15,12 @@ setup(
         "requests",  # HTTP请求
         "scikit-learn",  # 机器学习工具
     ],
+    entry_points={
+        "console_scripts": [
+            "genomics-benchmark-prefetch=genomics_benchmark.data.prefetch:main",
+            "genomics-benchmark-run=genomics_benchmark.tasks.batch:main",
+        ],
+    },
     python_requires=">=3.7",
     classifiers=[
         "Development Status :: 3 - Alpha",
@@ -0,0 +1,39 @@
+"""
+Smoke test of the offline benchmark runner
+"""
+import json
+import importlib.util
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).resolve().parents[2] / 'benchmarks' / 'run_benchmarks.py'
+
+
+def load_runner():
+    spec = importlib.util.spec_from_file_location('run_benchmarks', BENCHMARKS)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_runner_writes_comparable_results(tmp_path):
+    runner = load_runner()
+    output = tmp_path / 'results.json'
+    
+    status = runner.main([
+        '--rows', '200', '--repeat', '1', '--genome-bp', '10000',
+        '--workdir', str(tmp_path / 'work'), '--output', str(output)
+    ])
+    
+    assert status == 0
+    results = json.loads(output.read_text())
+    assert results['environment']['benchmark_version'] == runner.BENCHMARK_VERSION
+    stages = {r['stage'] for r in results['results']}
+    assert {'_load_file', '_standardize_columns', '_process_data', '_filter_data',
+            '_add_strand_info', 'calculate_metrics', '_decompress_gz'} <= stages
+    assert all(r['wall_seconds'] >= 0 and r['peak_memory_bytes'] >= 0 for r in results['results'])
+    
+    slower = json.loads(output.read_text())
+    for r in slower['results']:
+        r['wall_seconds'] = r['wall_seconds'] * 3 + 1
+    regressions = runner.compare_results(slower, results)
+    assert {r['stage'] for r in regressions if r['metric'] == 'wall_seconds'} == stages
@@ -0,0 +1,112 @@
+"""
+Shared pytest fixtures
+"""
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+
+class RangeServer:
+    """Local HTTP server stand-in serving in-memory files with Range support"""
+
+    def __init__(self, ranges: bool = True):
+        self.files = {}
+        self.ranges = ranges
+        self.get_counts = Counter()
+        self.bytes_sent = Counter()
+        self.fail_after = {}
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _lookup(self):
+                data = server.files.get(self.path)
+                if data is None:
+                    self.send_error(404)
+                return data
+
+            def do_HEAD(self):
+                data = self._lookup()
+                if data is None:
+                    return
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(data)))
+                if server.ranges:
+                    self.send_header('Accept-Ranges', 'bytes')
+                self.end_headers()
+
+            def do_GET(self):
+                data = self._lookup()
+                if data is None:
+                    return
+                with server.lock:
+                    server.get_counts[self.path] += 1
+                    limit = None
+                    if server.fail_after.get(self.path):
+                        limit, remaining = server.fail_after[self.path]
+                        server.fail_after[self.path] = (limit, remaining - 1) if remaining > 1 else None
+                match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+                if match and server.ranges:
+                    start = int(match.group(1))
+                    end = int(match.group(2)) if match.group(2) else len(data) - 1
+                    body = data[start:end + 1]
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+                else:
+                    body = data
+                    self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                time.sleep(server.delay)
+                if limit is not None:
+                    body = body[:limit]
+                self.wfile.write(body)
+                with server.lock:
+                    server.bytes_sent[self.path] += len(body)
+                if limit is not None:
+                    self.close_connection = True
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def add(self, path: str, data: bytes) -> str:
+        self.files[path] = data
+        return f'http://127.0.0.1:{self.httpd.server_port}{path}'
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def range_server():
+    server = RangeServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def plain_server():
+    server = RangeServer(ranges=False).start()
+    yield server
+    server.stop()
@@ -0,0 +1,115 @@
+"""
+Tests for the prefetching minibatch loader
+"""
+import random
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from genomics_benchmark.data import MinibatchLoader, ReferenceGenome, TwoBitGenome
+from genomics_benchmark.data.twobit import fasta_to_twobit
+
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(4)
+    n = 103
+    return pd.DataFrame({
+        'chr': rng.choice(['chr1', 'chr2'], size=n),
+        'enhancer_center': rng.integers(0, 3_000, size=n),
+        'hic_contact': rng.random(n),
+        'activity_enh': rng.random(n),
+        'distance': rng.integers(0, 10**6, size=n),
+        'labels': (rng.random(n) < 0.3).astype(np.uint8),
+    })
+
+
+@pytest.fixture
+def genome(tmp_path):
+    rng = random.Random(6)
+    fasta_path = tmp_path / 'genome.fa'
+    fasta_path.write_text(''.join(
+        f'>{chrom}\n' + ''.join(''.join(rng.choice('ACGT') for _ in range(60)) + '\n' for _ in range(50))
+        for chrom in ('chr1', 'chr2')
+    ))
+    with ReferenceGenome(fasta_path) as genome:
+        yield genome
+
+
+def test_batches_cover_rows_in_order(table):
+    loader = MinibatchLoader(table, batch_size=25, prefetch=0)
+
+    batches = list(loader)
+
+    assert len(loader) == len(batches) == 5
+    assert [len(batch['labels']) for batch in batches] == [25, 25, 25, 25, 3]
+    features = np.concatenate([batch['features'] for batch in batches])
+    assert features.dtype == np.float32
+    np.testing.assert_allclose(features, table[['hic_contact', 'activity_enh', 'distance']].to_numpy(), rtol=1e-6)
+    np.testing.assert_array_equal(np.concatenate([batch['labels'] for batch in batches]), table['labels'])
+    assert len(MinibatchLoader(table, batch_size=25, drop_last=True)) == 4
+    with pytest.raises(ValueError):
+        MinibatchLoader(table, feature_columns=['ABC Score'])
+
+
+def test_shuffling_is_deterministic_per_seed_and_epoch(table):
+    def order(seed, epoch):
+        loader = MinibatchLoader(table, batch_size=10, shuffle=True, seed=seed)
+        loader.set_epoch(epoch)
+        return np.concatenate([batch['index'] for batch in loader])
+
+    assert sorted(order(1, 0)) == list(range(len(table)))
+    np.testing.assert_array_equal(order(1, 0), order(1, 0))
+    assert not np.array_equal(order(1, 0), order(1, 1))
+    assert not np.array_equal(order(1, 0), order(2, 0))
+
+
+@pytest.mark.parametrize('options', [{'prefetch': 3}, {'num_workers': 2}])
+def test_prefetch_and_workers_match_serial_batches(table, genome, options):
+    common = dict(batch_size=16, shuffle=True, seed=3, genome=genome, sequence_width=32)
+    expected = list(MinibatchLoader(table, prefetch=0, **common))
+
+    batches = list(MinibatchLoader(table, **common, **options))
+
+    assert len(batches) == len(expected)
+    for batch, reference in zip(batches, expected):
+        assert batch['sequences'].shape == (len(batch['labels']), 32, 4)
+        for key in reference:
+            np.testing.assert_array_equal(batch[key], reference[key])
+
+
+def test_spawned_workers_reopen_twobit_genome(table, genome, tmp_path):
+    twobit_path = fasta_to_twobit(genome.fasta_path, tmp_path / 'genome.2bit')
+    common = dict(batch_size=40, genome=genome, sequence_width=24, one_hot=False)
+    expected = list(MinibatchLoader(table, prefetch=0, **common))
+
+    with TwoBitGenome(twobit_path) as twobit:
+        common['genome'] = twobit
+        batches = list(MinibatchLoader(table, num_workers=1, mp_context='spawn', **common))
+
+    for batch, reference in zip(batches, expected):
+        np.testing.assert_array_equal(batch['sequences'], reference['sequences'])
+
+
+def test_prefetch_thread_stops_and_reraises(table):
+    loader = MinibatchLoader(table, batch_size=10, prefetch=2)
+    threads = threading.active_count()
+
+    for _ in loader:
+        break
+
+    assert threading.active_count() == threads
+    build = loader._build
+    calls = []
+
+    def failing_build(indices):
+        calls.append(indices)
+        if len(calls) == 3:
+            raise RuntimeError("broken batch")
+        return build(indices)
+
+    loader._build = failing_build
+    with pytest.raises(RuntimeError, match="broken batch"):
+        list(loader)
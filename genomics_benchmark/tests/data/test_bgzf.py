@@ -0,0 +1,85 @@
+"""
+Tests for streaming decompression and BGZF output
+"""
+import gzip
+import os
+import random
+import shutil
+
+import pytest
+
+from genomics_benchmark.data.bgzf import BgzfReader, is_bgzf, iter_gzip_chunks
+from genomics_benchmark.data.reference_genome import _decompress_gz
+
+
+def _fasta(num_bases):
+    rng = random.Random(0)
+    seq = "".join(rng.choice("ACGTN") for _ in range(num_bases))
+    lines = [seq[i:i + 60] for i in range(0, len(seq), 60)]
+    return (">chr1\n" + "\n".join(lines) + "\n").encode()
+
+
+def test_streaming_decompression_of_multi_member_gzip(tmp_path):
+    payload = _fasta(300_000)
+    gz_path = tmp_path / "genome.fa.gz"
+    # Concatenated members, as produced by pigz or cat a.gz b.gz
+    gz_path.write_bytes(gzip.compress(payload[:100_000]) + gzip.compress(payload[100_000:]))
+
+    assert _decompress_gz(gz_path).read_bytes() == payload
+
+
+def test_truncated_gzip_is_rejected(tmp_path):
+    gz_path = tmp_path / "genome.fa.gz"
+    gz_path.write_bytes(gzip.compress(os.urandom(100_000))[:-1000])
+
+    with pytest.raises(EOFError):
+        b"".join(iter_gzip_chunks(gz_path))
+    with pytest.raises(EOFError):
+        _decompress_gz(gz_path)
+    assert not (tmp_path / "genome.fa").exists()
+
+
+def test_bgzf_output_is_gzip_compatible_and_random_access(tmp_path):
+    payload = _fasta(500_000)
+    gz_path = tmp_path / "genome.fa.gz"
+    gz_path.write_bytes(gzip.compress(payload))
+
+    bgz_path = _decompress_gz(gz_path, threads=4, bgzf=True)
+
+    assert bgz_path.name == "genome.fa.bgz"
+    assert is_bgzf(bgz_path)
+    assert (tmp_path / "genome.fa.bgz.gzi").exists()
+    assert gzip.decompress(bgz_path.read_bytes()) == payload
+    assert b"".join(iter_gzip_chunks(bgz_path, threads=4)) == payload
+    with BgzfReader(bgz_path) as reader:
+        for offset in (0, 65279, 65280, 200_000, len(payload) - 10):
+            assert reader.read(offset, 70_000) == payload[offset:offset + 70_000]
+
+
+@pytest.fixture
+def fake_pigz(tmp_path, monkeypatch):
+    """pigz on PATH that logs its calls and decompresses with gzip"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    log_path = tmp_path / "pigz.log"
+    script = bin_dir / "pigz"
+    script.write_text(f'#!/bin/sh\necho "$@" >> {log_path}\nexec gzip "$@"\n')
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return log_path
+
+
+@pytest.mark.skipif(shutil.which("gzip") is None, reason="gzip is not installed")
+def test_plain_gzip_is_piped_through_pigz(tmp_path, fake_pigz):
+    payload = _fasta(300_000)
+    gz_path = tmp_path / "genome.fa.gz"
+    gz_path.write_bytes(gzip.compress(payload[:100_000]) + gzip.compress(payload[100_000:]))
+    truncated_path = tmp_path / "truncated.fa.gz"
+    truncated_path.write_bytes(gzip.compress(os.urandom(100_000))[:-1000])
+
+    assert b"".join(iter_gzip_chunks(gz_path, threads=2)) == payload
+    assert fake_pigz.read_text().split() == ["-d", "-c", str(gz_path)]
+    assert b"".join(iter_gzip_chunks(gz_path, threads=1)) == payload
+    assert len(fake_pigz.read_text().splitlines()) == 1
+    with pytest.raises(EOFError):
+        b"".join(iter_gzip_chunks(truncated_path, threads=2))
@@ -0,0 +1,98 @@
+"""
+Tests for the content-addressed CacheStore
+"""
+import os
+import time
+
+from genomics_benchmark.data import CacheStore, DataDownloader
+from genomics_benchmark.utils.locking import FileLock
+
+
+def _write(path, data):
+    path.write_bytes(data)
+    return path
+
+
+def test_same_filename_from_different_urls_does_not_collide(tmp_path):
+    store = CacheStore(tmp_path / "store")
+    first = store.put("https://a.org/data.tsv", _write(tmp_path / "a", b"first"))
+    second = store.put("https://b.org/data.tsv", _write(tmp_path / "b", b"second"))
+
+    assert first != second
+    assert first.name == second.name == "data.tsv"
+    assert store.lookup("https://a.org/data.tsv").read_bytes() == b"first"
+    assert store.lookup("https://b.org/data.tsv").read_bytes() == b"second"
+
+
+def test_remove_keeps_objects_shared_with_other_urls(tmp_path):
+    store = CacheStore(tmp_path / "store")
+    store.put("https://a.org/data.tsv", _write(tmp_path / "a", b"same"))
+    path = store.put("https://b.org/copy.tsv", _write(tmp_path / "b", b"same"))
+
+    store.remove("https://a.org/data.tsv")
+
+    assert store.lookup("https://a.org/data.tsv") is None
+    assert store.lookup("https://b.org/copy.tsv") == path and path.exists()
+    store.remove("https://b.org/copy.tsv")
+    assert not path.exists()
+    assert store.entries() == {}
+
+
+def test_corrupt_object_is_discarded_on_lookup(tmp_path):
+    store = CacheStore(tmp_path / "store")
+    path = store.put("https://a.org/genome.fa.gz", _write(tmp_path / "a", b"ACGT" * 100))
+    path.write_bytes(b"TGCA" * 100)
+
+    assert store.lookup("https://a.org/genome.fa.gz") is None
+    assert not path.exists()
+    assert store.entries() == {}
+
+
+def test_lookup_hashes_changed_objects_outside_the_manifest_lock(tmp_path, monkeypatch):
+    store = CacheStore(tmp_path / "store")
+    path = store.put("https://a.org/genome.fa.gz", _write(tmp_path / "a", b"ACGT" * 100))
+    hashed = []
+    original = CacheStore.hash_file
+
+    def hash_file(file_path):
+        # Other processes can use the store while an object is hashed
+        with FileLock(store.root / "manifest.lock", timeout=1):
+            hashed.append(file_path)
+        return original(file_path)
+
+    monkeypatch.setattr(store, "hash_file", hash_file)
+
+    assert store.lookup("https://a.org/genome.fa.gz") == path
+    assert hashed == []
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert store.lookup("https://a.org/genome.fa.gz") == path
+    assert store.lookup("https://a.org/genome.fa.gz") == path
+    assert hashed == [path]
+
+
+def test_least_recently_used_objects_are_evicted(tmp_path):
+    store = CacheStore(tmp_path / "store", max_bytes=250)
+    for name in ("a", "b"):
+        store.put(f"https://x.org/{name}", _write(tmp_path / name, os.urandom(100)))
+        time.sleep(0.01)
+    # Touch "a" so that "b" becomes the least recently used object
+    assert store.lookup("https://x.org/a") is not None
+    store.put("https://x.org/c", _write(tmp_path / "c", os.urandom(100)))
+
+    assert store.lookup("https://x.org/b") is None
+    assert store.lookup("https://x.org/a") is not None
+    assert store.lookup("https://x.org/c") is not None
+    assert store.total_bytes == 200
+
+
+def test_downloader_reuses_store_objects(range_server, tmp_path):
+    url = range_server.add("/Merged.tsv", b"chrom\tchromStart\n" * 1000)
+    store = CacheStore(tmp_path / "store")
+    downloader = DataDownloader(tmp_path / "enhancer" / "Merged", store=store)
+
+    first = downloader.download(url)
+    second = downloader.download(url)
+
+    assert first == second
+    assert first.parent.parent.parent == store.objects_dir
+    assert range_server.get_counts["/Merged.tsv"] == 1
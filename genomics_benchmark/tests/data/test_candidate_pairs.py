@@ -0,0 +1,82 @@
+"""
+Tests for candidate enhancer-gene pair generation
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from genomics_benchmark.data import TSSIndex, iter_candidate_pairs, write_candidate_pairs
+
+
+@pytest.fixture
+def genes_and_elements():
+    rng = np.random.default_rng(1)
+    genes = pd.DataFrame({
+        'gene_name': [f'G{i}' for i in range(300)],
+        'chrom': rng.choice(['chr1', 'chr2'], size=300),
+        'tss': rng.integers(0, 1000000, size=300),
+        'strand': rng.choice(['+', '-'], size=300),
+    })
+    starts = rng.integers(0, 1000000, size=500)
+    elements = pd.DataFrame({
+        'chr': rng.choice(['chr1', 'chr2', 'chrY'], size=500),
+        'start': starts,
+        'end': starts + rng.integers(100, 2000, size=500),
+    })
+    return genes, elements
+
+
+def cross_join(genes, elements, threshold):
+    pairs = elements.reset_index().rename(columns={'index': 'element_id'}).merge(
+        genes.rename(columns={'chrom': 'chr', 'tss': 'gene_tss'}), on='chr'
+    )
+    pairs['distance'] = (pairs['start'] + pairs['end']) // 2 - pairs['gene_tss']
+    pairs['distance'] = pairs['distance'].abs()
+    return pairs[pairs['distance'] <= threshold]
+
+
+def test_pairs_match_cross_join_in_bounded_chunks(genes_and_elements):
+    genes, elements = genes_and_elements
+
+    chunks = list(iter_candidate_pairs(elements, TSSIndex(genes), 50000, max_pairs_per_chunk=100))
+
+    assert len(chunks) > 1
+    assert max(len(chunk) for chunk in chunks) <= 100
+    pairs = pd.concat(chunks)
+    expected = cross_join(genes, elements, 50000)
+    key = ['element_id', 'gene_name']
+    assert sorted(map(tuple, pairs[key].values)) == sorted(map(tuple, expected[key].values))
+    merged = pairs.merge(expected, on=key)
+    assert (merged['distance_x'] == merged['distance_y']).all()
+    assert (pairs.groupby('element_id')['distance_rank'].max() + 1 == pairs.groupby('element_id').size()).all()
+
+
+@pytest.mark.parametrize('suffix', ['.tsv.gz', '.parquet'])
+def test_write_candidate_pairs(genes_and_elements, tmp_path, suffix):
+    genes, elements = genes_and_elements
+    output_path = tmp_path / f'pairs{suffix}'
+
+    summary = write_candidate_pairs(elements, TSSIndex(genes), output_path, 20000, max_pairs_per_chunk=50)
+
+    written = pd.read_parquet(output_path) if suffix == '.parquet' else pd.read_csv(output_path, sep='\t')
+    assert summary['num_pairs'] == len(written) == len(cross_join(genes, elements, 20000))
+    assert summary['num_chunks'] > 1
+
+
+def test_parquet_schema_does_not_follow_first_chunk(tmp_path):
+    pytest.importorskip('pyarrow')
+    genes = pd.DataFrame({
+        'gene_name': [None, None, 'G2', 'G3'],
+        'gene_id': ['E0', 'E1', 'E2', 'E3'],
+        'chrom': ['chr1'] * 4,
+        'tss': [100, 200, 300000, 300100],
+        'strand': ['+'] * 4,
+    })
+    elements = pd.DataFrame({'chr': ['chr1', 'chr1'], 'start': [100, 300000], 'end': [200, 300100]})
+    output_path = tmp_path / 'pairs.parquet'
+
+    summary = write_candidate_pairs(elements, TSSIndex(genes), output_path, 1000, max_pairs_per_chunk=2)
+
+    written = pd.read_parquet(output_path)
+    assert summary['num_chunks'] == 2
+    assert written['gene_name'].isna().tolist() == [True, True, False, False]
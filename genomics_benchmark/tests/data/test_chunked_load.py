@@ -0,0 +1,86 @@
+"""
+Tests for chunked loading and writing in EnhancerProcessor
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from genomics_benchmark.data import EnhancerProcessor
+
+
+@pytest.fixture
+def processor(tmp_path):
+    rng = np.random.default_rng(2)
+    n = 250
+    starts = rng.integers(0, 10000000, size=n)
+    source = pd.DataFrame({
+        'chrom': rng.choice(['chr1', 'chr2', 'chrX'], size=n),
+        'chromStart': starts,
+        'chromEnd': starts + 500,
+        'measuredGeneSymbol': rng.choice(['A', 'B', 'C', 'D'], size=n),
+        'startTSS': (starts + rng.integers(-300000, 300000, size=n)).astype(float),
+        'ABCScoreDNaseOnlyAvgHicTrack2': rng.random(n),
+        'Significant': rng.random(n) < 0.2,
+        'Regulated': rng.random(n) < 0.1,
+        'EffectSize': rng.normal(size=n),
+    })
+    path = tmp_path / 'Merged.tsv'
+    source.to_csv(path, sep='\t', index=False)
+    processor = EnhancerProcessor('Merged', cache_root=tmp_path / 'cache')
+    processor.data_path = path
+    processor.download = lambda force=False: path
+    return processor
+
+
+@pytest.mark.parametrize('use_cache', [False, True])
+def test_chunks_match_full_load(processor, use_cache):
+    full = processor.load(distance_threshold=100000)
+
+    chunks = list(processor.load(distance_threshold=100000, use_cache=use_cache, chunksize=40))
+
+    assert len(chunks) == 7
+    combined = pd.concat(chunks)
+    assert combined.index.tolist() == full.index.tolist()
+    assert combined.astype(str).equals(full.astype(str))
+
+
+@pytest.mark.parametrize('with_missing', [False, True])
+def test_chunked_pipeline_writes_same_output(processor, tmp_path, with_missing):
+    if with_missing:
+        source = pd.read_csv(processor.data_path, sep='\t')
+        source.loc[[7, 130], 'startTSS'] = np.nan
+        source.loc[[71], 'chromStart'] = np.nan
+        source.to_csv(processor.data_path, sep='\t', index=False)
+
+    # Chunked first, so the CSV is streamed instead of read from the parsed table cache
+    chunked = processor.initialize_pipeline(output_path=tmp_path / 'chunked.tsv', clear_cache=False, chunksize=60)
+    full = processor.initialize_pipeline(output_path=tmp_path / 'full.tsv', clear_cache=False)
+
+    assert (tmp_path / 'full.tsv').read_text() == (tmp_path / 'chunked.tsv').read_text()
+    assert chunked['data_shape'] == full['data_shape']
+    assert chunked['metrics'] == pytest.approx(full['metrics'])
+    assert chunked['distribution']['label_counts'] == full['distribution']['label_counts']
+    output = pd.read_csv(tmp_path / 'chunked.tsv', sep='\t')
+    assert output['gene_tss'].dtype == np.int64 and output['start'].dtype == np.int64
+
+
+@pytest.mark.parametrize('chunksize', [None, 60])
+def test_missing_coordinates_keep_rows(processor, chunksize):
+    source = pd.read_csv(processor.data_path, sep='\t')
+    source.loc[[7, 130], 'startTSS'] = np.nan
+    source.loc[[71], 'chromStart'] = np.nan
+    source.to_csv(processor.data_path, sep='\t', index=False)
+    # Distances as computed on the float source columns, missing ones fail any threshold
+    distance = ((source['chromStart'] + source['chromEnd']) // 2 - source['startTSS']).abs()
+
+    def load(distance_threshold):
+        data = processor.load(distance_threshold=distance_threshold, chunksize=chunksize)
+        return data if chunksize is None else pd.concat(data)
+
+    del processor.config['distance_threshold']
+    unfiltered = load(None)
+    filtered = load(100000)
+
+    assert len(unfiltered) == len(source)
+    assert unfiltered['gene_tss'].isna().sum() == 2 and unfiltered['start'].isna().sum() == 1
+    assert len(filtered) == (distance <= 100000).sum()
@@ -0,0 +1,54 @@
+"""
+Stress tests for a cache_root shared by many worker processes
+"""
+import gzip
+import multiprocessing
+import os
+
+from genomics_benchmark.data import CacheStore, DataDownloader
+from genomics_benchmark.data.reference_genome import _decompress_gz
+
+NUM_WORKERS = 8
+
+
+def _download(args):
+    cache_root, url = args
+    store = CacheStore(os.path.join(cache_root, "store"))
+    downloader = DataDownloader(os.path.join(cache_root, "enhancer", "Merged"), store=store)
+    return str(downloader.download(url))
+
+
+def _decompress(gz_path):
+    return str(_decompress_gz(gz_path))
+
+
+def _run_workers(func, args):
+    context = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+    with context.Pool(NUM_WORKERS) as pool:
+        return pool.map(func, [args] * NUM_WORKERS)
+
+
+def test_concurrent_workers_fetch_each_object_once(range_server, tmp_path):
+    payload = os.urandom(200_000)
+    url = range_server.add("/Merged.tsv", payload)
+    range_server.delay = 0.5
+
+    paths = _run_workers(_download, (str(tmp_path), url))
+
+    assert range_server.get_counts["/Merged.tsv"] == 1
+    assert len(set(paths)) == 1
+    assert open(paths[0], "rb").read() == payload
+    assert len(CacheStore(tmp_path / "store").entries()) == 1
+
+
+def test_concurrent_workers_never_see_partial_decompression(tmp_path):
+    payload = b">chr1\n" + b"ACGT" * 500_000 + b"\n"
+    gz_path = tmp_path / "genome.fa.gz"
+    with gzip.open(gz_path, "wb") as f:
+        f.write(payload)
+
+    paths = _run_workers(_decompress, gz_path)
+
+    assert set(paths) == {str(tmp_path / "genome.fa")}
+    assert (tmp_path / "genome.fa").read_bytes() == payload
+    assert not list(tmp_path.glob(".*.tmp"))
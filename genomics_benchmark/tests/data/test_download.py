@@ -0,0 +1,52 @@
+"""
+Tests for DataDownloader against a local HTTP server
+"""
+import os
+
+import pytest
+
+from genomics_benchmark.data import DataDownloader
+
+PAYLOAD = os.urandom(300_000)
+
+
+def test_ranged_download_matches_source(range_server, tmp_path):
+    url = range_server.add('/genome.fa.gz', PAYLOAD)
+    downloader = DataDownloader(tmp_path, num_chunks=4, block_size=4096)
+
+    path = downloader.download(url, ranged=True)
+
+    assert path.read_bytes() == PAYLOAD
+    assert range_server.get_counts['/genome.fa.gz'] == 4
+    assert not list(tmp_path.glob('*.part*'))
+
+
+def test_ranged_download_resumes_after_interruption(range_server, tmp_path):
+    url = range_server.add('/genome.fa.gz', PAYLOAD)
+    # Every connection is dropped after 10 KB until the retries are used up
+    range_server.fail_after['/genome.fa.gz'] = (10_000, 4)
+    downloader = DataDownloader(tmp_path, num_chunks=2, block_size=1024, max_retries=2)
+
+    with pytest.raises(IOError):
+        downloader.download(url, ranged=True)
+    assert not (tmp_path / 'genome.fa.gz').exists()
+    assert (tmp_path / 'genome.fa.gz.part').exists()
+
+    sent_before = range_server.bytes_sent['/genome.fa.gz']
+    path = downloader.download(url, ranged=True)
+
+    assert path.read_bytes() == PAYLOAD
+    # Resumed chunks only transfer the bytes that were still missing
+    assert 0 < range_server.bytes_sent['/genome.fa.gz'] - sent_before < len(PAYLOAD)
+
+
+def test_truncated_stream_is_not_published(plain_server, tmp_path):
+    url = plain_server.add('/Merged.tsv', PAYLOAD)
+    plain_server.fail_after['/Merged.tsv'] = (10_000, 1)
+    downloader = DataDownloader(tmp_path)
+
+    with pytest.raises(Exception):
+        downloader.download(url, ranged=True)
+    assert not (tmp_path / 'Merged.tsv').exists()
+
+    assert downloader.download(url, ranged=True).read_bytes() == PAYLOAD
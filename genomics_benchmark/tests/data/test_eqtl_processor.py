@@ -0,0 +1,111 @@
+"""
+Tests for streaming eQTL Parquet processing
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from genomics_benchmark.data import EqtlProcessor, iter_tissue_batches
+from genomics_benchmark.data.dataset_config import DATASET_CONFIG
+
+
+def write_susie_parquet(path, n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    genes = [f'ENSG{i:011d}.1' for i in range(20)]
+    gene_index = rng.integers(0, len(genes), size=n)
+    table = pd.DataFrame({
+        'phenotype_id': [genes[i] for i in gene_index],
+        'gene_name': [f'GENE{i}' for i in gene_index],
+        'biotype': rng.choice(['protein_coding', 'lncRNA'], size=n),
+        'variant_id': [f'chr1_{pos}_A_G_b38' for pos in rng.integers(1, 10**8, size=n)],
+        'pip': rng.beta(0.3, 2, size=n),
+        'af': rng.random(n),
+        'cs_id': [f'cs_{i % 7}' for i in range(n)],
+        'cs_size': rng.integers(1, 50, size=n),
+        'afc': rng.normal(size=n),
+        'afc_se': rng.random(n),
+        'unused': rng.random(n),
+    })
+    pq.write_table(pa.Table.from_pandas(table, preserve_index=False), path, row_group_size=64)
+    return table
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    path = tmp_path / 'Adipose_Subcutaneous.parquet'
+    table = write_susie_parquet(path)
+    monkeypatch.setattr(EqtlProcessor, 'download', lambda self, force=False: setattr(self, 'data_path', path) or path)
+    return table
+
+
+def test_load_projects_columns_and_labels(source, tmp_path):
+    processor = EqtlProcessor('Adipose_Subcutaneous', cache_root=tmp_path / 'cache')
+
+    data = processor.load()
+
+    assert len(data) == len(source)
+    assert 'unused' not in data.columns
+    assert data['gene_name'].dtype == 'category'
+    assert data['pip'].dtype == np.float32
+    np.testing.assert_array_equal(data['labels'], (source['pip'] >= 0.5).astype(np.uint8))
+
+
+def test_pip_filters_are_pushed_down(source, tmp_path):
+    processor = EqtlProcessor('Adipose_Subcutaneous', cache_root=tmp_path / 'cache')
+
+    filtered = processor.load(min_pip=0.1, drop_ambiguous=True)
+
+    expected = source[(source['pip'] >= 0.1) & ((source['pip'] >= 0.5) | (source['pip'] < 0.01))]
+    assert filtered['variant_id'].tolist() == expected['variant_id'].tolist()
+    assert filtered['labels'].tolist() == [1] * len(expected)
+
+
+def test_batches_are_bounded_and_match_full_load(source, tmp_path):
+    processor = EqtlProcessor('Adipose_Subcutaneous', cache_root=tmp_path / 'cache')
+
+    batches = list(processor.load(min_pip=0.01, chunksize=30))
+
+    assert max(len(batch) for batch in batches) <= 30
+    combined = pd.concat(batches, ignore_index=True)
+    full = processor.load(min_pip=0.01)
+    assert combined.astype(str).equals(full.astype(str))
+    with pytest.raises(ValueError):
+        processor.load(chunksize=0)
+
+
+def test_chunked_pipeline_writes_same_output(source, tmp_path):
+    processor = EqtlProcessor('Adipose_Subcutaneous', cache_root=tmp_path / 'cache')
+
+    full = processor.initialize_pipeline(
+        output_path=tmp_path / 'full.tsv', clear_cache=False, score_columns=['af', 'afc']
+    )
+    chunked = processor.initialize_pipeline(
+        output_path=tmp_path / 'chunked.tsv', clear_cache=False, score_columns=['af', 'afc'], chunksize=100
+    )
+
+    assert (tmp_path / 'full.tsv').read_text() == (tmp_path / 'chunked.tsv').read_text()
+    assert chunked['data_shape'] == full['data_shape'] == (len(source), 11)
+    assert [row['AUROC'] for row in chunked['metrics']] == pytest.approx([row['AUROC'] for row in full['metrics']])
+    assert chunked['distribution']['label_counts'] == full['distribution']['label_counts']
+    assert [stage['stage'] for stage in chunked['stages']] == ['1. download', '2. process', '3. save', '5. statistics']
+
+
+def test_tissue_batches_are_streamed_in_order(tmp_path, monkeypatch):
+    paths = {}
+    for seed, tissue in enumerate(['Adipose_Subcutaneous', 'Whole_Blood']):
+        paths[tissue] = tmp_path / f'{tissue}.parquet'
+        write_susie_parquet(paths[tissue], n=100, seed=seed)
+    monkeypatch.setitem(DATASET_CONFIG['eqtl'], 'Whole_Blood', DATASET_CONFIG['eqtl']['Adipose_Subcutaneous'])
+    monkeypatch.setattr(
+        EqtlProcessor, 'download',
+        lambda self, force=False: setattr(self, 'data_path', paths[self.dataset_name]) or self.data_path
+    )
+
+    batches = list(iter_tissue_batches(cache_root=tmp_path / 'cache', batch_size=40))
+
+    assert max(len(batch) for batch in batches) <= 40
+    assert all(batch.columns[0] == 'tissue' for batch in batches)
+    assert pd.concat(batches)['tissue'].value_counts().to_dict() == {'Adipose_Subcutaneous': 100, 'Whole_Blood': 100}
@@ -0,0 +1,57 @@
+"""
+Tests for the cached gene annotation table
+"""
+import gzip
+
+import pandas as pd
+import pytest
+
+from genomics_benchmark.data import EnhancerProcessor, gene_annotation
+
+GTF = (
+    "##description: test annotation\n"
+    'chr1\tHAVANA\tgene\t11869\t14409\t.\t+\t.\tgene_id "ENSG1"; gene_type "lncRNA"; gene_name "DDX11L2";\n'
+    'chr1\tHAVANA\ttranscript\t11869\t14409\t.\t+\t.\tgene_id "ENSG1"; gene_name "DDX11L2";\n'
+    'chr1\tHAVANA\tgene\t14404\t29570\t.\t-\t.\tgene_id "ENSG2"; gene_type "unprocessed_pseudogene"; gene_name "WASH7P";\n'
+    'chr2\tHAVANA\tgene\t100\t200\t.\t-\t.\tgene_id "ENSG3"; gene_type "protein_coding"; gene_name "GENE3";\n'
+    'chr2\tHAVANA\tgene\t500\t600\t.\t+\t.\tgene_id "ENSG4"; gene_type "protein_coding"; gene_name "GENE3";\n'
+)
+
+
+@pytest.fixture
+def gtf_path(tmp_path):
+    path = tmp_path / "gencode.annotation.gtf.gz"
+    with gzip.open(path, "wt") as f:
+        f.write(GTF)
+    return path
+
+
+def test_gene_table_has_compact_columns(gtf_path):
+    genes = gene_annotation.build_gene_table(gtf_path)
+
+    assert genes.columns.tolist() == gene_annotation.GENE_TABLE_COLUMNS
+    assert genes["gene_name"].tolist() == ["DDX11L2", "WASH7P", "GENE3", "GENE3"]
+    assert genes["start"].tolist() == [11868, 14403, 99, 499]
+    assert genes["tss"].tolist() == [11868, 29569, 199, 499]
+    assert genes["biotype"].tolist()[:2] == ["lncRNA", "unprocessed_pseudogene"]
+    assert str(genes["chrom"].dtype) == "category" and str(genes["start"].dtype) == "int32"
+
+
+def test_gene_table_is_built_once(gtf_path, monkeypatch):
+    first = gene_annotation.load_gene_table(gtf_path)
+    gene_annotation._loaded_tables.clear()
+    monkeypatch.setattr(gene_annotation, "build_gene_table", lambda path: pytest.fail("GTF re-parsed"))
+
+    second = gene_annotation.load_gene_table(gtf_path)
+
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_add_strand_info_uses_first_gene_per_name(gtf_path, tmp_path):
+    processor = EnhancerProcessor("Merged", cache_root=tmp_path / "cache")
+    df = pd.DataFrame({"gene_name": ["WASH7P", "GENE3", "MISSING"], "distance": [1, 2, 3]})
+
+    result = processor._add_strand_info(df, gtf_path)
+
+    assert result["strand"].tolist()[:2] == ["-", "-"]
+    assert pd.isna(result["strand"].iloc[2])
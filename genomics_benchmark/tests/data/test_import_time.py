@@ -0,0 +1,57 @@
+"""
+Import-time regression checks for the lazily loaded data package
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from genomics_benchmark import data
+
+# Directory containing the genomics_benchmark package, where the child interpreter imports it from
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Wall-time budget for importing the package and reading a dataset config in a fresh interpreter
+IMPORT_BUDGET_SECONDS = 0.3
+
+HEAVY_MODULES = ['pandas', 'numpy', 'sklearn', 'scipy', 'requests', 'tqdm', 'pyarrow']
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_import(statement):
+    script = SCRIPT.format(statement=statement, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, '-c', script], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(output.stdout)
+
+
+def test_config_lookup_is_light():
+    statement = "from genomics_benchmark.data import get_dataset_config; get_dataset_config('enhancer', 'Merged')"
+    results = [run_import(statement) for _ in range(3)]
+    
+    assert results[0]['loaded'] == []
+    assert min(result['seconds'] for result in results) < IMPORT_BUDGET_SECONDS
+
+
+def test_processor_defers_metrics_and_network_dependencies():
+    result = run_import("from genomics_benchmark.data import EnhancerProcessor")
+    
+    assert not {'sklearn', 'requests', 'tqdm'} & set(result['loaded'])
+
+
+def test_all_exports_resolve():
+    for name in data.__all__:
+        assert getattr(data, name) is not None
+    assert set(data.__all__) <= set(dir(data))
+    with pytest.raises(AttributeError):
+        data.missing_name
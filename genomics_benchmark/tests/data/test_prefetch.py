@@ -0,0 +1,33 @@
+"""
+Tests for concurrent prefetch of DATASET_CONFIG
+"""
+import os
+
+from genomics_benchmark.data import prefetch, prefetch_datasets
+
+
+def test_prefetch_downloads_every_configured_file_once(range_server, tmp_path, monkeypatch):
+    payloads = {name: os.urandom(50_000) for name in ("a.tsv", "b.tsv", "genome.fa.gz", "genes.gtf.gz")}
+    urls = {name: range_server.add(f"/{name}", data) for name, data in payloads.items()}
+    monkeypatch.setattr(prefetch, "DATASET_CONFIG", {
+        "reference_genome": {
+            "hg38": {"fasta_url": urls["genome.fa.gz"], "gtf_url": urls["genes.gtf.gz"]}
+        },
+        "enhancer": {
+            "task_config": {},
+            "A": {"data_url": urls["a.tsv"]},
+            "B": {"data_url": urls["b.tsv"]}
+        }
+    })
+
+    summary = prefetch_datasets(cache_root=tmp_path, max_workers=4, num_chunks=2)
+
+    assert summary["num_files"] == 4 and summary["num_failed"] == 0
+    assert summary["downloaded_bytes"] == sum(len(data) for data in payloads.values())
+    for result in summary["files"]:
+        assert open(result["path"], "rb").read() == payloads[result["url"].split("/")[-1]]
+
+    # A second run is served from the store without network transfers
+    summary = prefetch_datasets(cache_root=tmp_path, max_workers=4)
+    assert summary["downloaded_bytes"] == 0
+    assert range_server.get_counts["/a.tsv"] == 1
@@ -0,0 +1,90 @@
+"""
+Tests for the indexed ReferenceGenome
+"""
+import gzip
+import random
+
+import numpy as np
+import pytest
+
+from genomics_benchmark.data.reference_genome import ReferenceGenome, _decompress_gz, read_fai
+
+
+def _write_fasta(path, sequences, line_width=60):
+    with open(path, "w") as f:
+        for name, seq in sequences.items():
+            f.write(f">{name} description\n")
+            for i in range(0, len(seq), line_width):
+                f.write(seq[i:i + line_width] + "\n")
+
+
+@pytest.fixture
+def sequences():
+    rng = random.Random(1)
+    return {
+        name: "".join(rng.choice("ACGTacgtN") for _ in range(length))
+        for name, length in (("chr1", 10_000), ("chr2", 7_321), ("chrM", 60))
+    }
+
+
+def test_fai_matches_samtools_layout(tmp_path, sequences):
+    fasta_path = tmp_path / "genome.fa"
+    _write_fasta(fasta_path, sequences)
+
+    ReferenceGenome(fasta_path).close()
+
+    records = read_fai(tmp_path / "genome.fa.fai")
+    assert [(r.name, r.length, r.linebases, r.linewidth) for r in records] == [
+        ("chr1", 10_000, 60, 61), ("chr2", 7_321, 60, 61), ("chrM", 60, 60, 61)
+    ]
+    content = fasta_path.read_bytes()
+    for record in records:
+        assert content[record.offset:record.offset + 60].decode() == sequences[record.name][:60]
+
+
+def test_fetch_matches_source_sequence(tmp_path, sequences):
+    fasta_path = tmp_path / "genome.fa"
+    _write_fasta(fasta_path, sequences, line_width=50)
+    rng = random.Random(2)
+
+    with ReferenceGenome(fasta_path) as genome:
+        for _ in range(200):
+            chrom = rng.choice(genome.chromosomes)
+            start = rng.randrange(genome.lengths[chrom])
+            end = rng.randrange(start, genome.lengths[chrom] + 1)
+            assert genome.fetch(chrom, start, end) == sequences[chrom][start:end]
+
+        # Regions within one line are views of the memory map
+        assert genome.fetch_array("chr1", 10, 40).base is not None
+        with pytest.raises(ValueError):
+            genome.fetch("chr1", 0, 10_001)
+        with pytest.raises(ValueError):
+            genome.fetch("chrX", 0, 10)
+
+
+def test_fetch_windows_pads_chromosome_edges(tmp_path, sequences):
+    fasta_path = tmp_path / "genome.fa"
+    _write_fasta(fasta_path, sequences)
+
+    with ReferenceGenome(fasta_path) as genome:
+        windows = genome.fetch_windows("chr2", np.array([-5, 100, 7_318]), 10)
+
+    seq = sequences["chr2"]
+    assert [w.tobytes().decode() for w in windows] == [
+        "NNNNN" + seq[:5], seq[100:110], seq[7_318:] + "N" * 7
+    ]
+
+
+def test_bgzf_genome_supports_random_access(tmp_path, sequences):
+    fasta_path = tmp_path / "genome.fa"
+    _write_fasta(fasta_path, sequences)
+    gz_path = tmp_path / "genome.fa.gz"
+    gz_path.write_bytes(gzip.compress(fasta_path.read_bytes()))
+
+    with ReferenceGenome(fasta_path) as plain, ReferenceGenome(_decompress_gz(gz_path, bgzf=True)) as bgzf:
+        assert bgzf.index == plain.index
+        assert bgzf.fetch("chr2", 1_234, 5_678) == plain.fetch("chr2", 1_234, 5_678)
+        np.testing.assert_array_equal(
+            bgzf.fetch_windows("chr1", np.array([-3, 9_995]), 8),
+            plain.fetch_windows("chr1", np.array([-3, 9_995]), 8)
+        )
@@ -0,0 +1,59 @@
+"""
+Tests for batched one-hot sequence window extraction
+"""
+import random
+
+import numpy as np
+import pandas as pd
+
+from genomics_benchmark.data import ReferenceGenome, extract_sequence_tensors, one_hot_encode
+
+
+def _naive_one_hot(seq):
+    return np.array([[base == b for b in "ACGT"] for base in seq.upper()], dtype=np.uint8)
+
+
+def test_one_hot_encode_handles_case_and_n():
+    encoded = one_hot_encode(np.frombuffer(b"ACGTacgtN", dtype=np.uint8))
+    np.testing.assert_array_equal(encoded, _naive_one_hot("ACGTacgtN"))
+
+
+def test_extract_sequence_tensors_matches_row_by_row(tmp_path):
+    rng = random.Random(3)
+    sequences = {chrom: "".join(rng.choice("ACGTN") for _ in range(5_000)) for chrom in ("chr1", "chr2")}
+    fasta_path = tmp_path / "genome.fa"
+    fasta_path.write_text("".join(
+        f">{chrom}\n" + "".join(seq[i:i + 70] + "\n" for i in range(0, len(seq), 70))
+        for chrom, seq in sequences.items()
+    ))
+    df = pd.DataFrame({
+        "chr": [rng.choice(["chr1", "chr2", "chrUn"]) for _ in range(300)],
+        "start": [rng.randrange(-50, 5_000) for _ in range(300)],
+    })
+    df["end"] = df["start"] + 101
+    df["gene_tss"] = [float(rng.randrange(5_000)) for _ in range(300)]
+    width = 64
+
+    def expected(center_column):
+        rows = []
+        for chrom, center in zip(df["chr"], df[center_column].astype(int)):
+            seq = sequences.get(chrom, "")
+            start = center - width // 2
+            rows.append(_naive_one_hot("".join(
+                seq[p] if 0 <= p < len(seq) else "N" for p in range(start, start + width)
+            )))
+        return np.stack(rows)
+
+    df["enhancer_center"] = (df["start"] + df["end"]) // 2
+    with ReferenceGenome(fasta_path) as genome:
+        serial = extract_sequence_tensors(df.drop(columns="enhancer_center"), genome, width, batch_size=64)
+        parallel = extract_sequence_tensors(
+            df, genome, width, output_path=tmp_path / "windows.npy", num_workers=2, batch_size=64
+        )
+        tss = extract_sequence_tensors(df, genome, width, center_column="gene_tss")
+
+    assert serial.shape == (300, width, 4)
+    np.testing.assert_array_equal(serial, expected("enhancer_center"))
+    np.testing.assert_array_equal(parallel, serial)
+    np.testing.assert_array_equal(np.load(tmp_path / "windows.npy"), serial)
+    np.testing.assert_array_equal(tss, expected("gene_tss"))
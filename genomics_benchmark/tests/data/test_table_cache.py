@@ -0,0 +1,114 @@
+"""
+Tests for the parsed table cache
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from genomics_benchmark.data import CacheStore, EnhancerProcessor
+from genomics_benchmark.data.table_cache import load_cached_table, find_cached_table
+
+MERGED_COLUMNS = {
+    'chrom': ['chr1', 'chr1', 'chr2'],
+    'chromStart': [100, 5000, 300],
+    'chromEnd': [300, 5400, 700],
+    'measuredGeneSymbol': ['A', 'B', 'C'],
+    'startTSS': [1200.0, 5100.0, 9000.0],
+    'ABCScoreDNaseOnlyAvgHicTrack2': [0.5, 0.1, 0.02],
+    'Significant': [True, False, True],
+    'Regulated': [True, False, False],
+    'EffectSize': [-0.3, 0.01, -0.1],
+    'CellType': ['K562', 'K562', 'K562'],
+}
+
+
+@pytest.fixture
+def processor(tmp_path):
+    source = tmp_path / 'Merged.tsv'
+    pd.DataFrame(MERGED_COLUMNS).to_csv(source, sep='\t', index=False)
+    processor = EnhancerProcessor('Merged', cache_root=tmp_path / 'cache')
+    processor.data_path = source
+    return processor
+
+
+def test_load_parses_source_once(processor, monkeypatch):
+    first = processor.load()
+    monkeypatch.setattr(processor, '_load_file', lambda path: pytest.fail('source re-parsed'))
+
+    second = processor.load()
+
+    pd.testing.assert_frame_equal(first, second)
+    assert second['labels'].tolist() == [1, 0, 0]
+    assert len(list(processor.cache_dir.glob('parsed-*.feather'))) == 1
+
+
+def test_load_projects_columns_and_compacts_dtypes(processor):
+    parsed = processor._parse_file(processor.data_path)
+    data = processor.load()
+
+    assert 'CellType' not in parsed.columns
+    assert str(parsed['chr'].dtype) == 'category' and str(parsed['gene_name'].dtype) == 'category'
+    assert parsed['gene_tss'].dtype == np.int32 and parsed['start'].dtype == np.int32
+    assert data['ABC Score'].dtype == np.float32 and data['labels'].dtype == np.uint8
+    assert data['distance'].tolist() == [1000, 100, 8500]
+    assert processor.memory_footprint(data)['total'] == data.memory_usage(deep=True).sum()
+
+
+def test_non_integral_coordinates_keep_their_dtype(processor, capsys):
+    compacted = processor._compact_dtypes(pd.DataFrame({'start': [100.5, 200.0], 'end': [300.0, 400.0]}))
+
+    assert compacted['start'].tolist() == [100.5, 200.0]
+    assert compacted['end'].dtype == np.int32
+    assert 'Warning: keeping float64 coordinates in column start' in capsys.readouterr().out
+
+
+def test_cache_key_follows_source_and_config(processor, tmp_path):
+    calls = []
+
+    def parse(path):
+        calls.append(path)
+        return pd.read_csv(path, sep='\t')
+
+    cache_dir = tmp_path / 'tables'
+    load_cached_table(processor.data_path, cache_dir, {'label_column': 'Regulated'}, parse)
+    load_cached_table(processor.data_path, cache_dir, {'label_column': 'Regulated'}, parse)
+    load_cached_table(processor.data_path, cache_dir, {'label_column': 'Significant'}, parse)
+    tables = set(cache_dir.glob('parsed-*.feather'))
+    pd.DataFrame(MERGED_COLUMNS).head(2).to_csv(processor.data_path, sep='\t', index=False)
+    table = load_cached_table(processor.data_path, cache_dir, {'label_column': 'Regulated'}, parse)
+
+    assert len(calls) == 3
+    assert len(table) == 2
+    # The table of the old source content with the same config is removed, the other config's is kept
+    remaining = set(cache_dir.glob('parsed-*.feather'))
+    assert len(tables) == len(remaining) == 2 and len(tables & remaining) == 1
+    assert len(list(cache_dir.glob('parsed-*.lock'))) == 2
+
+
+def test_new_store_version_of_source_replaces_table(tmp_path):
+    url = 'https://example.org/Merged.tsv'
+    store = CacheStore(tmp_path / 'store')
+    cache_dir = tmp_path / 'tables'
+    parse = lambda path: pd.read_csv(path, sep='\t')
+    sources, tables = [], []
+    for rows in (3, 2):
+        pd.DataFrame(MERGED_COLUMNS).head(rows).to_csv(tmp_path / 'download.tsv', sep='\t', index=False)
+        sources.append(store.put(url, tmp_path / 'download.tsv'))
+        load_cached_table(sources[-1], cache_dir, {'label_column': 'Regulated'}, parse, source_id=url)
+        tables.append(find_cached_table(sources[-1], cache_dir, {'label_column': 'Regulated'}))
+
+    # Every version is stored at its own content-addressed path
+    assert sources[0] != sources[1]
+    assert not tables[0].exists()
+    assert list(cache_dir.glob('parsed-*.feather')) == [tables[1]]
+
+
+def test_cached_numeric_columns_are_memory_mapped(processor):
+    processor.load()
+
+    table = load_cached_table(processor.data_path, processor.cache_dir, processor.parse_config(), pytest.fail)
+
+    # Zero-copy views of the mapped file are read-only
+    assert not table['start'].to_numpy().flags.writeable
+    assert not table['ABC Score'].to_numpy().flags.writeable
+    assert str(table['chr'].dtype) == 'category'
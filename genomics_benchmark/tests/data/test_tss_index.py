@@ -0,0 +1,58 @@
+"""
+Tests for the sorted-array TSS index
+"""
+import numpy as np
+import pandas as pd
+
+from genomics_benchmark.data import TSSIndex
+
+GENES = pd.DataFrame({
+    'gene_name': ['A', 'B', 'C', 'D', 'E'],
+    'chrom': pd.Categorical(['chr1', 'chr2', 'chr1', 'chr1', 'chr2']),
+    'tss': np.array([500, 100, 100, 1000, 900], dtype=np.int32),
+})
+
+
+def brute_force(chroms, positions, max_distance):
+    hits = []
+    for chrom, position in zip(chroms, positions):
+        genes = GENES[(GENES['chrom'] == chrom) & ((GENES['tss'] - position).abs() <= max_distance)]
+        distances = (genes['tss'] - position).abs()
+        hits.append(sorted(zip(distances, genes['tss'], genes.index)))
+    return hits
+
+
+def test_nearest():
+    index = TSSIndex(GENES)
+
+    gene, distance = index.nearest(['chr1', 'chr1', 'chr2', 'chrX', 'chr1'], [0, 760, 600, 5, 300])
+
+    assert gene.tolist() == [2, 3, 4, -1, 2]
+    assert distance.tolist() == [100, 240, 300, -1, 200]
+
+
+def test_within_matches_brute_force():
+    index = TSSIndex(GENES)
+    rng = np.random.default_rng(0)
+    chroms = rng.choice(['chr1', 'chr2', 'chr3'], size=200)
+    positions = rng.integers(0, 1200, size=200)
+
+    hits = index.within(chroms, positions, max_distance=300)
+
+    expected = brute_force(chroms, positions, 300)
+    assert len(hits.offsets) == len(positions) + 1
+    for i, query_hits in enumerate(expected):
+        segment = slice(hits.offsets[i], hits.offsets[i + 1])
+        assert (hits.query[segment] == i).all()
+        assert hits.gene[segment].tolist() == [row for _, _, row in query_hits]
+        assert hits.distance[segment].tolist() == [d for d, _, _ in query_hits]
+        assert hits.rank[segment].tolist() == list(range(len(query_hits)))
+
+
+def test_within_in_position_order_keeps_ranks():
+    index = TSSIndex(GENES)
+
+    hits = index.within(['chr1'], [900], max_distance=1000, sort_by_distance=False)
+
+    assert GENES['gene_name'][hits.gene].tolist() == ['C', 'A', 'D']
+    assert hits.rank.tolist() == [2, 1, 0]
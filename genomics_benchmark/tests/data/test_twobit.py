@@ -0,0 +1,48 @@
+"""
+Tests for the 2-bit packed genome store
+"""
+import random
+import struct
+
+import numpy as np
+
+from genomics_benchmark.data import ReferenceGenome, TwoBitGenome, one_hot_encode
+from genomics_benchmark.data.twobit import fasta_to_twobit
+
+
+def test_twobit_round_trip_preserves_n_blocks_and_soft_mask(tmp_path):
+    rng = random.Random(4)
+    sequences = {}
+    for chrom, length in (("chr1", 20_003), ("chr2", 999), ("chrM", 17)):
+        pieces = []
+        while sum(map(len, pieces)) < length:
+            alphabet = rng.choice(["ACGT", "acgt", "N", "n"])
+            pieces.append("".join(rng.choice(alphabet) for _ in range(rng.randrange(1, 300))))
+        sequences[chrom] = "".join(pieces)[:length]
+    fasta_path = tmp_path / "genome.fa"
+    fasta_path.write_text("".join(
+        f">{chrom}\n" + "".join(seq[i:i + 60] + "\n" for i in range(0, len(seq), 60))
+        for chrom, seq in sequences.items()
+    ))
+
+    twobit_path = fasta_to_twobit(fasta_path, tmp_path / "genome.2bit")
+
+    assert struct.unpack("<4I", twobit_path.read_bytes()[:16]) == (0x1A412743, 0, 3, 0)
+    assert twobit_path.stat().st_size < fasta_path.stat().st_size / 3
+    with TwoBitGenome(twobit_path) as genome, ReferenceGenome(fasta_path) as reference:
+        assert genome.chromosomes == ["chr1", "chr2", "chrM"]
+        assert genome.lengths == reference.lengths
+        for chrom, seq in sequences.items():
+            assert genome.fetch(chrom, 0, len(seq)) == seq
+            assert genome.fetch(chrom, 0, len(seq), soft_mask=False) == seq.upper()
+        assert genome.fetch("chr1", 12_345, 12_400) == sequences["chr1"][12_345:12_400]
+
+        starts = np.array([-10, 0, 5_001, 19_990])
+        np.testing.assert_array_equal(
+            genome.fetch_windows("chr1", starts, 33),
+            reference.fetch_windows("chr1", starts, 33)
+        )
+        np.testing.assert_array_equal(
+            genome.one_hot("chr2", 0, 999),
+            one_hot_encode(reference.fetch_array("chr2", 0, 999))
+        )
@@ -0,0 +1,102 @@
+"""
+Tests for variant id parsing and ref/alt sequence windows
+"""
+import random
+
+import numpy as np
+import pytest
+
+from genomics_benchmark.data import ReferenceGenome, extract_variant_windows, one_hot_encode, parse_variant_ids
+
+
+@pytest.fixture
+def genome(tmp_path):
+    rng = random.Random(5)
+    sequences = {chrom: "".join(rng.choice("ACGTacgt") for _ in range(2_000)) for chrom in ("chr1", "chr2")}
+    fasta_path = tmp_path / "genome.fa"
+    fasta_path.write_text("".join(
+        f">{chrom}\n" + "".join(seq[i:i + 60] + "\n" for i in range(0, len(seq), 60))
+        for chrom, seq in sequences.items()
+    ))
+    with ReferenceGenome(fasta_path) as genome:
+        yield genome, sequences
+
+
+def _random_variants(sequences, n, seed):
+    rng = random.Random(seed)
+    ids = []
+    for _ in range(n):
+        chrom = rng.choice(["chr1", "chr2", "chr1", "chrUn"])
+        pos = rng.randrange(1, 2_000)
+        seq = sequences.get(chrom, "A" * 2_100)
+        ref = seq[pos - 1:pos - 1 + rng.choice([1, 1, 3])].upper() or "A"
+        alt = "".join(rng.choice("ACGT") for _ in range(rng.choice([1, 1, 4])))
+        ids.append(f"{chrom}_{pos}_{ref}_{alt}_b38")
+    return ids
+
+
+def _naive_windows(sequences, variant_id, width):
+    chrom, pos, ref, alt, _ = variant_id.split("_")
+    start = int(pos) - 1
+    seq = sequences.get(chrom, "")
+    base = lambda i: seq[i] if 0 <= i < len(seq) else "N"
+    left = "".join(base(i) for i in range(start - width // 2, start))
+    ref_window = left + "".join(base(i) for i in range(start, start + width - width // 2))
+    alt_window = (left + alt + "".join(base(i) for i in range(start + len(ref), start + len(ref) + width)))[:width]
+    return ref_window, alt_window
+
+
+def test_parse_matches_string_split():
+    ids = ["chr1_13550_G_A_b38", "chrX_5_AT_A_b38", "chr1_100_C_CTTT", "chr10_248956422_GGA_G_b38"]
+
+    variants = parse_variant_ids(ids)
+
+    assert variants.chroms[variants.chrom_codes].tolist() == ["chr1", "chrX", "chr1", "chr10"]
+    assert variants.positions.tolist() == [13550, 5, 100, 248956422]
+    assert variants.ref.tolist() == [b"G", b"AT", b"C", b"GGA"]
+    assert variants.alt.tolist() == [b"A", b"A", b"CTTT", b"G"]
+    for bad in (["chr1_13550_G"], ["chr1_1e3_G_A_b38"], ["chr1_0_G_A_b38"]):
+        with pytest.raises(ValueError):
+            parse_variant_ids(bad)
+
+
+def test_empty_input(genome):
+    genome, _ = genome
+
+    variants = parse_variant_ids([])
+    windows = extract_variant_windows(genome, [], 16)
+
+    assert len(variants.positions) == len(variants.ref) == len(variants.chroms) == 0
+    assert windows["ref"].shape == windows["alt"].shape == (0, 16, 4)
+    assert windows["ref_match"].shape == (0,)
+
+
+def test_windows_match_string_substitution(genome):
+    genome, sequences = genome
+    ids = _random_variants(sequences, 200, seed=1)
+    width = 21
+
+    windows = extract_variant_windows(genome, ids, width, one_hot=False, chunk_size=64)
+
+    for row, variant_id in enumerate(ids):
+        ref_window, alt_window = _naive_windows(sequences, variant_id, width)
+        assert windows["ref"][row].tobytes().decode() == ref_window
+        assert windows["alt"][row].tobytes().decode() == alt_window
+        assert windows["ref_match"][row] == (not variant_id.startswith("chrUn"))
+
+
+def test_memory_mapped_output_matches(genome, tmp_path):
+    genome, sequences = genome
+    mismatch = "C" if sequences["chr1"][9].upper() != "C" else "G"
+    ids = np.array(_random_variants(sequences, 50, seed=2) + [f"chr1_10_{mismatch}_T_b38"])
+
+    in_memory = extract_variant_windows(genome, ids, 16, chunk_size=20)
+    on_disk = extract_variant_windows(genome, ids, 16, output_dir=tmp_path / "windows", chunk_size=7)
+
+    assert in_memory["ref"].shape == (51, 16, 4)
+    for key in ("ref", "alt", "ref_match"):
+        np.testing.assert_array_equal(np.load(tmp_path / "windows" / f"{key}.npy"), in_memory[key])
+        np.testing.assert_array_equal(on_disk[key], in_memory[key])
+    assert not in_memory["ref_match"][-1]
+    expected_ref, _ = _naive_windows(sequences, ids[0], 16)
+    np.testing.assert_array_equal(in_memory["ref"][0], one_hot_encode(np.frombuffer(expected_ref.encode(), np.uint8)))
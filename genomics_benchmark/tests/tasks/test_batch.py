@@ -0,0 +1,108 @@
+"""
+Tests for the parallel batch pipeline runner
+"""
+import json
+
+import pandas as pd
+import pytest
+
+from genomics_benchmark.data.dataset_config import DATASET_CONFIG
+from genomics_benchmark.tasks import batch
+from genomics_benchmark.utils.synthetic import synthetic_genes, write_synthetic_enhancer_table, write_synthetic_gtf
+
+
+@pytest.fixture
+def served(range_server, tmp_path, monkeypatch):
+    genes = synthetic_genes(40, seed=1)
+    gtf = write_synthetic_gtf(tmp_path / 'genes.gtf.gz', genes).read_bytes()
+    for name, seed in (('Merged', 1), ('Fulco', 2)):
+        table = write_synthetic_enhancer_table(tmp_path / f'{name}.tsv', 300, genes, seed=seed).read_bytes()
+        monkeypatch.setitem(DATASET_CONFIG['enhancer'][name], 'data_url', range_server.add(f'/{name}.tsv', table))
+    monkeypatch.setitem(DATASET_CONFIG['reference_genome'], 'hg38', {
+        'fasta_url': range_server.add('/genome.fa.gz', b''),
+        'gtf_url': range_server.add('/genes.gtf.gz', gtf),
+    })
+    return range_server, gtf
+
+
+def test_shared_genome_is_prepared_once(served, tmp_path):
+    server, gtf = served
+    
+    summary = batch.run_batch(
+        datasets=['Merged', 'Fulco'], cache_root=tmp_path / 'cache', output_dir=tmp_path / 'out',
+        num_workers=2, add_strand=True
+    )
+    
+    assert summary['num_failed'] == 0
+    assert list(summary['genomes']) == ['hg38']
+    assert server.bytes_sent['/genes.gtf.gz'] == len(gtf)
+    assert [result['dataset'] for result in summary['datasets']] == ['Merged', 'Fulco']
+    for result in summary['datasets']:
+        assert result['status'] == 'success' and result['data_shape'][0] == 300
+        assert result['genome_files']['gtf'] == summary['genomes']['hg38']['files']['gtf']
+        output = pd.read_csv(tmp_path / 'out' / 'enhancer' / f"{result['dataset']}.tsv", sep='\t')
+        assert output['strand'].notna().all()
+    json.dumps(summary)
+
+
+def test_cli_records_failures_and_writes_json(served, tmp_path, monkeypatch):
+    server, _ = served
+    monkeypatch.setitem(DATASET_CONFIG['enhancer']['Fulco'], 'data_url', server.add('/missing', None))
+    results_path = tmp_path / 'results.json'
+    
+    status = batch.main([
+        '--datasets', 'Merged', 'Fulco', '--cache-root', str(tmp_path / 'cache'),
+        '--workers', '1', '--results', str(results_path)
+    ])
+    
+    assert status == 1
+    summary = json.loads(results_path.read_text())
+    statuses = {result['dataset']: result['status'] for result in summary['datasets']}
+    assert statuses == {'Merged': 'success', 'Fulco': 'error'}
+    assert summary['genomes'] == {}
+    assert 0 < summary['datasets'][0]['metrics']['AUROC'] <= 1
+
+
+def test_eqtl_runs_only_when_selected():
+    assert {task for task, _ in batch.list_batch_jobs()} == {'enhancer'}
+    assert batch.list_batch_jobs(tasks=['eqtl']) == [('eqtl', 'Adipose_Subcutaneous')]
+
+
+def test_unknown_datasets_are_rejected():
+    with pytest.raises(ValueError):
+        batch.list_batch_jobs(datasets=['Nope'])
+    with pytest.raises(ValueError):
+        batch.list_batch_jobs(tasks=['eqtl_missing'])
+
+
+def test_eqtl_receives_only_its_options(range_server, tmp_path, monkeypatch, capsys):
+    pytest.importorskip('pyarrow')
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    source = pd.DataFrame({
+        'phenotype_id': ['ENSG1', 'ENSG2', 'ENSG3', 'ENSG4'],
+        'gene_name': ['A', 'B', 'C', 'D'],
+        'biotype': ['protein_coding'] * 4,
+        'variant_id': [f'chr1_{i}_A_G_b38' for i in range(1, 5)],
+        'pip': [0.9, 0.3, 0.005, 0.6],
+        'af': [0.1, 0.2, 0.3, 0.4],
+        'afc': [1.0, 0.5, 0.1, 0.2],
+        'afc_se': [0.1] * 4,
+    })
+    path = tmp_path / 'eqtl.parquet'
+    pq.write_table(pa.Table.from_pandas(source, preserve_index=False), path)
+    monkeypatch.setitem(
+        DATASET_CONFIG['eqtl']['Adipose_Subcutaneous'], 'data_url', range_server.add('/eqtl.parquet', path.read_bytes())
+    )
+    
+    summary = batch.run_batch(
+        tasks=['eqtl'], cache_root=tmp_path / 'cache', output_dir=tmp_path / 'out', num_workers=1,
+        distance_threshold=1000, add_strand=True, drop_ambiguous=True
+    )
+    
+    assert summary['num_failed'] == 0
+    assert summary['genomes'] == {}
+    assert "task eqtl are ignored: ['distance_threshold', 'add_strand']" in capsys.readouterr().out
+    output = pd.read_csv(tmp_path / 'out' / 'eqtl' / 'Adipose_Subcutaneous.tsv', sep='\t')
+    assert output['variant_id'].tolist() == ['chr1_1_A_G_b38', 'chr1_3_A_G_b38', 'chr1_4_A_G_b38']
+    assert output['labels'].tolist() == [1, 0, 1]
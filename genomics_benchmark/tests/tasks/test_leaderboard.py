@@ -0,0 +1,82 @@
+"""
+Tests for the leaderboard runner
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from genomics_benchmark.data import EnhancerProcessor
+from genomics_benchmark.tasks.leaderboard import run_leaderboard
+from genomics_benchmark.utils.metrics import evaluate_predictors
+
+
+@pytest.fixture
+def setup(tmp_path):
+    rng = np.random.default_rng(5)
+    n = 300
+    starts = rng.integers(0, 10000000, size=n)
+    source = pd.DataFrame({
+        'chrom': rng.choice(['chr1', 'chr2'], size=n),
+        'chromStart': starts,
+        'chromEnd': starts + 500,
+        'measuredGeneSymbol': rng.choice(['A', 'B', 'C', 'D', 'E'], size=n),
+        'startTSS': (starts + rng.integers(-200000, 200000, size=n)).astype(float),
+        'ABCScoreDNaseOnlyAvgHicTrack2': rng.random(n),
+        'Significant': rng.random(n) < 0.3,
+        'Regulated': rng.random(n) < 0.2,
+        'EffectSize': rng.normal(size=n),
+    })
+    data_path = tmp_path / 'Merged.tsv'
+    source.to_csv(data_path, sep='\t', index=False)
+    processor = EnhancerProcessor('Merged', cache_root=tmp_path / 'reference')
+    processor.data_path = data_path
+    data = processor.load()
+    
+    predictions = data[['chr', 'start', 'end', 'gene_name']].astype({'chr': str, 'gene_name': str})
+    predictions['score'] = data['labels'].to_numpy() + rng.normal(scale=0.8, size=len(data))
+    # Leave out a tenth of the pairs
+    paths = {}
+    for name, seed in (('good', 0), ('noisy', 1)):
+        frame = predictions.iloc[len(data) // 10:].copy()
+        if name == 'noisy':
+            frame['score'] = np.random.default_rng(seed).random(len(frame))
+        paths[name] = tmp_path / f'{name}.tsv'
+        frame.to_csv(paths[name], sep='\t', index=False)
+    return data, data_path, paths, tmp_path / 'cache'
+
+
+def test_leaderboard_matches_direct_evaluation(setup):
+    data, data_path, paths, cache_root = setup
+    
+    board = run_leaderboard(
+        paths, datasets=['Merged'], cache_root=cache_root, data_paths={'Merged': data_path}, num_workers=1
+    )
+    
+    assert board['predictor'].tolist() == ['ABC Score', 'distance', 'good', 'noisy']
+    assert not board['cached'].any()
+    expected = evaluate_predictors(data, ['ABC Score', 'distance']).set_index('score_column')
+    for predictor in ('ABC Score', 'distance'):
+        row = board.set_index('predictor').loc[predictor]
+        assert row['AUROC'] == pytest.approx(expected.loc[predictor, 'AUROC'])
+        assert row['AUPRC'] == pytest.approx(expected.loc[predictor, 'AUPRC'])
+    good = board.set_index('predictor').loc['good']
+    assert good['n'] == len(data)
+    assert good['n_scored'] == len(data) - len(data) // 10
+    assert good['AUROC'] > 0.7
+
+
+def test_only_changed_cells_are_recomputed(setup):
+    data, data_path, paths, cache_root = setup
+    kwargs = dict(datasets=['Merged'], cache_root=cache_root, data_paths={'Merged': data_path}, num_workers=2)
+    first = run_leaderboard(paths, **kwargs)
+    
+    second = run_leaderboard(paths, **kwargs)
+    assert second['cached'].all()
+    pd.testing.assert_frame_equal(first.drop(columns='cached'), second.drop(columns='cached'))
+    
+    noisy = pd.read_csv(paths['noisy'], sep='\t')
+    noisy['score'] = 1 - noisy['score']
+    noisy.to_csv(paths['noisy'], sep='\t', index=False)
+    third = run_leaderboard(paths, **kwargs).set_index('predictor')
+    assert third['cached'].to_dict() == {'ABC Score': True, 'distance': True, 'good': True, 'noisy': False}
+    assert third.loc['noisy', 'AUROC'] == pytest.approx(1 - first.set_index('predictor').loc['noisy', 'AUROC'])
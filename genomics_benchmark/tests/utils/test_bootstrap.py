@@ -0,0 +1,58 @@
+"""
+Tests for bootstrap confidence intervals and paired comparisons
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from genomics_benchmark.utils.bootstrap import bootstrap_distribution, bootstrap_metrics, compare_predictors
+from genomics_benchmark.utils.metrics import batch_auroc_auprc
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(5)
+    n = 300
+    labels = rng.random(n) < 0.2
+    return pd.DataFrame({
+        'labels': labels.astype(np.uint8),
+        'good': np.where(labels, rng.normal(1.5, 1, n), rng.normal(0, 1, n)).round(1),
+        'weak': np.where(labels, rng.normal(0.3, 1, n), rng.normal(0, 1, n)),
+        'distance': rng.integers(0, 20, size=n) * 1000,
+    })
+
+
+def test_distribution_matches_explicit_resamples(predictions):
+    labels = predictions['labels'].to_numpy(dtype=float)
+    scores = predictions['good'].to_numpy()
+
+    distribution = bootstrap_distribution(labels, scores[None], n_resamples=50, seed=7, batch_size=20)
+
+    seeds = np.random.SeedSequence(7).spawn(3)
+    indices = np.concatenate([
+        np.random.default_rng(seed).integers(0, len(labels), size=(size, len(labels)))
+        for seed, size in zip(seeds, [20, 20, 10])
+    ])
+    auroc, auprc = batch_auroc_auprc(labels[indices], scores[indices])
+    assert distribution[0, 0] == pytest.approx(auroc)
+    assert distribution[0, 1] == pytest.approx(auprc)
+
+
+def test_results_do_not_depend_on_workers(predictions):
+    serial = bootstrap_metrics(predictions, ['good', 'distance'], n_resamples=200, num_workers=1)
+    parallel = bootstrap_metrics(predictions, ['good', 'distance'], n_resamples=200, num_workers=2)
+
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert (serial['ci_lower'] <= serial['estimate']).all()
+    assert (serial['estimate'] <= serial['ci_upper']).all()
+
+
+def test_paired_comparison(predictions):
+    different = compare_predictors(predictions, 'good', 'weak', n_resamples=500)
+    same = compare_predictors(predictions, 'good', 'good', n_resamples=100)
+
+    assert different['metric'].tolist() == ['AUROC', 'AUPRC']
+    assert (different['difference'] > 0).all()
+    assert (different['p_value'] < 0.01).all()
+    assert (same['p_value'] == 1).all()
+    assert (same['difference'] == 0).all()
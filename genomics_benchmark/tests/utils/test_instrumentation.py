@@ -0,0 +1,91 @@
+"""
+Tests for stage instrumentation
+"""
+import gzip
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from genomics_benchmark.data import EnhancerProcessor
+from genomics_benchmark.data.reference_genome import _decompress_gz
+from genomics_benchmark.utils import instrumentation
+from genomics_benchmark.utils.instrumentation import StageRecorder, record_stage
+
+
+def test_nested_stages_and_errors():
+    events = []
+    recorder = StageRecorder(hooks=[lambda event, record: events.append((event, record['stage']))],
+                             trace_memory=True)
+    
+    with recorder.stage('outer', rows_in=10) as stage:
+        with record_stage('inner') as inner:
+            inner['bytes_written'] = 5
+            np.ones(1 << 20)
+        stage['rows_out'] = 3
+    with pytest.raises(RuntimeError):
+        with recorder.stage('failing'):
+            raise RuntimeError('boom')
+    
+    records = {record['stage']: record for record in recorder.summary()}
+    assert records['inner']['parent'] == 'outer' and records['inner']['bytes_written'] == 5
+    assert records['outer']['rows_in'] == 10 and records['outer']['rows_out'] == 3
+    assert records['outer']['peak_traced_bytes'] >= 8 << 20
+    assert records['outer']['wall_seconds'] >= records['inner']['wall_seconds'] >= 0
+    assert records['failing']['status'] == 'error' and records['failing']['error_message'] == 'boom'
+    assert events[:4] == [('stage_start', 'outer'), ('stage_start', 'inner'),
+                          ('stage_end', 'inner'), ('stage_end', 'outer')]
+
+
+def test_helpers_are_recorded_only_inside_stages(tmp_path):
+    gz_path = tmp_path / 'genome.fa.gz'
+    with gzip.open(gz_path, 'wb') as f:
+        f.write(b'>chr1\nACGT\n')
+    recorder = StageRecorder()
+    
+    _decompress_gz(gz_path, tmp_path / 'outside.fa')
+    with recorder.stage('genome'):
+        _decompress_gz(gz_path, tmp_path / 'inside.fa')
+    
+    assert [record['stage'] for record in recorder.records] == ['decompress_gz', 'genome']
+    assert recorder.records[0]['bytes_read'] == gz_path.stat().st_size
+    assert recorder.records[0]['bytes_written'] == 11
+
+
+def test_pipeline_records_stages(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 100
+    starts = rng.integers(0, 1000000, size=n)
+    path = tmp_path / 'Merged.tsv'
+    pd.DataFrame({
+        'chrom': 'chr1',
+        'chromStart': starts,
+        'chromEnd': starts + 500,
+        'measuredGeneSymbol': rng.choice(['A', 'B'], size=n),
+        'startTSS': starts + 1000.0,
+        'ABCScoreDNaseOnlyAvgHicTrack2': rng.random(n),
+        'Significant': rng.random(n) < 0.3,
+        'Regulated': np.arange(n) % 4 == 0,
+        'EffectSize': rng.normal(size=n),
+    }).to_csv(path, sep='\t', index=False)
+    processor = EnhancerProcessor('Merged', cache_root=tmp_path / 'cache')
+    processor.data_path = path
+    processor.download = lambda force=False: path
+    stream = io.StringIO()
+    hook = instrumentation.json_event_hook(stream)
+    instrumentation.register_hook(hook)
+    try:
+        results = processor.initialize_pipeline(output_path=tmp_path / 'out.tsv', clear_cache=False)
+    finally:
+        instrumentation.unregister_hook(hook)
+    
+    stages = {record['stage']: record for record in results['stages']}
+    assert list(stages) == ['1. download', '2. process', '3. save', '5. statistics']
+    assert stages['2. process']['rows_out'] == n
+    assert stages['2. process']['bytes_read'] == path.stat().st_size
+    assert stages['3. save']['bytes_written'] == (tmp_path / 'out.tsv').stat().st_size
+    assert all(record['status'] == 'success' and record['cpu_seconds'] >= 0 for record in results['stages'])
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [event['event'] for event in events].count('stage_end') == 4
@@ -0,0 +1,74 @@
+"""
+Tests for the vectorized ranking metrics
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import average_precision_score, roc_auc_score, roc_curve
+
+from genomics_benchmark.utils.metrics import (
+    batch_auroc_auprc, binary_curves, evaluate_predictors, predictor_curves
+)
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(3)
+    n = 500
+    labels = rng.random(n) < 0.15
+    df = pd.DataFrame({
+        'labels': labels.astype(np.uint8),
+        'ABC Score': np.where(labels, rng.random(n) + 0.2, rng.random(n)).astype(np.float32),
+        # Heavily tied scores
+        'activity_enh': rng.integers(0, 4, size=n).astype(float),
+        'distance': rng.integers(0, 1000, size=n) // 50 * 50,
+    })
+    df.loc[df.index[::37], 'activity_enh'] = np.nan
+    return df
+
+
+def test_batch_metrics_match_sklearn_with_ties():
+    rng = np.random.default_rng(4)
+    labels = rng.integers(0, 2, size=(20, 80))
+    scores = rng.integers(0, 6, size=(20, 80)).astype(float)
+
+    auroc, auprc = batch_auroc_auprc(labels, scores)
+
+    assert auroc == pytest.approx([roc_auc_score(y, s) for y, s in zip(labels, scores)])
+    assert auprc == pytest.approx([average_precision_score(y, s) for y, s in zip(labels, scores)])
+
+
+def test_single_class_is_nan():
+    auroc, auprc = batch_auroc_auprc(np.ones(5), np.arange(5.0))
+
+    assert np.isnan(auroc) and np.isnan(auprc)
+
+
+def test_evaluate_predictors_matches_sklearn(predictions):
+    table = evaluate_predictors(predictions, ['ABC Score', 'activity_enh', 'distance'])
+
+    assert table['score_column'].tolist() == ['ABC Score', 'activity_enh', 'distance']
+    for row in table.itertuples():
+        scores = predictions[row.score_column]
+        valid = scores.notna()
+        y, s = predictions['labels'][valid], scores[valid]
+        s = -s if row.score_column == 'distance' else s
+        assert row.n == valid.sum()
+        assert row.AUROC == pytest.approx(roc_auc_score(y, s))
+        assert row.AUPRC == pytest.approx(average_precision_score(y, s))
+
+
+def test_curves_match_sklearn(predictions):
+    y, s = predictions['labels'], predictions['ABC Score']
+    fpr, tpr, thresholds = roc_curve(y, s, drop_intermediate=False)
+
+    curves = binary_curves(y, s)
+    table = predictor_curves(predictions, ['ABC Score', 'activity_enh'])
+
+    assert curves['fpr'] == pytest.approx(fpr)
+    assert curves['tpr'] == pytest.approx(tpr)
+    assert curves['thresholds'][1:] == pytest.approx(thresholds[1:])
+    area = np.sum(np.diff(curves['fpr']) * (curves['tpr'][1:] + curves['tpr'][:-1]) / 2)
+    assert area == pytest.approx(roc_auc_score(y, s))
+    assert len(table[table['score_column'] == 'ABC Score']) == len(fpr)
+    assert table['recall'].max() == 1
@@ -0,0 +1,50 @@
+"""
+Tests for stratified metrics
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import average_precision_score, roc_auc_score
+
+from genomics_benchmark.utils.stratified import distance_bins, stratified_metrics
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(6)
+    n = 600
+    labels = rng.random(n) < 0.2
+    return pd.DataFrame({
+        'chr': pd.Categorical(rng.choice(['chr1', 'chr2', 'chr3', 'chrX'], size=n)),
+        'gene_name': rng.choice(['A', 'B', 'C', 'D', 'E', 'F'], size=n),
+        'distance': rng.integers(0, 2000000, size=n),
+        'ABC Score': np.where(labels, rng.random(n) + 0.1, rng.random(n)).round(2),
+        'labels': labels.astype(np.uint8),
+    })
+
+
+def test_matches_per_stratum_sklearn(predictions):
+    table = stratified_metrics(predictions, ['ABC Score', 'distance'])
+
+    predictions['distance_bin'] = distance_bins(predictions['distance'])
+    assert set(table['stratum']) == {'distance_bin', 'chr', 'gene_name'}
+    for row in table.itertuples():
+        group = predictions[predictions[row.stratum] == row.value]
+        scores = -group[row.score_column] if row.score_column == 'distance' else group[row.score_column]
+        assert row.n == len(group)
+        assert row.n_positive == group['labels'].sum()
+        assert row.positive_rate == pytest.approx(group['labels'].mean())
+        if group['labels'].nunique() == 2:
+            assert row.AUROC == pytest.approx(roc_auc_score(group['labels'], scores))
+            assert row.AUPRC == pytest.approx(average_precision_score(group['labels'], scores))
+        else:
+            assert np.isnan(row.AUROC)
+
+
+def test_distance_bins_and_missing_scores(predictions):
+    predictions.loc[predictions.index[:10], 'ABC Score'] = np.nan
+
+    table = stratified_metrics(predictions, strata=['distance_bin'], bins=[0, 1000000, np.inf])
+
+    assert table['value'].tolist() == ['[0, 1000000)', '>=1000000']
+    assert table['n'].sum() == len(predictions) - 10